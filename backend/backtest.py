@@ -0,0 +1,267 @@
+#VECTORIZED BACKTEST OF THE BREAKOUT + T-VWAP STRATEGY OVER THE DOWNLOADED CANDLES
+
+import argparse
+import math
+import sys
+import time
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from candle_store import open_store, to_frame
+from resample import load
+
+# The live engine's constants (start_stream.py)
+STRATEGY_DEFAULTS = {
+    'breakout_period': 100,
+    'lag_period': 40,
+    'tvwap_window': 300,  # Seconds
+    'volatility_threshold': 0.1,
+    'cooldown_period': 0,  # Bars after an exit before the next entry; the live engine doesn't enforce one
+    'take_profit': 6,
+    'stop_loss': 3,
+}
+
+REASONS = np.array(['TAKE_PROFIT', 'STOP_LOSS', 'END_OF_DATA'])
+
+
+def load_candles(granularity='M1', start=None, end=None, instrument='XAU_USD'):
+    """Loads the stored days from `start` to `end` (dates inclusive), resampled from M1 to any
+    minute granularity, into one frame with epoch seconds and o/h/l/c columns, oldest first."""
+    store = open_store()
+    dates = [date for date in store.dates(instrument, 'M1')
+             if not (start and date < start) and not (end and date > end)]
+    if not dates:
+        raise FileNotFoundError(f"No {instrument} M1 candles in the candle store")
+
+    records = load(store, instrument, granularity, dates)
+    records = records[np.unique(records['time'], return_index=True)[1]]  # Sorted, without duplicates
+    data = to_frame(records)[['time', 'o', 'h', 'l', 'c']]
+    data['epoch'] = records['time'].astype(np.float64)
+    return data
+
+
+def time_weighted_vwap(times, prices, window):
+    """T-VWAP at every point, with TVWAPWindow's semantics: each price weighted by the time until
+    the next one, over points at most `window` seconds older than the current one."""
+    weighted = np.concatenate([[0.0], np.cumsum(prices[:-1] * np.diff(times))])
+    start = np.searchsorted(times, times - window, side='left')
+    index = np.arange(len(times))
+    span = times - times[start]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        tvwap = (weighted - weighted[start]) / span
+    return np.where((index - start >= 1) & (span > 0), tvwap, 0.0)
+
+
+def expanding_std(values):
+    """Sample standard deviation of values[:i + 1] for every i (NaN for i == 0)."""
+    centered = values - values[0]  # Shifting keeps the sums small and the subtraction exact enough
+    n = np.arange(1, len(values) + 1)
+    total = np.cumsum(centered)
+    total_sq = np.cumsum(centered * centered)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        variance = (total_sq - total * total / n) / (n - 1)
+    return np.sqrt(np.maximum(variance, 0.0))
+
+
+def breakout_levels(close, period, every):
+    """Rolling high/low of `period` closes, recalculated on every `every`th bar and held in between
+    (NaN until the first recalculation with enough closes)."""
+    n = len(close)
+    high = np.full(n, np.nan)
+    low = np.full(n, np.nan)
+    recalc = np.arange(every - 1, n, every)
+    recalc = recalc[recalc >= period - 1]
+    if len(recalc):
+        windows = sliding_window_view(close, period)[recalc - period + 1]
+        held = np.full(n, -1)
+        held[recalc] = np.arange(len(recalc))
+        held = np.maximum.accumulate(held)
+        valid = held >= 0
+        high[valid] = windows.max(axis=1)[held[valid]]
+        low[valid] = windows.min(axis=1)[held[valid]]
+    return high, low
+
+
+class FirstCrossing:
+    """Sparse tables of range max/min, for finding the first bar at or after `start` whose
+    value crosses a level, for many (start, level) queries at once in O(log n) each."""
+
+    def __init__(self, values, mode):
+        self.mode = mode
+        self.tables = [values]
+        reduce = np.maximum if mode == 'max' else np.minimum
+        step = 1
+        while step * 2 <= len(values):
+            previous = self.tables[-1]
+            self.tables.append(reduce(previous[:-step], previous[step:]))
+            step *= 2
+
+    def first(self, start, level):
+        """First index >= start with value >= level ('max') or <= level ('min'); len(values) if none."""
+        n = len(self.tables[0])
+        position = np.asarray(start).copy()
+        for k in range(len(self.tables) - 1, -1, -1):
+            table, block = self.tables[k], 1 << k
+            fits = position + block <= n
+            candidates = np.where(fits, position, 0)
+            values = table[np.minimum(candidates, len(table) - 1)]
+            short = values < level if self.mode == 'max' else values > level
+            position = np.where(fits & short, position + block, position)
+        return position
+
+
+def chain_trades(entries, exits, cooldown):
+    """Picks the trades actually taken: one at a time, each entry after the previous exit (+ cooldown).
+
+    Entries are sorted bar indices and exits the bar each would exit on. The
+    next entry of every candidate is a searchsorted away; the trades taken are
+    the chain starting at the first one, marked by pointer doubling.
+    """
+    m = len(entries)
+    if m == 0:
+        return np.zeros(0, dtype=bool)
+
+    following = np.searchsorted(entries, exits + cooldown, side='right')  # m means none
+    jump = np.append(following, m)
+    taken = np.zeros(m + 1, dtype=bool)
+    taken[0] = True
+    for _ in range(max(1, math.ceil(math.log2(m + 1)))):
+        taken[jump[np.flatnonzero(taken)]] = True
+        jump = jump[jump]
+    return taken[:m]
+
+
+def run_backtest(times, high, low, close, breakout_period=100, lag_period=40, tvwap_window=300,
+                 volatility_threshold=0.1, cooldown_period=0, take_profit=6, stop_loss=3, cache=None):
+    """Runs the strategy over price arrays and returns the trades as a dict of arrays.
+
+    The rules are check_signals()'s: buy when the close is above the T-VWAP and
+    the breakout high, sell when it is below the T-VWAP and the breakout low,
+    only once the closes so far vary by at least `volatility_threshold`, and
+    only with no trade open. Orders get place_buy_order()/place_sell_order()'s
+    brackets: TP at ceil(price + take_profit) / floor(price - take_profit), SL
+    `stop_loss` away. An exit is the first later bar whose high/low reaches a
+    level, at that level; if a bar reaches both, the stop-loss is assumed.
+
+    Breakout levels are recalculated every `lag_period` bars. The live engine's
+    counter also advances on bars without a signal, so it recalculates about
+    every lag_period / 2 ticks; pass half the live value to match it.
+
+    Pass the same `cache` dict to repeated runs over the same arrays (as a
+    parameter sweep does) to reuse whatever doesn't depend on the parameters.
+    """
+    times, high, low, close = (np.asarray(a, dtype=float) for a in (times, high, low, close))
+    n = len(close)
+
+    cache = {} if cache is None else cache
+    if ('tvwap', tvwap_window) not in cache:
+        cache['tvwap', tvwap_window] = time_weighted_vwap(times, close, tvwap_window)
+    if 'std' not in cache:
+        cache['std'] = expanding_std(close)
+        cache['crossings'] = FirstCrossing(high, 'max'), FirstCrossing(low, 'min')
+
+    tvwap = cache['tvwap', tvwap_window]
+    breakout_high, breakout_low = breakout_levels(close, breakout_period, lag_period)
+    volatile = cache['std'] >= volatility_threshold
+
+    buy = volatile & (close > tvwap) & (close > breakout_high)
+    sell = volatile & (close < tvwap) & (close < breakout_low)
+    entries = np.flatnonzero((buy | sell)[:-1])  # A signal on the last bar can't be followed
+    is_buy = buy[entries]
+    price = close[entries]
+
+    tp = np.where(is_buy, np.ceil(price + take_profit), np.floor(price - take_profit))
+    sl = np.where(is_buy, price - stop_loss, price + stop_loss)
+
+    highs, lows = cache['crossings']
+    after = entries + 1
+    tp_bar = np.where(is_buy, highs.first(after, tp), lows.first(after, tp))
+    sl_bar = np.where(is_buy, lows.first(after, sl), highs.first(after, sl))
+
+    exit_bar = np.minimum(np.minimum(tp_bar, sl_bar), n - 1)
+    reason = np.where(sl_bar <= tp_bar, 1, 0)
+    reason = np.where((tp_bar >= n) & (sl_bar >= n), 2, reason)
+    exit_price = np.choose(reason, [tp, sl, close[exit_bar]])
+
+    taken = chain_trades(entries, exit_bar, cooldown_period)
+    direction = np.where(is_buy, 1.0, -1.0)
+    return {
+        'entry_bar': entries[taken],
+        'exit_bar': exit_bar[taken],
+        'side': np.where(is_buy[taken], 'buy', 'sell'),
+        'entry_price': price[taken],
+        'take_profit': tp[taken],
+        'stop_loss': sl[taken],
+        'exit_price': exit_price[taken],
+        'reason': REASONS[reason[taken]],
+        'pl': (direction * (exit_price - price))[taken],
+    }
+
+
+def summarize(trades):
+    pl = trades['pl']
+    wins, losses = pl[pl > 0], pl[pl < 0]
+    equity = np.cumsum(pl)
+    drawdown = np.maximum.accumulate(np.concatenate([[0.0], equity]))[1:] - equity if len(pl) else np.zeros(0)
+    return {
+        'trades': int(len(pl)),
+        'wins': int(len(wins)),
+        'losses': int(len(losses)),
+        'win_rate': round(len(wins) / len(pl), 4) if len(pl) else None,
+        'total_pl': round(float(pl.sum()), 4),
+        'average_pl': round(float(pl.mean()), 4) if len(pl) else None,
+        'profit_factor': round(float(wins.sum() / -losses.sum()), 4) if len(losses) else None,
+        'max_drawdown': round(float(drawdown.max()), 4) if len(pl) else 0.0,
+        'take_profits': int((trades['reason'] == 'TAKE_PROFIT').sum()),
+        'stop_losses': int((trades['reason'] == 'STOP_LOSS').sum()),
+    }
+
+
+def backtest(data, **params):
+    """Backtests a frame from load_candles() and returns (trades DataFrame, summary dict)."""
+    settings = {**STRATEGY_DEFAULTS, **params}
+    trades = run_backtest(data['epoch'].to_numpy(), data['h'].to_numpy(), data['l'].to_numpy(),
+                          data['c'].to_numpy(), **settings)
+    frame = pd.DataFrame(trades)
+    frame.insert(0, 'entry_time', data['time'].to_numpy()[trades['entry_bar']])
+    frame.insert(1, 'exit_time', data['time'].to_numpy()[trades['exit_bar']])
+    return frame.drop(columns=['entry_bar', 'exit_bar']), summarize(trades)
+
+
+def parse_params(pairs):
+    params = {}
+    for pair in pairs:
+        key, _, value = pair.partition('=')
+        if key not in STRATEGY_DEFAULTS:
+            raise SystemExit(f"Unknown parameter {key}; choose from {', '.join(STRATEGY_DEFAULTS)}")
+        params[key] = type(STRATEGY_DEFAULTS[key])(value)
+    return params
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest the breakout + T-VWAP strategy on downloaded candles.")
+    parser.add_argument('--granularity', default='M1', help="M1, M5, M7, ... (built from M1)")
+    parser.add_argument('--start', help="First date, YYYY-MM-DD")
+    parser.add_argument('--end', help="Last date, YYYY-MM-DD")
+    parser.add_argument('--set', nargs='*', default=[], metavar='NAME=VALUE', help="Override strategy constants")
+    parser.add_argument('--trades', help="Write the trades to this CSV file")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    data = load_candles(args.granularity, args.start, args.end)
+    loaded = time.perf_counter()
+    trades, summary = backtest(data, **parse_params(args.set))
+    finished = time.perf_counter()
+
+    print(f"{len(data)} candles from {data['time'].iloc[0]} to {data['time'].iloc[-1]}")
+    print(f"Loaded in {(loaded - started) * 1000:.1f} ms, backtested in {(finished - loaded) * 1000:.1f} ms")
+    for key, value in summary.items():
+        print(f"  {key:<14}{value}")
+    if args.trades:
+        trades.to_csv(args.trades, index=False)
+    elif len(trades):
+        print(trades.tail(10).to_string(index=False))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
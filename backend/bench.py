@@ -0,0 +1,275 @@
+#BENCHMARKS THE ENGINE'S HOT FUNCTIONS AND ITS END-TO-END TICK PATH, OFFLINE
+#
+# Usage: python bench.py [--json bench.json] [--compare before.json] [--ticks 2000] [--quick]
+#
+# Every input is generated from a fixed seed and the broker and feed are local
+# stand-ins (fake_oanda, fake_feed), so runs are repeatable and comparable.
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+import clock
+import http_pool
+import metrics
+from fake_feed import FEED_COLUMNS, FakeFeed
+from fake_oanda import FakeOanda, FakeTpqoa
+from indicators import IndicatorEngine, calculate_atr, calculate_breakout, calculate_rsi
+from live_feed import LiveFeedClient
+from replay import summarize_timings
+from rolling import TVWAPWindow
+
+SEED = 7
+START = pd.Timestamp('2024-10-23 09:00:00', tz='UTC')
+
+
+def random_walk(rows, seed=SEED, start_price=2750.0, seconds=3):
+    """Synthetic gold ticks: a frame with timestamp, open, high, low, close, one row every `seconds`."""
+    rng = np.random.default_rng(seed)
+    close = start_price + np.cumsum(rng.normal(0, 0.25, rows))
+    open_ = np.concatenate([[start_price], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.1, rows))
+    return pd.DataFrame({
+        'timestamp': START + pd.to_timedelta(np.arange(rows) * seconds, unit='s'),
+        'open': open_,
+        'high': np.maximum(open_, close) + spread,
+        'low': np.minimum(open_, close) - spread,
+        'close': close,
+    })
+
+
+def candles(rows, seed=SEED):
+    """The same walk as M1 candles with the candle feed's column names (Time, Open, High, Low, Close)."""
+    data = random_walk(rows, seed, seconds=60)
+    return data.rename(columns={'timestamp': 'Time', 'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close'})
+
+
+def feed_csv(data):
+    """`data` as the feed serves it: (header bytes, rows bytes)."""
+    text = data.to_csv(index=False, columns=list(FEED_COLUMNS), date_format='%Y-%m-%d %H:%M:%S+00:00')
+    header, _, rows = text.encode().partition(b'\n')
+    return header + b'\n', rows
+
+
+def time_calls(func, calls, repeat):
+    """Times `calls` calls of func(), `repeat` times over, after one untimed warm-up call. Returns the samples."""
+    func()
+    samples = []
+    for _ in range(repeat * calls):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def open_strategy(workdir):
+    """Imports start_stream against a FakeOanda, with its journal and transaction store in `workdir`.
+
+    Like replay.Replay, but on the wall clock. Returns (strategy module, fake broker).
+    """
+    fake = FakeOanda(price=2750.0).start()
+    clock.install(clock.WallClock())
+    http_pool.install_clients(api=FakeTpqoa(fake), client=fake.client())
+    import start_stream as strategy
+
+    strategy.open_transaction_store(os.path.join(workdir, 'transactions.db'))
+    strategy.positions.seed()
+    return strategy, fake
+
+
+def reset_strategy(strategy, workdir, name):
+    """Fresh tick journal (with its CSV export, as live), T-VWAP window, indicators and signal state."""
+    strategy.open_tick_journal(os.path.join(workdir, f'{name}.ticks'), csv_path=os.path.join(workdir, f'{name}.csv'))
+    strategy.tvwap_state = TVWAPWindow(strategy.tvwap_window)
+    strategy.live_indicators = IndicatorEngine(breakout_period=strategy.breakout_period)
+    strategy.breakout_high = strategy.breakout_low = None
+    strategy.price_update_count = 0
+    strategy.last_signal = None
+    strategy.active_order = None
+
+
+def bench_functions(strategy, workdir, calls, repeat):
+    """Single-function benchmarks at the window sizes the engine uses. Returns {name: timing summary}."""
+    timings = {}
+
+    # T-VWAP: a 300 s window of 3 s ticks, so appends evict as they add
+    ticks = random_walk(calls * repeat + 201)
+    window = strategy.tvwap_state = TVWAPWindow(strategy.tvwap_window)
+    appends = iter(zip(ticks['close'].to_numpy(), ticks['timestamp'].to_list()))
+    for _ in range(200):
+        window.append(*next(appends))
+    timings['tvwap_append[300s]'] = time_calls(lambda: window.append(*next(appends)), calls, repeat)
+    timings['calculate_t_vwap'] = time_calls(strategy.calculate_t_vwap, calls, repeat)
+
+    # Reference indicators over frames like the ones the engine builds:
+    # journal windows of breakout_period ticks and the candle feed's frame
+    for rows in (strategy.breakout_period, 1000):
+        data = random_walk(rows)
+        timings[f'calculate_breakout[{rows}]'] = time_calls(
+            lambda: calculate_breakout(data, strategy.breakout_period), calls, repeat)
+        timings[f'calculate_atr[{rows}]'] = time_calls(lambda: calculate_atr(data), calls, repeat)
+    for rows in (100, 1000):
+        data = candles(rows)
+        timings[f'calculate_rsi[{rows}]'] = time_calls(lambda: calculate_rsi(data), calls, repeat)
+
+    # write_to_csv: a new tick per call (as process_tick passes it) into the journal and its CSV export
+    reset_strategy(strategy, workdir, 'write_to_csv')
+    ticks = random_walk(calls * repeat + 1)
+    writes = iter([(ticks['timestamp'].iat[i], ticks.iloc[i:i + 1], ticks['close'].iat[i], 2750.0)
+                   for i in range(len(ticks))])
+    with contextlib.redirect_stdout(io.StringIO()):
+        timings['write_to_csv'] = time_calls(lambda: strategy.write_to_csv(*next(writes)), calls, repeat)
+    strategy.tick_journal.close()
+
+    # Feed parsing as LiveFeedClient.poll does it: header + the new tail of the file
+    header, body = feed_csv(random_walk(1000))
+    lines = body.splitlines(keepends=True)
+    for rows in (1, 100, 1000):
+        tail = header + b''.join(lines[-rows:])
+        timings[f'feed_parse[{rows}]'] = time_calls(lambda: pd.read_csv(io.BytesIO(tail)), calls, repeat)
+
+    return summarize_timings(timings)
+
+
+def bench_tick_path(strategy, fake, workdir, ticks):
+    """Ticks per second through fetch_live_price (poll, process_tick, check_signals) against the stand-ins.
+
+    Each tick is appended to a FakeFeed the strategy polls over HTTP; orders go
+    to the FakeOanda over HTTP, whose price follows the ticks so take-profits
+    and stop-losses fill. Only fetch_live_price is timed; the order monitor and
+    transaction sync, which run on their own stages live, run between ticks.
+    """
+    feed = FakeFeed().start()
+    strategy.live_price_feed = LiveFeedClient(feed.url, session=http_pool.get_session('feeds'))
+    reset_strategy(strategy, workdir, 'tick_path')
+
+    data = random_walk(ticks, seed=SEED + 1)
+    filled_before = sum(t['type'] == 'ORDER_FILL' for t in fake.transactions)
+
+    samples = []
+    output = io.StringIO()
+    wall_start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        strategy.live_price_feed.poll()  # First poll takes the header (no rows yet)
+        for i, row in enumerate(data.itertuples(index=False)):
+            feed.append(*row)
+            fake.set_price(float(row.close))
+
+            start = time.perf_counter()
+            strategy.fetch_live_price()
+            samples.append(time.perf_counter() - start)
+
+            strategy.monitor_active_order()
+            if i % 50 == 49:
+                strategy.sync_transactions()
+                output.seek(0)
+                output.truncate()  # Don't keep the strategy's log in memory
+    wall_seconds = time.perf_counter() - wall_start
+    journaled = len(strategy.tick_journal)
+    feed.stop()
+    strategy.tick_journal.close()
+
+    fills = [t for t in fake.transactions if t['type'] == 'ORDER_FILL']
+    return {
+        'ticks': len(samples),
+        'ticks_per_second': round(len(samples) / sum(samples), 1),
+        'ticks_per_second_wall': round(len(samples) / wall_seconds, 1),
+        'feed_requests': feed.requests,
+        'journaled': journaled,
+        'orders': sum(t['reason'] == 'MARKET_ORDER' for t in fills[filled_before:]),
+        'fetch_live_price': summarize_timings({'fetch_live_price': samples})['fetch_live_price'],
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(calls=200, repeat=5, ticks=2000):
+    with tempfile.TemporaryDirectory() as workdir:
+        with contextlib.redirect_stdout(io.StringIO()):
+            strategy, fake = open_strategy(workdir)
+        try:
+            functions = bench_functions(strategy, workdir, calls, repeat)
+            tick_path = bench_tick_path(strategy, fake, workdir, ticks)
+            tick_path['stages'] = metrics.registry.summary()  # Per-stage latencies from /metrics
+        finally:
+            strategy.transaction_store.close()
+            fake.stop()
+
+    return {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'settings': {'calls': calls, 'repeat': repeat, 'ticks': ticks, 'seed': SEED},
+        'functions': functions,
+        'tick_path': tick_path,
+    }
+
+
+def print_report(report, baseline=None):
+    def change(now, before):
+        return f"{before / now:>8.2f}x" if before and now else ''
+
+    before = (baseline or {}).get('functions', {})
+    print(f"{'function':<28}{'calls':>7}{'mean us':>10}{'p50 us':>10}{'p99 us':>10}"
+          + (f"{'before':>10}{'speedup':>9}" if baseline else ''))
+    for name, stats in report['functions'].items():
+        line = f"{name:<28}{stats['calls']:>7}{stats['mean_us']:>10}{stats['p50_us']:>10}{stats['p99_us']:>10}"
+        if baseline and name in before:
+            line += f"{before[name]['p50_us']:>10}{change(stats['p50_us'], before[name]['p50_us'])}"
+        print(line)
+
+    path = report['tick_path']
+    latency = path['fetch_live_price']
+    print(f"Tick path: {path['ticks']} ticks, {path['ticks_per_second']} ticks/s "
+          f"({path['ticks_per_second_wall']} ticks/s wall), p50 {latency['p50_us']} us, "
+          f"p99 {latency['p99_us']} us, {path['orders']} orders")
+    if baseline and 'tick_path' in baseline:
+        old = baseline['tick_path']['ticks_per_second']
+        print(f"Before: {old} ticks/s ({path['ticks_per_second'] / old:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the engine's hot functions and tick path offline.")
+    parser.add_argument('--json', default='bench.json', help="Write the results to this file")
+    parser.add_argument('--compare', help="Results of an earlier run to compare against")
+    parser.add_argument('--calls', type=int, default=200, help="Timed calls per round of each function")
+    parser.add_argument('--repeat', type=int, default=5, help="Rounds per function")
+    parser.add_argument('--ticks', type=int, default=2000, help="Ticks through the end-to-end tick path")
+    parser.add_argument('--quick', action='store_true', help="A short run, for checking the suite itself")
+    args = parser.parse_args()
+
+    if args.quick:
+        args.calls, args.repeat, args.ticks = 20, 1, 200
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    report = run(args.calls, args.repeat, args.ticks)
+    print_report(report, baseline)
+    with open(args.json, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
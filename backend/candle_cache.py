@@ -0,0 +1,158 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from candle_store import CANDLE_DTYPE, SECONDS_PER_DAY, open_store, to_records
+from http_pool import RateLimiter, load_http_config
+import resample
+
+MAX_CANDLES = 5000  # OANDA's limit on candles per request
+
+
+class Cancelled(Exception):
+    """Raised by CandleCache.fetch()/stream() when their `cancelled` callback asks them to stop."""
+
+
+def broker_time(epoch):
+    return pd.Timestamp(epoch, unit='s').strftime('%Y-%m-%dT%H:%M:%S')
+
+
+def day_start(epoch):
+    return int(epoch) - int(epoch) % SECONDS_PER_DAY
+
+
+class CandleCache:
+    """Broker M1 candles kept in the candle store, fetched only for time it doesn't cover yet.
+
+    The store records which [start, end) intervals have been fetched, empty ones
+    (weekends, holidays) included. A request is split into the uncovered gaps,
+    cut into chunks the broker returns in one response (whole UTC days of at
+    most MAX_CANDLES minutes where possible), and those are fetched concurrently
+    under the rate limit. Any granularity is then resampled from the stored M1
+    candles. A candle still forming is stored but its minute is left
+    uncovered, so it is fetched again next time.
+    """
+
+    def __init__(self, api, store=None, limiter=None, retries=3, workers=4, max_candles=MAX_CANDLES):
+        self.api = api
+        self.store = store or open_store()
+        self.limiter = limiter or RateLimiter(load_http_config()['requests_per_second'])
+        self.retries = retries
+        self.workers = workers
+        self.chunk_days = max(1, max_candles // (SECONDS_PER_DAY // 60))
+
+    def pieces(self, instrument, start, end):
+        """The uncovered parts of [start, end), up to now, as request-sized (start, end) chunks.
+
+        Chunks end at UTC midnight unless their gap ends first, so no chunk
+        spans more than `chunk_days` partitions.
+        """
+        now = int(time.time())
+        pieces = []
+        for gap_start, gap_end in self.store.missing(instrument, 'M1', int(start), min(int(end), now)):
+            while gap_start < gap_end:
+                chunk_end = min(gap_end, day_start(gap_start) + self.chunk_days * SECONDS_PER_DAY)
+                pieces.append((gap_start, chunk_end))
+                gap_start = chunk_end
+        return pieces
+
+    def fetch_piece(self, instrument, start, end):
+        """Fetches [start, end) into the store, one partition per UTC day. Returns the number of candles."""
+        for attempt in range(self.retries + 1):
+            try:
+                with self.limiter:
+                    data = self.api.get_history(
+                        instrument=instrument,
+                        start=broker_time(start),
+                        end=broker_time(end - 1),
+                        granularity='M1',
+                        price='M',  # Mid prices
+                        localize=False
+                    )
+                break
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                delay = 2 ** attempt
+                print(f"Retrying {instrument} {broker_time(start)} in {delay}s after error: {e}")
+                time.sleep(delay)
+
+        covered_end = min(end, int(time.time()) // 60 * 60)
+        if not data.empty:
+            records = to_records(data)
+            records = records[(records['time'] >= start) & (records['time'] < end)]
+            forming = records['time'][~records['complete']]
+            if len(forming):
+                covered_end = min(covered_end, int(forming.min()))
+            days = records['time'] - records['time'] % SECONDS_PER_DAY
+            for day in np.unique(days):
+                self.store.merge(instrument, 'M1', pd.Timestamp(day, unit='s').date(), records[days == day])
+        self.store.add_coverage(instrument, 'M1', start, covered_end)
+        return 0 if data.empty else len(data)
+
+    def _submit(self, pool, instrument, pieces, progress, cancelled):
+        """Starts every piece on `pool`. Returns {piece: future}."""
+        done = [0]
+        lock = threading.Lock()
+
+        def run(piece):
+            if cancelled and cancelled():
+                raise Cancelled()
+            fetched = self.fetch_piece(instrument, *piece)
+            if progress:
+                with lock:
+                    done[0] += 1
+                    count = done[0]
+                progress(count, len(pieces))
+            return fetched
+
+        return {piece: pool.submit(run, piece) for piece in pieces}
+
+    def fetch(self, instrument, start, end, progress=None, cancelled=None):
+        """Makes sure [start, end) is in the store. Returns the number of candles fetched.
+
+        progress(done, total) is called (from a worker thread) as each chunk is
+        stored; cancelled() is checked before each request and stops the fetch
+        with Cancelled.
+        """
+        pieces = self.pieces(instrument, start, end)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = self._submit(pool, instrument, pieces, progress, cancelled)
+            try:
+                return sum(future.result() for future in futures.values())
+            finally:
+                for future in futures.values():
+                    future.cancel()
+
+    def stream(self, instrument, granularity, start, end, progress=None, cancelled=None):
+        """Yields the candles of [start, end) at `granularity`, one UTC day at a time in time order.
+
+        Every missing chunk is requested up front; each day is yielded as soon as
+        the chunks it needs have arrived, so the first day of a long range shows
+        up after about one round-trip while the rest is still downloading.
+        """
+        start, end = int(start), int(end)
+        pieces = self.pieces(instrument, start, end)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = self._submit(pool, instrument, pieces, progress, cancelled)
+            try:
+                for day in range(day_start(start), end, SECONDS_PER_DAY):
+                    for piece, future in futures.items():
+                        if piece[0] < day + SECONDS_PER_DAY and piece[1] > day:
+                            future.result()  # Raises Cancelled or the fetch's error
+                    if cancelled and cancelled():
+                        raise Cancelled()
+                    date = str(pd.Timestamp(day, unit='s').date())
+                    records = resample.load(self.store, instrument, granularity, [date])
+                    records = records[(records['time'] >= start) & (records['time'] < end)]
+                    if len(records):
+                        yield records
+            finally:
+                for future in futures.values():
+                    future.cancel()
+
+    def load(self, instrument, granularity, start, end, progress=None, cancelled=None):
+        """Candles with a time in [start, end) at any minute granularity, fetching only what's missing."""
+        days = list(self.stream(instrument, granularity, start, end, progress, cancelled))
+        return np.concatenate(days) if days else np.empty(0, dtype=CANDLE_DTYPE)
@@ -0,0 +1,228 @@
+import numpy as np
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.lines import Line2D
+from matplotlib.patches import Rectangle
+from matplotlib.ticker import FuncFormatter, MaxNLocator
+
+# mplfinance's 'classic' style, which the playback chart used to be plotted with
+UP_COLOR = 'w'
+DOWN_COLOR = 'k'
+EDGE_COLOR = 'k'
+WICK_COLOR = 'k'
+
+
+class CandleRenderer:
+    """Draws candles up to a playback index, one new candle per frame.
+
+    The candles and axes are real artists that are only redrawn in full when the
+    view changes (a new day, the x-axis growing, a resize). In between, the
+    rendered chart is kept as a blitting background: a new candle is drawn onto
+    it and copied back, and the overlays (trade markers and horizontal lines)
+    are animated artists drawn over it, so a frame costs the same on the last
+    candle of the day as on the first.
+    """
+
+    def __init__(self, ax, canvas, title=None, width=0.6, x_limit=50, x_step=30):
+        self.ax = ax
+        self.canvas = canvas
+        self.title = title
+        self.width = width
+        self.initial_x_limit = x_limit
+        self.x_step = x_step  # Candles the x-axis grows by once playback reaches its end
+
+        self.wicks = LineCollection([], colors=WICK_COLOR, linewidths=1, zorder=2)
+        self.bodies = PolyCollection([], edgecolors=EDGE_COLOR, linewidths=1, zorder=3)
+        self.newest_wick = Line2D([], [], color=WICK_COLOR, linewidth=1, zorder=2, animated=True)
+        self.newest_body = Rectangle((0, 0), width, 0, edgecolor=EDGE_COLOR, linewidth=1, zorder=3, animated=True)
+
+        self.overlays = []  # Animated artists drawn over the background every frame
+        self.overlay_key = None
+        self.background = None
+        self.times = None
+        self.shown = -1  # Last candle index in the drawn chart
+        self.full_redraws = 0
+        self.frames = 0
+
+        canvas.mpl_connect('draw_event', self._on_draw)
+        canvas.mpl_connect('resize_event', self._on_resize)
+
+    def set_data(self, data):
+        """Takes a new day (Open/High/Low/Close columns, time index) and redraws from its first candle."""
+        self.times = None
+        self.highs = self.lows = np.zeros(0)
+        self.segments, self.verts, self.colors = np.zeros((0, 2, 2)), np.zeros((0, 4, 2)), np.zeros(0, dtype='<U1')
+        self._append(data)
+
+        self._reset_axes()
+        self.x_limit = self.initial_x_limit
+        self.shown = -1
+        self.overlay_key = None
+        self.background = None
+
+    def extend(self, data):
+        """Appends candles (e.g. the next day of a continuous timeline) after the ones held."""
+        ylim = self._ylim()
+        self._append(data)
+        if self._ylim() != ylim:
+            self.ax.set_ylim(*self._ylim())
+            self.background = None
+
+    def trim(self, count):
+        """Drops the first `count` candles, shifting the rest (and the view) left by as many."""
+        if count <= 0:
+            return
+        self.highs, self.lows = self.highs[count:], self.lows[count:]
+        self.segments, self.verts, self.colors = self.segments[count:].copy(), self.verts[count:].copy(), self.colors[count:]
+        self.segments[:, :, 0] -= count
+        self.verts[:, :, 0] -= count
+        self.times = self.times[count:]
+        self.shown = max(-1, self.shown - count)
+        self.x_limit = max(self.initial_x_limit, self.x_limit - count)
+        self.ax.set_ylim(*self._ylim())
+        self.overlay_key = None  # Marker positions moved
+        self.background = None
+
+    def _append(self, data):
+        opens, highs, lows, closes = (data[column].to_numpy(dtype=float) for column in ('Open', 'High', 'Low', 'Close'))
+        x = np.arange(len(self.highs), len(self.highs) + len(data), dtype=float)
+        bottom, top = np.minimum(opens, closes), np.maximum(opens, closes)
+        left, right = x - self.width / 2, x + self.width / 2
+
+        self.highs = np.concatenate([self.highs, highs])
+        self.lows = np.concatenate([self.lows, lows])
+        self.segments = np.concatenate([self.segments, np.stack([np.column_stack([x, lows]),
+                                                                 np.column_stack([x, highs])], axis=1)])
+        self.verts = np.concatenate([self.verts, np.stack([np.column_stack([left, bottom]), np.column_stack([left, top]),
+                                                           np.column_stack([right, top]),
+                                                           np.column_stack([right, bottom])], axis=1)])
+        self.colors = np.concatenate([self.colors, np.where(closes >= opens, UP_COLOR, DOWN_COLOR)])
+        self.times = data.index if self.times is None else self.times.append(data.index)
+
+    def _ylim(self):
+        return (self.lows.min() - 5, self.highs.max() + 5) if len(self.lows) else (0, 1)
+
+    def _reset_axes(self):
+        """Clears the axes and puts this renderer's artists back on them."""
+        ax = self.ax
+        ax.clear()
+        for artist in (self.wicks, self.bodies):
+            ax.add_collection(artist, autolim=False)
+        ax.add_line(self.newest_wick)
+        ax.add_patch(self.newest_body)
+        self.overlays = []
+
+        if self.title:
+            ax.set_title(self.title)
+        ax.set_ylim(*self._ylim())
+        ax.xaxis.set_major_locator(MaxNLocator(nbins=8, integer=True))
+        ax.xaxis.set_major_formatter(FuncFormatter(self._format_time))
+
+    def _format_time(self, x, pos=None):
+        index = int(round(x))
+        if self.times is None or not 0 <= index < len(self.times):
+            return ''
+        # Name the day too once the chart spans more than one
+        multi_day = self.times[0].date() != self.times[-1].date()
+        return self.times[index].strftime('%a %H:%M' if multi_day else '%H:%M')
+
+    def render(self, index, lines=(), buy_marker=None, sell_marker=None):
+        """Shows candles 0..index with the given overlays, redrawing as little as possible."""
+        if self.times is None or not len(self.times):
+            return
+        index = min(index, len(self.times) - 1)
+
+        if index >= self.x_limit:
+            while index >= self.x_limit:
+                self.x_limit += self.x_step
+            self.background = None  # The whole x-axis moves
+
+        self._update_overlays(tuple(lines), buy_marker, sell_marker)
+        self.frames += 1
+
+        if self.background is None or index < self.shown or index > self.shown + 1 \
+                or not self.canvas.supports_blit:
+            self._full_redraw(index)
+        elif index == self.shown + 1:
+            self._add_candle(index)
+        else:
+            self._blit_overlays()
+
+    def _full_redraw(self, index):
+        self.shown = index
+        self._sync_collections()
+        self.ax.set_xlim(0, self.x_limit)
+        self.full_redraws += 1
+        self.canvas.draw()  # _on_draw() captures the new background and draws the overlays
+
+    def _sync_collections(self):
+        """Puts every shown candle in the collections, for a full draw."""
+        count = self.shown + 1
+        self.wicks.set_segments(self.segments[:count])
+        self.bodies.set_verts(self.verts[:count])
+        self.bodies.set_facecolor(self.colors[:count])
+        self.newest_wick.set_visible(False)
+        self.newest_body.set_visible(False)
+
+    def _on_resize(self, event):
+        # The window redraws everything next, and the candles added since the last full redraw
+        # only exist in the old background
+        if self.times is not None:
+            self._sync_collections()
+
+    def _on_draw(self, event):
+        """After any full draw (ours or a resize): keep what was drawn as the blitting background."""
+        if self.canvas.supports_blit:
+            self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        for artist in self.overlays:
+            self.ax.draw_artist(artist)
+
+    def _add_candle(self, index):
+        """Draws candle `index` onto the background and keeps it there."""
+        self.canvas.restore_region(self.background)
+        self.newest_wick.set_data(self.segments[index, :, 0], self.segments[index, :, 1])
+        self.newest_body.set_bounds(self.verts[index, 0, 0], self.verts[index, 0, 1],
+                                    self.width, self.verts[index, 1, 1] - self.verts[index, 0, 1])
+        self.newest_body.set_facecolor(self.colors[index])
+        for artist in (self.newest_wick, self.newest_body):
+            artist.set_visible(True)
+            self.ax.draw_artist(artist)
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.shown = index
+        # The collections catch up with the background at the next full redraw
+        self._draw_overlays()
+
+    def _blit_overlays(self):
+        self.canvas.restore_region(self.background)
+        self._draw_overlays()
+
+    def _draw_overlays(self):
+        for artist in self.overlays:
+            self.ax.draw_artist(artist)
+        self.canvas.blit(self.ax.bbox)
+
+    def _update_overlays(self, lines, buy_marker, sell_marker):
+        """Rebuilds the marker and line artists, only when they changed."""
+        key = (lines, buy_marker, sell_marker)
+        if key == self.overlay_key:
+            return
+        self.overlay_key = key
+
+        for artist in self.overlays:
+            artist.remove()
+        self.overlays = []
+
+        # Buy and sell markers
+        if buy_marker is not None:
+            low = self.lows[buy_marker]
+            self.overlays.append(self.ax.annotate('Buy', (buy_marker, low), xytext=(buy_marker, low - 5),
+                                                  arrowprops=dict(facecolor='green', shrink=0.05),
+                                                  color='green', fontsize=8, animated=True))
+        if sell_marker is not None:
+            high = self.highs[sell_marker]
+            self.overlays.append(self.ax.annotate('Sell', (sell_marker, high), xytext=(sell_marker, high + 5),
+                                                  arrowprops=dict(facecolor='red', shrink=0.05),
+                                                  color='red', fontsize=8, animated=True))
+
+        # User-defined horizontal lines (blue)
+        for level in lines:
+            self.overlays.append(self.ax.axhline(y=level, color='blue', linewidth=1, animated=True))
@@ -0,0 +1,339 @@
+#COLUMNAR STORE FOR THE HISTORICAL CANDLES: ONE MEMORY-MAPPED .npy FILE PER INSTRUMENT, GRANULARITY AND DAY
+#
+# Usage: python candle_store.py import    (brings the legacy data/<folder>/*.csv files into the store)
+#        python candle_store.py list
+
+import contextlib
+import fcntl
+import glob
+import json
+import os
+import sys
+import threading
+import numpy as np
+import pandas as pd
+
+data_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), "data")
+default_store_dir = os.path.join(data_dir, "store")
+
+SECONDS_PER_DAY = 86400
+
+CANDLE_DTYPE = np.dtype([
+    ('time', '<i8'),  # Epoch seconds, candle open
+    ('o', '<f8'),
+    ('h', '<f8'),
+    ('l', '<f8'),
+    ('c', '<f8'),
+    ('volume', '<i8'),
+    ('complete', '?'),
+])
+
+# Folder names used by the legacy CSV tree (and the download.py of old)
+legacy_folders = {
+    'M1': '1min',
+    'M5': '5min',
+    'M10': '10min',
+    'M15': '15min',
+    'M30': '30min'
+}
+
+
+def to_records(data):
+    """Converts a candle frame (time index or column, o/h/l/c/volume/complete columns) to CANDLE_DTYPE."""
+    data = data.reset_index() if 'time' not in data.columns else data
+    times = pd.to_datetime(data['time'], utc=True)
+    records = np.empty(len(data), dtype=CANDLE_DTYPE)
+    records['time'] = (times - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)
+    for column in ('o', 'h', 'l', 'c'):
+        records[column] = data[column].to_numpy(dtype=np.float64)
+    records['volume'] = data['volume'].to_numpy() if 'volume' in data.columns else 0
+    records['complete'] = data['complete'].to_numpy(dtype=bool) if 'complete' in data.columns else True
+    records.sort(order='time', kind='stable')
+    return records
+
+
+def to_frame(records):
+    """Candle frame with a UTC `time` column, as the CSV files parse to."""
+    frame = pd.DataFrame({name: records[name] for name in CANDLE_DTYPE.names})
+    frame['time'] = pd.to_datetime(frame['time'], unit='s', utc=True)
+    return frame
+
+
+class CandleStore:
+    """Historical candles partitioned by instrument, granularity and trading date.
+
+    Each partition is a NumPy structured array saved as
+    <root>/<instrument>/<granularity>/<YYYY-MM-DD>.npy and read back memory
+    mapped, so opening one costs no parsing at all. catalog.json records the
+    row count and first/last candle time of every partition; listing what is
+    available and finding the partitions that cover a time range never touch
+    the partition files.
+
+    Several processes share the store (the history app fills it while the
+    strategy caches resampled days in it), so writes hold an flock on
+    store.lock and re-read catalog.json and coverage.json before changing
+    them, and queries re-read them whenever another process has rewritten them.
+    """
+
+    def __init__(self, root=default_store_dir):
+        self.root = root
+        self.catalog_path = os.path.join(root, "catalog.json")
+        self.coverage_path = os.path.join(root, "coverage.json")
+        self.lock_path = os.path.join(root, "store.lock")
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self.catalog = {}
+        self.coverage = {}  # instrument -> granularity -> [[start, end), ...]
+        self._stamps = {}  # JSON path -> (inode, mtime) it was last read at
+        self._refresh()
+
+    def _refresh(self):
+        """Re-reads catalog.json and coverage.json if they changed on disk since this store last read them."""
+        for name, path in (('catalog', self.catalog_path), ('coverage', self.coverage_path)):
+            stamp = _stamp(path)
+            if stamp != self._stamps.get(path):
+                setattr(self, name, _read_json(path))
+                self._stamps[path] = stamp
+
+    def _write(self, name, path):
+        _write_json(path, getattr(self, name))
+        self._stamps[path] = _stamp(path)
+
+    @contextlib.contextmanager
+    def _exclusive(self):
+        """Holds the store against every other thread and process, with the catalog and coverage up to date."""
+        with self._lock, open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def path(self, instrument, granularity, date):
+        return os.path.join(self.root, instrument, granularity, f"{date}.npy")
+
+    # Catalog queries
+
+    def instruments(self):
+        self._refresh()
+        return sorted(self.catalog)
+
+    def granularities(self, instrument):
+        self._refresh()
+        return sorted(self.catalog.get(instrument, {}))
+
+    def dates(self, instrument, granularity):
+        self._refresh()
+        return sorted(self.catalog.get(instrument, {}).get(granularity, {}))
+
+    def has(self, instrument, granularity, date):
+        self._refresh()
+        return str(date) in self.catalog.get(instrument, {}).get(granularity, {})
+
+    def entry(self, instrument, granularity, date):
+        """{'rows', 'start', 'end', 'version'[, 'derived_from']} of a partition (epoch seconds), or None."""
+        self._refresh()
+        return self.catalog.get(instrument, {}).get(granularity, {}).get(str(date))
+
+    def partitions(self, instrument, granularity, start=None, end=None):
+        """Dates of the partitions with candles in [start, end] (epoch seconds or anything pandas parses).
+
+        Empty partitions (e.g. a header-only CSV import) have no start or end and are never included.
+        """
+        start, end = _epoch(start), _epoch(end)
+        dates = self.dates(instrument, granularity)
+        entries = self.catalog.get(instrument, {}).get(granularity, {})
+        return [date for date in dates
+                if entries[date]['rows']
+                and (start is None or entries[date]['end'] >= start)
+                and (end is None or entries[date]['start'] <= end)]
+
+    # Coverage: the time ranges that have been fetched from the broker, whether or not
+    # they had candles (weekends don't), so they are never requested again
+
+    def covered(self, instrument, granularity):
+        """Sorted, non-overlapping [start, end) epoch second intervals known to be fully fetched."""
+        self._refresh()
+        return [tuple(interval) for interval in self.coverage.get(instrument, {}).get(granularity, [])]
+
+    def missing(self, instrument, granularity, start, end):
+        """The parts of [start, end) that aren't covered, as (start, end) epoch second intervals."""
+        start, end = _epoch(start), _epoch(end)
+        gaps = []
+        for covered_start, covered_end in self.covered(instrument, granularity):
+            if covered_end <= start:
+                continue
+            if covered_start >= end:
+                break
+            if covered_start > start:
+                gaps.append((start, covered_start))
+            start = max(start, covered_end)
+        if start < end:
+            gaps.append((start, end))
+        return gaps
+
+    def add_coverage(self, instrument, granularity, start, end):
+        """Records [start, end) as fetched, merging it with the intervals it overlaps or touches."""
+        start, end = _epoch(start), _epoch(end)
+        if start >= end:
+            return
+        with self._exclusive():
+            merged = []
+            for interval in sorted(self.covered(instrument, granularity) + [(start, end)]):
+                if merged and interval[0] <= merged[-1][1]:
+                    merged[-1][1] = max(merged[-1][1], interval[1])
+                else:
+                    merged.append(list(interval))
+            self.coverage.setdefault(instrument, {})[granularity] = merged
+            self._write('coverage', self.coverage_path)
+
+    # Reading and writing
+
+    def write(self, instrument, granularity, date, data, derived_from=None):
+        """Saves one day of candles (a frame or CANDLE_DTYPE array) and records it in the catalog.
+
+        Every write bumps the partition's `version`. `derived_from` is the
+        version of the M1 partition a resampled day was built from, so
+        resample.py can tell when it is out of date, even when a rewrite kept
+        the row count (a forming candle replaced by its completed version).
+        """
+        records = data if isinstance(data, np.ndarray) else to_records(data)
+        with self._exclusive():
+            return self._write_partition(instrument, granularity, date, records, derived_from)
+
+    def _write_partition(self, instrument, granularity, date, records, derived_from=None):
+        # Called holding _exclusive()
+        path = self.path(instrument, granularity, date)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".part", 'wb') as f:
+            np.save(f, records)
+        os.replace(path + ".part", path)
+
+        partitions = self.catalog.setdefault(instrument, {}).setdefault(granularity, {})
+        entry = {
+            'rows': int(len(records)),
+            'start': int(records['time'][0]) if len(records) else None,
+            'end': int(records['time'][-1]) if len(records) else None,
+            'version': partitions.get(str(date), {}).get('version', 0) + 1,
+        }
+        if derived_from is not None:
+            entry['derived_from'] = int(derived_from)
+        partitions[str(date)] = entry
+        self._write('catalog', self.catalog_path)
+        return len(records)
+
+    def merge(self, instrument, granularity, date, data):
+        """Adds candles to a partition, replacing any stored ones with the same time (e.g. a candle that
+        was still forming). Returns the partition's row count."""
+        records = data if isinstance(data, np.ndarray) else to_records(data)
+        with self._exclusive():
+            if str(date) in self.catalog.get(instrument, {}).get(granularity, {}):
+                records = np.concatenate([records, self.read(instrument, granularity, date)])
+                records = records[np.unique(records['time'], return_index=True)[1]]  # First occurrence, i.e. the new one
+            return self._write_partition(instrument, granularity, date, records)
+
+    def read(self, instrument, granularity, date):
+        """One partition as a read-only, memory-mapped CANDLE_DTYPE array."""
+        return np.load(self.path(instrument, granularity, date), mmap_mode='r')
+
+    def load(self, instrument, granularity, start=None, end=None):
+        """Every candle with a time in [start, end], as one CANDLE_DTYPE array."""
+        dates = self.partitions(instrument, granularity, start, end)
+        if not dates:
+            return np.empty(0, dtype=CANDLE_DTYPE)
+        records = np.concatenate([self.read(instrument, granularity, date) for date in dates])
+        start, end = _epoch(start), _epoch(end)
+        first = 0 if start is None else np.searchsorted(records['time'], start, side='left')
+        last = len(records) if end is None else np.searchsorted(records['time'], end, side='right')
+        return records[first:last]
+
+    def frame(self, instrument, granularity, date):
+        """One partition as a frame with a UTC `time` column."""
+        return to_frame(self.read(instrument, granularity, date))
+
+    # Legacy CSV tree
+
+    def import_csv_tree(self, source_dir=data_dir, granularity_list=('M1',)):
+        """Imports data/<folder>/<instrument>_<date>_<granularity>.csv files not in the store yet.
+
+        Only M1 by default: resample.py derives the coarser granularities from it.
+        """
+        imported = 0
+        for granularity in granularity_list:
+            for csv_file in sorted(glob.glob(os.path.join(source_dir, legacy_folders[granularity], "*.csv"))):
+                instrument, date = _parse_legacy_name(os.path.basename(csv_file))
+                if instrument is None:
+                    continue
+                if not self.has(instrument, granularity, date):
+                    self.write(instrument, granularity, date, pd.read_csv(csv_file))
+                    imported += 1
+                day = _epoch(date)
+                if self.missing(instrument, granularity, day, day + SECONDS_PER_DAY):
+                    self.add_coverage(instrument, granularity, day, day + SECONDS_PER_DAY)
+        return imported
+
+
+def _read_json(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _stamp(path):
+    # os.replace gives every rewrite a new inode, so this changes even within one mtime tick
+    try:
+        status = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return status.st_ino, status.st_mtime_ns
+
+
+def _write_json(path, value):
+    # Through a temporary file, so a crash never leaves half a catalog
+    with open(path + ".part", 'w') as f:
+        json.dump(value, f, indent=1, sort_keys=True)
+    os.replace(path + ".part", path)
+
+
+def _epoch(value):
+    if value is None or isinstance(value, (int, float, np.integer, np.floating)):
+        return value
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize('UTC')
+    return int(timestamp.timestamp())
+
+
+def _parse_legacy_name(name):
+    """XAU_USD_2024-09-02_M1.csv -> ('XAU_USD', '2024-09-02')"""
+    parts = name[:-len(".csv")].split('_')
+    if len(parts) < 3:
+        return None, None
+    return '_'.join(parts[:-2]), parts[-2]
+
+
+_default_store = None
+
+
+def open_store():
+    """The shared store under data/store, with any legacy CSV files not imported yet brought in first."""
+    global _default_store
+    if _default_store is None:
+        store = CandleStore()
+        imported = store.import_csv_tree()
+        if imported:
+            print(f"Imported {imported} CSV files into the candle store")
+        _default_store = store
+    return _default_store
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else 'list'
+    store = open_store() if command == 'import' else CandleStore()
+    for instrument in store.instruments():
+        for granularity in store.granularities(instrument):
+            dates = store.dates(instrument, granularity)
+            rows = sum(store.entry(instrument, granularity, d)['rows'] for d in dates)
+            print(f"{instrument} {granularity}: {len(dates)} days ({dates[0]} to {dates[-1]}), {rows} candles")
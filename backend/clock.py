@@ -0,0 +1,64 @@
+import time as _time
+from datetime import datetime
+
+
+class WallClock:
+    """The real clock."""
+
+    def time(self):
+        return _time.time()
+
+    def now(self):
+        return datetime.now()
+
+    def sleep(self, seconds):
+        _time.sleep(seconds)
+
+
+class SimulatedClock:
+    """A clock that only moves when told to, for replaying recorded data.
+
+    `sleep()` returns immediately and just moves the clock forward.
+    """
+
+    def __init__(self, start=0.0):
+        self._now = float(start)
+
+    def time(self):
+        return self._now
+
+    def now(self):
+        return datetime.fromtimestamp(self._now)
+
+    def sleep(self, seconds):
+        self._now += seconds
+
+    def set(self, timestamp):
+        """Moves the clock to `timestamp` (epoch seconds). It never goes backwards."""
+        self._now = max(self._now, float(timestamp))
+
+
+_clock = WallClock()
+
+
+def install(clock):
+    """Replaces the clock the engine reads. Returns the previous one."""
+    global _clock
+    previous, _clock = _clock, clock
+    return previous
+
+
+def current():
+    return _clock
+
+
+def time():
+    return _clock.time()
+
+
+def now():
+    return _clock.now()
+
+
+def sleep(seconds):
+    _clock.sleep(seconds)
@@ -1,58 +1,67 @@
 #HERE YOU CAN DOWNLOAD HISTORICAL DATA FOR THE TRADING TRAINING
+#
+# Usage: python download.py --start 2024-09-01 --end 2024-09-30 [--instruments XAU_USD ...]
+#                           [--workers 4] [--rate 20]
+#
+# M1 candles are written to the candle store (data/store); every coarser granularity is
+# built from them by resample.py. Time the store already covers is skipped, so an
+# interrupted download picks up where it stopped.
 
-import tpqoa
+import argparse
+import time
 import pandas as pd
-import os
-from datetime import datetime
-
-api = tpqoa.tpqoa('oanda.cfg')
-
-# Define the instrument and date range
-instrument = "XAU_USD"
-start_date = "2024-09-01"  # Start date
-end_date = "2024-09-30"    # End date
-
-# Create a list of dates to download (excluding weekends)
-date_range = pd.date_range(start=start_date, end=end_date, freq='B')  # 'B' for business days
-
-# Define the granularity and their corresponding folder names
-granularities = {
-    'M1': '1min',
-    'M5': '5min',
-    'M10': '10min',
-    'M15': '15min',
-    'M30': '30min'
-}
-
-# Loop through each granularity and create corresponding folder if not exists
-for granularity, folder in granularities.items():
-    os.makedirs(f"data/{folder}", exist_ok=True)
-
-# Loop through each business day and download data for each granularity
-for date in date_range:
-    for granularity, folder in granularities.items():
-        try:
-            # Download historical data for the given granularity
-            data = api.get_history(
-                instrument=instrument,
-                start=date.date().isoformat() + "T00:00:00",  # Start of the day
-                end=date.date().isoformat() + "T23:59:59",    # End of the day
-                granularity=granularity,  # Use current granularity in the loop
-                price='M',  # Mid prices
-                localize=False
-            )
-
-            # Check if data is empty
-            if data.empty:
-                print(f"No data returned for {date.date()} (Granularity: {granularity})")
-                continue
-
-            # Save each day's data to a separate CSV file in the corresponding folder
-            csv_file_path = f"data/{folder}/XAU_USD_{date.date()}_{granularity}.csv"
-            data.to_csv(csv_file_path, index=True)
-            print(f"Data for {date.date()} (Granularity: {granularity}) downloaded and saved to {csv_file_path}")
+from candle_cache import CandleCache
+from candle_store import SECONDS_PER_DAY, open_store
+from http_pool import RateLimiter, load_http_config, tpqoa_api
+
+
+def download(instruments, start_date, end_date, workers=4, rate=None, retries=3):
+    """Downloads the parts of [start_date, end_date] (whole UTC days) not in the store yet.
+
+    Each instrument's gaps are fetched in chunks of up to 5000 candles by a
+    bounded pool of workers sharing one rate limit.
+    """
+    store = open_store()
+    limiter = RateLimiter(rate or load_http_config()['requests_per_second'])
+    cache = CandleCache(tpqoa_api(), store, limiter, retries, workers)
+    start = int(pd.Timestamp(start_date, tz='UTC').timestamp())
+    end = int((pd.Timestamp(end_date, tz='UTC') + pd.Timedelta(days=1)).timestamp())
+
+    counts = {'candles': 0, 'requests': 0, 'failed': 0}
+    for instrument in instruments:
+        pieces = cache.pieces(instrument, start, end)
+        print(f"{instrument}: {len(pieces)} requests to make, "
+              f"{(end - start) // SECONDS_PER_DAY} days requested")
+
+        def progress(done, total, instrument=instrument):
+            print(f"{instrument}: {done}/{total} chunks stored")
 
+        try:
+            counts['candles'] += cache.fetch(instrument, start, end, progress=progress)
+            counts['requests'] += len(pieces)
         except Exception as e:
-            print(f"Error downloading data for {date.date()} (Granularity: {granularity}): {e}")
+            counts['failed'] += 1
+            print(f"Error downloading data for {instrument}: {e}")
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download historical candles into the candle store.")
+    parser.add_argument('--instruments', nargs='+', default=['XAU_USD'])
+    parser.add_argument('--start', required=True, help="First date, YYYY-MM-DD")
+    parser.add_argument('--end', required=True, help="Last date, YYYY-MM-DD")
+    parser.add_argument('--workers', type=int, default=4, help="Requests in flight at once")
+    parser.add_argument('--rate', type=float, help="Max requests per second (default from [http] in oanda.cfg)")
+    parser.add_argument('--retries', type=int, default=3)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    counts = download(args.instruments, args.start, args.end,
+                      workers=args.workers, rate=args.rate, retries=args.retries)
+    print(f"Data download process completed in {time.perf_counter() - started:.1f}s: "
+          + ", ".join(f"{count} {name}" for name, count in counts.items()))
+
 
-print("Data download process completed.")
+if __name__ == "__main__":
+    main()
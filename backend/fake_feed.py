@@ -0,0 +1,79 @@
+#A LOCAL STAND-IN FOR THE LIVE-PRICE CSV FEED, FOR RUNNING THE ENGINE OFFLINE
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FEED_COLUMNS = ('timestamp', 'open', 'high', 'low', 'close')
+
+
+class FakeFeed:
+    """A live-price CSV that grows as ticks are appended, served over HTTP on localhost.
+
+    Behaves like the feed LiveFeedClient polls: the ETag changes with every
+    append, a matching If-None-Match gets a bodyless 304, and `Range: bytes=N-`
+    gets the tail from byte N (206), or 416 if the file is shorter than that.
+    """
+
+    def __init__(self, columns=FEED_COLUMNS):
+        self.body = (','.join(columns) + '\n').encode()
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.server = None
+
+    def append(self, *values):
+        """Adds one row (values in column order) to the end of the file."""
+        with self.lock:
+            self.body += (','.join(str(value) for value in values) + '\n').encode()
+
+    @property
+    def etag(self):
+        return f'"{len(self.body)}"'
+
+    def handle(self, headers):
+        """Returns (status, response headers, body) for a GET of the file."""
+        with self.lock:
+            self.requests += 1
+            body, etag = self.body, self.etag
+
+        if headers.get('If-None-Match') == etag:
+            return 304, {'ETag': etag}, b''
+        requested = headers.get('Range')
+        if requested and requested.startswith('bytes=') and requested.endswith('-'):
+            start = int(requested[len('bytes='):-1])
+            if start >= len(body):
+                return 416, {'Content-Range': f"bytes */{len(body)}"}, b''
+            return 206, {'ETag': etag, 'Content-Range': f"bytes {start}-{len(body) - 1}/{len(body)}"}, body[start:]
+        return 200, {'ETag': etag}, body
+
+    def start(self, port=0):
+        """Starts serving on localhost; the file is at `url`."""
+        feed = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # Keep-alive, like the pooled feed session expects
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                status, headers, body = feed.handle(self.headers)
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/csv')
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_port}/resampled_data.csv"
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
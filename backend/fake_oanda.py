@@ -0,0 +1,250 @@
+#A LOCAL STAND-IN FOR THE OANDA v20 REST API, FOR RUNNING THE ENGINE OFFLINE
+
+import json
+import re
+import sys
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import oandapyV20
+import oandapyV20.endpoints.orders as orders
+from oandapyV20.oandapyV20 import TRADING_ENVIRONMENTS
+from positions import format_units
+
+
+def now_rfc3339():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f000Z')
+
+
+class FakeOanda:
+    """In-memory OANDA account served over HTTP on localhost.
+
+    Supports what the engine uses: account details, open trades, the
+    transaction endpoints and market orders with take-profit / stop-loss on
+    fill. Move the market with `set_price()`; trades whose TP or SL is crossed
+    are closed with the same ORDER_FILL transactions OANDA would produce.
+    """
+
+    def __init__(self, account_id='101-001-00000000-001', balance=10000.0, price=2500.0):
+        self.account_id = account_id
+        self.balance = balance
+        self.realized_pl = 0.0
+        self.price = price
+        self.transactions = []
+        self.trades = {}
+        self.requests = []  # (method, path) of every request served
+        self.lock = threading.Lock()
+        self.server = None
+        self.environment = None
+
+    # Account state
+
+    def _add_transaction(self, **fields):
+        transaction = {'id': str(len(self.transactions) + 1), 'time': now_rfc3339(),
+                       'accountID': self.account_id, **fields}
+        self.transactions.append(transaction)
+        return transaction
+
+    @property
+    def last_transaction_id(self):
+        return str(len(self.transactions))
+
+    def _unrealized_pl(self, trade):
+        return (self.price - float(trade['price'])) * float(trade['currentUnits'])
+
+    def _trade_view(self, trade):
+        return {**trade, 'unrealizedPL': f"{self._unrealized_pl(trade):.4f}"}
+
+    def place_market_order(self, order):
+        """Fills a market order at the current price and returns OANDA's order-create response."""
+        with self.lock:
+            units = float(order['units'])
+            create = self._add_transaction(type='MARKET_ORDER', instrument=order['instrument'],
+                                           units=format_units(units), reason='CLIENT_ORDER')
+            fill_id = str(len(self.transactions) + 1)
+            take_profit = order.get('takeProfitOnFill', {}).get('price')
+            stop_distance = order.get('stopLossOnFill', {}).get('distance')
+            stop_loss = order.get('stopLossOnFill', {}).get('price')
+            if stop_distance is not None:
+                stop_loss = self.price - float(stop_distance) if units > 0 else self.price + float(stop_distance)
+
+            fill = self._add_transaction(
+                type='ORDER_FILL', orderID=create['id'], instrument=order['instrument'],
+                units=format_units(units), price=f"{self.price:.3f}", pl='0.0000', reason='MARKET_ORDER',
+                accountBalance=f"{self.balance:.4f}",
+                tradeOpened={'tradeID': fill_id, 'units': format_units(units), 'price': f"{self.price:.3f}"})
+            self.trades[fill_id] = {
+                'id': fill_id, 'instrument': order['instrument'], 'price': f"{self.price:.3f}",
+                'openTime': fill['time'], 'state': 'OPEN', 'initialUnits': format_units(units),
+                'currentUnits': format_units(units), 'realizedPL': '0.0000',
+                'takeProfitPrice': None if take_profit is None else float(take_profit),
+                'stopLossPrice': stop_loss,
+            }
+            return {'orderCreateTransaction': create, 'orderFillTransaction': fill,
+                    'relatedTransactionIDs': [create['id'], fill['id']],
+                    'lastTransactionID': self.last_transaction_id}
+
+    def close_trade(self, trade_id, reason='TRADE_CLOSE'):
+        with self.lock:
+            return self._close_trade(trade_id, reason)
+
+    def _close_trade(self, trade_id, reason):
+        trade = self.trades.pop(trade_id)
+        units = float(trade['currentUnits'])
+        pl = self._unrealized_pl(trade)
+        self.balance += pl
+        self.realized_pl += pl
+        return self._add_transaction(
+            type='ORDER_FILL', instrument=trade['instrument'], units=format_units(-units),
+            price=f"{self.price:.3f}", pl=f"{pl:.4f}", reason=reason, accountBalance=f"{self.balance:.4f}",
+            tradesClosed=[{'tradeID': trade_id, 'units': format_units(-units),
+                           'price': f"{self.price:.3f}", 'realizedPL': f"{pl:.4f}"}])
+
+    def set_price(self, price):
+        """Moves the market and triggers any take-profit or stop-loss it crosses."""
+        with self.lock:
+            self.price = price
+            for trade_id, trade in list(self.trades.items()):
+                long = float(trade['currentUnits']) > 0
+                tp, sl = trade['takeProfitPrice'], trade['stopLossPrice']
+                if tp is not None and (price >= tp if long else price <= tp):
+                    self._close_trade(trade_id, 'TAKE_PROFIT_ORDER')
+                elif sl is not None and (price <= sl if long else price >= sl):
+                    self._close_trade(trade_id, 'STOP_LOSS_ORDER')
+
+    def account(self):
+        with self.lock:
+            open_trades = [self._trade_view(t) for t in self.trades.values()]
+            return {
+                'account': {
+                    'id': self.account_id, 'currency': 'USD', 'balance': f"{self.balance:.4f}",
+                    'pl': f"{self.realized_pl:.4f}",
+                    'unrealizedPL': f"{sum(self._unrealized_pl(t) for t in self.trades.values()):.4f}",
+                    'openTradeCount': len(open_trades), 'trades': open_trades,
+                    'lastTransactionID': self.last_transaction_id,
+                },
+                'lastTransactionID': self.last_transaction_id,
+            }
+
+    # HTTP
+
+    def handle(self, method, path, query, body):
+        """Routes a request and returns (status, JSON body)."""
+        self.requests.append((method, path))
+        account = f"/v3/accounts/{self.account_id}"
+
+        if method == 'GET' and path in (account, account + '/summary'):
+            return 200, self.account()
+        if method == 'GET' and path in (account + '/openTrades', account + '/trades'):
+            with self.lock:
+                return 200, {'trades': [self._trade_view(t) for t in self.trades.values()],
+                             'lastTransactionID': self.last_transaction_id}
+        if method == 'GET' and path == account + '/transactions':
+            with self.lock:
+                return 200, {'count': len(self.transactions), 'pages': [],
+                             'lastTransactionID': self.last_transaction_id}
+        if method == 'GET' and path == account + '/transactions/sinceid':
+            since = int(query['id'][0])
+            with self.lock:
+                return 200, {'transactions': self.transactions[since:],
+                             'lastTransactionID': self.last_transaction_id}
+        if method == 'GET' and path == account + '/transactions/idrange':
+            start, end = int(query['from'][0]), int(query['to'][0])
+            with self.lock:
+                return 200, {'transactions': self.transactions[start - 1:end],
+                             'lastTransactionID': self.last_transaction_id}
+        if method == 'POST' and path == account + '/orders':
+            return 201, self.place_market_order(body['order'])
+
+        match = re.fullmatch(account + r'/trades/(\w+)/close', path)
+        if method == 'PUT' and match:
+            if match.group(1) not in self.trades:
+                return 404, {'errorMessage': 'The Trade specified does not exist'}
+            fill = self.close_trade(match.group(1))
+            return 200, {'orderFillTransaction': fill, 'lastTransactionID': self.last_transaction_id}
+
+        return 404, {'errorMessage': f"Fake OANDA has no route for {method} {path}"}
+
+    def start(self, port=0):
+        """Starts serving on localhost and registers an oandapyV20 environment for it."""
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # Keep-alive, like the real API
+            disable_nagle_algorithm = True  # Headers and body go out as separate writes
+
+            def log_message(self, *args):
+                pass
+
+            def _serve(self):
+                url = urlparse(self.path)
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+                status, payload = fake.handle(self.command, url.path, parse_qs(url.query), body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PUT = _serve
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.environment = f"fake-{self.server.server_port}"
+        TRADING_ENVIRONMENTS[self.environment] = {'api': self.url, 'stream': self.url}
+        return self
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def client(self):
+        """An oandapyV20 client that talks to this fake instead of OANDA."""
+        return oandapyV20.API(access_token='fake-token', environment=self.environment)
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        TRADING_ENVIRONMENTS.pop(self.environment, None)
+
+
+class FakeTpqoa:
+    """The slice of the tpqoa interface the engine uses, backed by a FakeOanda."""
+
+    def __init__(self, fake):
+        self.fake = fake
+        self.account_id = fake.account_id
+        self.client = fake.client()
+
+    def get_account_summary(self):
+        return self.fake.account()['account']
+
+    def create_order(self, instrument, units, price=None, sl_distance=None, tsl_distance=None,
+                     tp_price=None, comment=None, touch=False, suppress=False, ret=False):
+        order = {'type': 'MARKET', 'instrument': instrument, 'units': format_units(units)}
+        if tp_price is not None:
+            order['takeProfitOnFill'] = {'price': str(tp_price)}
+        if sl_distance is not None:
+            order['stopLossOnFill'] = {'distance': str(sl_distance)}
+
+        r = orders.OrderCreate(self.account_id, data={'order': order})
+        self.client.request(r)
+        fill = r.response.get('orderFillTransaction', r.response.get('orderCreateTransaction'))
+        if not suppress:
+            print('\n\n', fill, '\n')
+        if ret:
+            return fill
+
+
+if __name__ == "__main__":
+    # Usage: python fake_oanda.py [port]
+    fake = FakeOanda().start(int(sys.argv[1]) if len(sys.argv) > 1 else 0)
+    print(f"Fake OANDA serving account {fake.account_id} at {fake.url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        fake.stop()
@@ -1,4 +1,4 @@
-import requests
+from http_pool import get_session
 import pandas as pd
 import time
 
@@ -9,7 +9,7 @@ local_file_path = "downloaded_resampled_data.csv"
 
 def fetch_csv():
     try:
-        response = requests.get(csv_url)
+        response = get_session().get(csv_url)
 
         if response.status_code == 200:
             with open(local_file_path, 'wb') as file:
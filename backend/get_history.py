@@ -1,7 +1,8 @@
-import oandapyV20
 import oandapyV20.endpoints.transactions as trans
 import configparser
 import os
+from http_pool import oanda_client
+from transaction_store import TransactionStore, TransactionSync, history_row
 
 def load_config():
     """Function to load OANDA credentials from config file"""
@@ -14,9 +15,8 @@ def load_config():
         "access_token": config['oanda']['access_token']
     }
 
-# Initialize OANDA API client with credentials from config
-credentials = load_config()
-client = oandapyV20.API(access_token=credentials['access_token'])
+# Shared, pooled OANDA API client (see http_pool)
+client = oanda_client()
 
 def get_last_transaction_id(account_id):
     """Function to get the last transaction ID from the transaction history"""
@@ -47,41 +47,24 @@ def log_transaction_details(transactions):
     """Function to log relevant details of transactions with 'units' and 'pl' > 0"""
     logged_transactions = []  # List to hold logged transaction details
     for transaction in transactions['transactions']:
-        if 'units' in transaction and 'pl' in transaction and 'price' in transaction:
-            units = transaction['units']
-            pl = float(transaction['pl'])
-            price = transaction['price']
-            order_id = transaction['id']
-            # Skip logging transactions where 'pl' is 0
-            if pl != 0:
-                # Append the order details to the list instead of printing
-                logged_transactions.append({
-                    "order_id": order_id,
-                    "units": units,
-                    "pl": pl,
-                    "price": price
-                })
+        # Skip logging transactions where 'pl' is 0
+        row = history_row(transaction)
+        if row:
+            logged_transactions.append(row)
     return logged_transactions  # Return the logged transaction details
 
-def main():
+def main(limit=100):
+    """Syncs the local transaction store and returns the newest `limit` trades, oldest first"""
     credentials = load_config()
-    # Step 1: Get the last transaction ID
-    last_transaction_id = get_last_transaction_id(credentials['account_id'])
-    if last_transaction_id:
-        # Step 2: Subtract 50 from the last transaction ID
-        adjusted_transaction_id = last_transaction_id - 100
-        print(f"Fetching transactions starting from ID: {adjusted_transaction_id}")
-        # Step 3: Fetch transactions since the adjusted ID
-        transactions = get_transactions_since_id(credentials['account_id'], adjusted_transaction_id)
-        if transactions:
-            # Return the transactions that have 'units', 'pl' (not zero), and 'price'
-            return log_transaction_details(transactions)
-        else:
-            print("No transactions found.")
-            return []  # Return an empty list if no transactions found
-    else:
-        print("Could not retrieve the last transaction ID.")
-        return []  # Return an empty list if last transaction ID could not be retrieved
+    store = TransactionStore(credentials['account_id'])
+    try:
+        # Only the transactions since the stored cursor are downloaded (everything, on the first run)
+        new_transactions = TransactionSync(client, store).sync()
+        print(f"Synced {new_transactions} new transactions, last transaction ID: {store.last_transaction_id}")
+        return store.history(limit)[0]
+    finally:
+        store.close()
 
 if __name__ == "__main__":
-    main()
+    for trade in main():
+        print(trade)
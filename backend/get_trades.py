@@ -1,7 +1,7 @@
 import oandapyV20.endpoints.trades as trades
-import oandapyV20
 import configparser
 import os
+from http_pool import oanda_client
 
 def load_config():
     """Function to load OANDA credentials from config file"""
@@ -14,9 +14,8 @@ def load_config():
         "access_token": config['oanda']['access_token']
     }
 
-# Initialize OANDA API client with credentials from config
-credentials = load_config()
-client = oandapyV20.API(access_token=credentials['access_token'])
+# Shared, pooled OANDA API client (see http_pool)
+client = oanda_client()
 
 def get_active_trades():
     """Fetch active trades and return relevant details."""
@@ -1,24 +1,65 @@
 import os
 import sys
+import time
 import pandas as pd
-import tpqoa
+from http_pool import tpqoa_api
+from candle_cache import CandleCache, Cancelled
+from candle_store import to_frame
+from resample import granularity_minutes
 from datetime import datetime
 import requests
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QWidget, QPushButton, 
     QComboBox, QLabel, QDateEdit, QLineEdit, QFormLayout, 
-    QMessageBox, QToolBar
+    QMessageBox, QToolBar, QProgressBar, QHBoxLayout
 )
-from PyQt5.QtCore import QDate
+from PyQt5.QtCore import QDate, QThread, pyqtSignal
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.backends.backend_qt5 import NavigationToolbar2QT as NavigationToolbar
 import matplotlib.pyplot as plt
-import mplfinance as mpf
+from lod import LODCandleChart
+
+class HistoryWorker(QThread):
+    """ Loads candles through the cache off the GUI thread. """
+    progress = pyqtSignal(int, int)  # Chunks fetched, chunks to fetch
+    chunk = pyqtSignal(object)  # DataFrame of the next day, in time order
+    loaded = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, cache, instrument, granularity, start, end):
+        super().__init__()
+        self.cache = cache
+        self.request = (instrument, granularity, start, end)
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True  # Checked between broker requests
+
+    def run(self):
+        try:
+            # Days arrive in time order as soon as the chunks they need are in
+            for records in self.cache.stream(*self.request, progress=self.progress.emit,
+                                             cancelled=lambda: self.cancelled):
+                self.chunk.emit(to_frame(records))
+        except Cancelled:
+            return
+        except Exception as e:
+            self.failed.emit(f"Error downloading data: {e}")
+            return
+        if not self.cancelled:
+            self.loaded.emit()
+
 
 class HistoricalChartApp(QMainWindow):
     def __init__(self):
         super().__init__()
-        self.api = tpqoa.tpqoa('oanda.cfg')
+        self.api = tpqoa_api()
+        self.cache = CandleCache(self.api)  # Only ranges the candle store doesn't cover go to the broker
+        self.worker = None
+        self.cancelled_workers = set()  # Kept referenced until their thread ends
+        self.chunks = []  # Days received so far for the current load
+        self.last_plot = 0.0
+        self.plot_interval = 1.0  # Seconds between redraws while a load is streaming in
         
         self.setWindowTitle("Historical Chart Viewer")
         main_layout = QVBoxLayout()
@@ -45,13 +86,24 @@ class HistoricalChartApp(QMainWindow):
 
         self.submit_button = QPushButton("Load Data")
         self.submit_button.clicked.connect(self.load_and_plot_data)
-        form_layout.addWidget(self.submit_button)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_loading)
+        buttons_layout = QHBoxLayout()
+        buttons_layout.addWidget(self.submit_button)
+        buttons_layout.addWidget(self.cancel_button)
+        form_layout.addRow(buttons_layout)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+        form_layout.addRow(self.progress_bar)
 
         main_layout.addLayout(form_layout)
 
         self.fig, self.ax = plt.subplots(figsize=(10, 5))
         self.canvas = FigureCanvas(self.fig)
         main_layout.addWidget(self.canvas)
+        self.chart = LODCandleChart(self.ax, self.canvas)  # Draws about one bar per 3 pixels at any zoom
 
         toolbar = NavigationToolbar(self.canvas, self)
         main_layout.addWidget(toolbar)
@@ -75,43 +127,91 @@ class HistoricalChartApp(QMainWindow):
             self.show_error_message("Please enter a valid numeric period.")
             return
 
+        period_minutes = int(period)
+        granularity = f'M{period_minutes}'
         try:
-            period_minutes = int(period)
-            granularity = f'M{period_minutes}'
-
-            data = self.api.get_history(
-                instrument=instrument,
-                start=start_date + "T00:00:00",
-                end=end_date + "T23:59:59",
-                granularity=granularity,
-                price='M',
-                localize=False
-            )
-
-            if data.empty:
-                self.show_error_message("No data available for the selected date range.")
-            else:
-                if 'time' not in data.columns:
-                    data.reset_index(inplace=True) 
-                
-                # Plot the data
-                self.plot_data(data)
+            granularity_minutes(granularity)  # Rejects periods longer than a day
+        except ValueError as e:
+            self.show_error_message(str(e))
+            return
 
-        except Exception as e:
-            self.show_error_message(f"Error downloading data: {e}")
+        # The whole of both days, in UTC
+        start = pd.Timestamp(start_date, tz='UTC').timestamp()
+        end = (pd.Timestamp(end_date, tz='UTC') + pd.Timedelta(days=1)).timestamp()
+        if end <= start:
+            self.show_error_message("The end date is before the start date.")
+            return
+
+        # Any period is built from stored M1 candles; the worker fetches only the parts not stored yet
+        self.cancel_loading()
+        self.chunks = []
+        self.last_plot = 0.0
+        self.worker = HistoryWorker(self.cache, instrument, granularity, start, end)
+        self.worker.progress.connect(self.show_progress)
+        self.worker.chunk.connect(self.on_chunk)
+        self.worker.loaded.connect(self.on_loaded)
+        self.worker.failed.connect(self.on_failed)
+        self.worker.finished.connect(self.on_finished)
+        self.progress_bar.setRange(0, 0)  # Busy until the number of requests is known
+        self.progress_bar.setVisible(True)
+        self.cancel_button.setEnabled(True)
+        self.worker.start()
+
+    def cancel_loading(self):
+        """ Stop the running load, if any; its result is ignored. """
+        if self.worker is not None:
+            self.worker.cancel()
+            self.cancelled_workers.add(self.worker)
+            self.worker = None
+        self.progress_bar.setVisible(False)
+        self.cancel_button.setEnabled(False)
+
+    def show_progress(self, done, total):
+        if self.sender() is self.worker:
+            self.progress_bar.setRange(0, total)
+            self.progress_bar.setValue(done)
+
+    def on_chunk(self, data):
+        if self.sender() is not self.worker:
+            return
+        self.chunks.append(data)
+        # Show the first day straight away, then redraw at most every plot_interval while the rest arrives
+        if len(self.chunks) == 1 or time.monotonic() - self.last_plot >= self.plot_interval:
+            self.plot_chunks()
+
+    def on_loaded(self):
+        if self.sender() is not self.worker:
+            return
+        if not self.chunks:
+            self.show_error_message("No data available for the selected date range.")
+        else:
+            self.plot_chunks()
+
+    def plot_chunks(self):
+        # Plot the data
+        self.plot_data(pd.concat(self.chunks, ignore_index=True))
+        self.last_plot = time.monotonic()
+
+    def on_failed(self, message):
+        if self.sender() is self.worker:
+            self.show_error_message(message)
+
+    def on_finished(self):
+        self.cancelled_workers.discard(self.sender())
+        if self.sender() is self.worker:
+            self.worker = None
+            self.progress_bar.setVisible(False)
+            self.cancel_button.setEnabled(False)
 
     def plot_data(self, data):
         """ Plot the historical candlestick data. """
-        self.ax.clear()
-
-        # Rename columns as required by mplfinance and set 'time' as index
+        # Rename columns and set 'time' as index, as for mplfinance
         data.rename(columns={'o': 'Open', 'h': 'High', 'l': 'Low', 'c': 'Close', 'volume': 'Volume'}, inplace=True)
         data['time'] = pd.to_datetime(data['time'])  # Convert time to datetime
-        data.set_index('time', inplace=True)  # Set time as index for mplfinance
+        data.set_index('time', inplace=True)
 
-        # Plot candlestick chart without title
-        mpf.plot(data, type='candle', style='classic', ax=self.ax, volume=False)
-        self.canvas.draw()
+        # Plot candlestick chart without title; pan/zoom redraws only the visible range
+        self.chart.set_data(data)
 
     def show_error_message(self, message):
         """ Display an error message box. """
@@ -123,6 +223,7 @@ class HistoricalChartApp(QMainWindow):
 
     def closeEvent(self, event):
         """ Override close event to notify the Flask app. """
+        self.cancel_loading()
         try:
             response = requests.post("http://localhost:3001/history-app-closed")
             if response.status_code == 200:
@@ -132,6 +233,9 @@ class HistoricalChartApp(QMainWindow):
         except Exception as e:
             print(f"Error notifying Flask app: {e}")
 
+        # Cancelled workers stop at their next broker request; Qt aborts if one is destroyed still running
+        for worker in list(self.cancelled_workers):
+            worker.wait()
         event.accept()  # Accept the close event
 
 if __name__ == "__main__":
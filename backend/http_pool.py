@@ -0,0 +1,254 @@
+import configparser
+import os
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+# Pool, timeout and retry settings. Any of them can be overridden in an [http]
+# section of oanda.cfg, e.g.
+#
+#   [http]
+#   pool_maxsize = 20
+#   timeout = 5
+HTTP_DEFAULTS = {
+    'pool_connections': 10,  # Number of hosts to keep pools for
+    'pool_maxsize': 10,  # Keep-alive connections per host
+    'timeout': 10.0,  # Seconds, for both connect and read
+    'retries': 3,
+    'backoff_factor': 0.5,  # Sleeps 0.5 s, 1 s, 2 s ... between retries
+    'requests_per_second': 20.0,  # For bulk jobs that use a RateLimiter; OANDA allows 100/s per account
+}
+
+_lock = threading.Lock()
+_adapters = {}  # name -> PooledAdapter, for connection_stats()
+_sessions = {}
+_oanda_client = None
+_tpqoa_api = None
+
+
+def config_file():
+    return os.path.join(os.path.dirname(os.path.realpath(__file__)), "oanda.cfg")
+
+
+def load_http_config():
+    """Function to load the HTTP pool settings, falling back to HTTP_DEFAULTS"""
+    config = configparser.ConfigParser()
+    config.read(config_file())
+    settings = dict(HTTP_DEFAULTS)
+    if config.has_section('http'):
+        for key, default in HTTP_DEFAULTS.items():
+            if config.has_option('http', key):
+                settings[key] = type(default)(config.get('http', key))
+    return settings
+
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter that counts the requests it sends and the TCP connections it opens.
+
+    Connections are counted where the socket is actually connected, so a
+    keep-alive connection the server dropped and urllib3 silently reopened
+    shows up as a new one.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.requests_sent = 0
+        self.connections_opened = 0
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        adapter = self
+
+        class CountingHTTPConnection(HTTPConnection):
+            def connect(self):
+                adapter.connections_opened += 1
+                super().connect()
+
+        class CountingHTTPSConnection(HTTPSConnection):
+            def connect(self):
+                adapter.connections_opened += 1
+                super().connect()
+
+        class CountingHTTPPool(HTTPConnectionPool):
+            ConnectionCls = CountingHTTPConnection
+
+        class CountingHTTPSPool(HTTPSConnectionPool):
+            ConnectionCls = CountingHTTPSConnection
+
+        self.poolmanager.pool_classes_by_scheme = {'http': CountingHTTPPool, 'https': CountingHTTPSPool}
+
+    def send(self, request, **kwargs):
+        self.requests_sent += 1
+        return super().send(request, **kwargs)
+
+
+class RateLimiter:
+    """Token bucket shared by threads: at most `rate` calls per second, in bursts of up to `burst`."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst or max(1.0, rate))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.waited = 0.0  # Total seconds callers spent waiting
+
+    def acquire(self):
+        """Blocks until a call may be made."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+                self.waited += wait
+            time.sleep(wait)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def build_adapter(settings):
+    retry = Retry(
+        total=settings['retries'],
+        backoff_factor=settings['backoff_factor'],
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(['GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS']),  # Never replay an order POST
+        raise_on_status=False,
+    )
+    return PooledAdapter(pool_connections=settings['pool_connections'],
+                         pool_maxsize=settings['pool_maxsize'],
+                         max_retries=retry)
+
+
+class TimeoutSession(requests.Session):
+    """requests.Session that applies a default timeout to every request."""
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def mount_pool(session, name, settings=None):
+    """Mounts a pooled, retrying adapter on an existing requests session (e.g. inside an API client)."""
+    settings = settings or load_http_config()
+    adapter = build_adapter(settings)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    with _lock:
+        _adapters[name] = adapter
+    return session
+
+
+def get_session(name='default'):
+    """Returns the shared keep-alive session called `name`, creating it on first use."""
+    with _lock:
+        session = _sessions.get(name)
+    if session is None:
+        settings = load_http_config()
+        session = mount_pool(TimeoutSession(settings['timeout']), name, settings)
+        with _lock:
+            session = _sessions.setdefault(name, session)
+    return session
+
+
+def oanda_client():
+    """Returns the process-wide oandapyV20 client, with its session pooled and a default timeout."""
+    global _oanda_client
+    with _lock:
+        if _oanda_client is not None:
+            return _oanda_client
+
+    import oandapyV20
+
+    config = configparser.ConfigParser()
+    config.read(config_file())
+    settings = load_http_config()
+    environment = config['oanda'].get('account_type', 'practice')
+    client = oandapyV20.API(access_token=config['oanda']['access_token'],
+                            environment='live' if environment == 'live' else 'practice',
+                            request_params={'timeout': settings['timeout']})
+    mount_pool(client.client, 'oanda', settings)
+
+    with _lock:
+        if _oanda_client is None:
+            _oanda_client = client
+        return _oanda_client
+
+
+def tpqoa_api(cfg='oanda.cfg'):
+    """Returns the process-wide tpqoa instance, with the sessions of its v20 contexts pooled."""
+    global _tpqoa_api
+    with _lock:
+        if _tpqoa_api is not None:
+            return _tpqoa_api
+
+    import tpqoa
+
+    api = tpqoa.tpqoa(cfg)
+    settings = load_http_config()
+    for attribute in ('ctx', 'ctx_stream'):
+        context = getattr(api, attribute, None)
+        if context is not None and hasattr(context, '_session'):
+            context.set_poll_timeout(settings['timeout'])
+            mount_pool(context._session, f"tpqoa.{attribute}", settings)
+
+    with _lock:
+        if _tpqoa_api is None:
+            _tpqoa_api = api
+        return _tpqoa_api
+
+
+def install_clients(api=None, client=None):
+    """Makes tpqoa_api() / oanda_client() return these instead, e.g. to run against fake_oanda offline."""
+    global _tpqoa_api, _oanda_client
+    with _lock:
+        if api is not None:
+            _tpqoa_api = api
+        if client is not None:
+            _oanda_client = client
+
+
+def reuse_rate(requests_sent, connections):
+    # Retries open connections without a new send(), so clamp at zero
+    return round(max(0.0, 1 - connections / requests_sent), 4) if requests_sent else None
+
+
+def connection_stats():
+    """Requests sent, connections opened and the connection reuse rate, per pool and in total."""
+    with _lock:
+        adapters = dict(_adapters)
+
+    stats = {}
+    total_requests = total_connections = 0
+    for name, adapter in adapters.items():
+        requests_sent, connections = adapter.requests_sent, adapter.connections_opened
+        stats[name] = {
+            'requests': requests_sent,
+            'connections': connections,
+            'reuse_rate': reuse_rate(requests_sent, connections),
+        }
+        total_requests += requests_sent
+        total_connections += connections
+
+    stats['total'] = {
+        'requests': total_requests,
+        'connections': total_connections,
+        'reuse_rate': reuse_rate(total_requests, total_connections),
+    }
+    return stats
@@ -0,0 +1,180 @@
+import math
+import sys
+import pandas as pd
+from rolling import RollingExtreme, RollingMean
+
+
+# Reference implementations. They recompute pandas rolling windows over the whole
+# frame and are kept to cross-check the streaming indicators below.
+
+def calculate_moving_average(data, window=50):
+    return data['close'].rolling(window=window).mean().iloc[-1]
+
+
+def calculate_atr(data, period=14):
+    data['high_low'] = data['high'] - data['low']
+    data['high_close'] = abs(data['high'] - data['close'].shift())
+    data['low_close'] = abs(data['low'] - data['close'].shift())
+    tr = data[['high_low', 'high_close', 'low_close']].max(axis=1)
+    atr = tr.rolling(period).mean().iloc[-1]
+    return atr
+
+
+def calculate_rsi(data, period=14):
+    """Calculates the RSI (Relative Strength Index)"""
+    if 'Close' not in data.columns or len(data) < period:
+        return None
+
+    deltas = pd.Series(data['Close']).diff()
+    gain = deltas.where(deltas > 0, 0).rolling(window=period).mean()
+    loss = -deltas.where(deltas < 0, 0).rolling(window=period).mean()
+
+    rs = gain / loss
+    rsi = 100 - (100 / (1 + rs))
+
+    return rsi.iloc[-1] if not rsi.isna().all() else None
+
+
+def calculate_breakout(data, breakout_period=100):
+    """Calculates breakout levels based on the last 'breakout_period' periods."""
+    if len(data) < breakout_period:
+        return None, None
+
+    high = data['close'].rolling(window=breakout_period).max().iloc[-1]
+    low = data['close'].rolling(window=breakout_period).min().iloc[-1]
+
+    return high, low
+
+
+# Streaming implementations. Each update is O(1) and the values match the
+# reference functions above evaluated on every value seen so far.
+
+class StreamingRSI:
+    """RSI over simple rolling means of gains and losses, as calculate_rsi computes it.
+
+    Like the pandas version, the first value has no previous close and counts as
+    a zero change.
+    """
+
+    def __init__(self, period=14):
+        self.period = period
+        self.gains = RollingMean(period)
+        self.losses = RollingMean(period)
+        self.previous_close = None
+        self.last_close = None
+
+    def _split(self, delta):
+        return max(delta, 0.0), max(-delta, 0.0)
+
+    def update(self, close):
+        delta = 0.0 if self.last_close is None else close - self.last_close
+        gain, loss = self._split(delta)
+        self.gains.update(gain)
+        self.losses.update(loss)
+        self.previous_close, self.last_close = self.last_close, close
+
+    def revise(self, close):
+        """Replaces the most recent close, for a candle that is still forming."""
+        delta = 0.0 if self.previous_close is None else close - self.previous_close
+        gain, loss = self._split(delta)
+        self.gains.replace_last(gain)
+        self.losses.replace_last(loss)
+        self.last_close = close
+
+    @property
+    def value(self):
+        if len(self.gains) < self.period:
+            return None
+
+        gain, loss = self.gains.value, self.losses.value
+        if loss == 0:
+            return math.nan if gain == 0 else 100.0
+        return 100 - (100 / (1 + gain / loss))
+
+
+class StreamingATR:
+    """Simple moving average of the true range, as calculate_atr computes it."""
+
+    def __init__(self, period=14):
+        self.true_ranges = RollingMean(period)
+        self.last_close = None
+
+    def update(self, high, low, close):
+        true_range = high - low
+        if self.last_close is not None:
+            true_range = max(true_range, abs(high - self.last_close), abs(low - self.last_close))
+        self.true_ranges.update(true_range)
+        self.last_close = close
+
+    @property
+    def value(self):
+        return self.true_ranges.value
+
+
+class IndicatorEngine:
+    """Keeps RSI, moving averages, ATR and breakout levels current, one bar or tick at a time."""
+
+    def __init__(self, rsi_period=14, ma_windows=(50, 200), atr_period=14, breakout_period=100):
+        self.breakout_period = breakout_period
+        self.count = 0
+        self.rsi_indicator = StreamingRSI(rsi_period)
+        self.moving_averages = {window: RollingMean(window) for window in ma_windows}
+        self.atr_indicator = StreamingATR(atr_period)
+        self.breakout_high = RollingExtreme(breakout_period, 'max')
+        self.breakout_low = RollingExtreme(breakout_period, 'min')
+
+    def update(self, close, high=None, low=None):
+        """Feeds one bar; for a plain tick leave out high/low and the close is used for both."""
+        high = close if high is None else high
+        low = close if low is None else low
+
+        self.count += 1
+        self.rsi_indicator.update(close)
+        for average in self.moving_averages.values():
+            average.update(close)
+        self.atr_indicator.update(high, low, close)
+        self.breakout_high.update(close)
+        self.breakout_low.update(close)
+
+    @property
+    def rsi(self):
+        return self.rsi_indicator.value
+
+    @property
+    def atr(self):
+        return self.atr_indicator.value
+
+    def moving_average(self, window):
+        return self.moving_averages[window].value
+
+    def breakout(self):
+        """Same contract as calculate_breakout: (None, None) until there are breakout_period values."""
+        if self.count < self.breakout_period:
+            return None, None
+        return self.breakout_high.value, self.breakout_low.value
+
+
+def cross_check(data, breakout_period=100):
+    """Feeds `data` (columns open/high/low/close) through an IndicatorEngine and
+    returns {indicator: (reference value, streaming value)} for the last row."""
+    engine = IndicatorEngine(breakout_period=breakout_period)
+    for high, low, close in zip(data['high'], data['low'], data['close']):
+        engine.update(close, high, low)
+
+    return {
+        'rsi': (calculate_rsi(data.rename(columns={'close': 'Close'})), engine.rsi),
+        'ma_50': (calculate_moving_average(data, 50), engine.moving_average(50)),
+        'ma_200': (calculate_moving_average(data, 200), engine.moving_average(200)),
+        'atr': (calculate_atr(data.copy()), engine.atr),
+        'breakout': (calculate_breakout(data, breakout_period), engine.breakout()),
+    }
+
+
+if __name__ == "__main__":
+    # Usage: python indicators.py [csv with open/high/low/close columns]
+    csv_file = sys.argv[1] if len(sys.argv) > 1 else 'live_price_data.csv'
+    data = pd.read_csv(csv_file)
+    data.rename(columns={'o': 'open', 'h': 'high', 'l': 'low', 'c': 'close'}, inplace=True)
+
+    for name, (reference, streaming) in cross_check(data).items():
+        print(f"{name:>8}: reference={reference}  streaming={streaming}")
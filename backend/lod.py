@@ -0,0 +1,125 @@
+import numpy as np
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.ticker import FuncFormatter, MaxNLocator
+from candle_renderer import DOWN_COLOR, EDGE_COLOR, UP_COLOR, WICK_COLOR
+
+
+def aggregate(opens, highs, lows, closes, group):
+    """Exact OHLC of every `group` consecutive bars (the last group may be short)."""
+    starts = np.arange(0, len(opens), group)
+    ends = np.append(starts[1:], len(opens)) - 1
+    return (opens[starts], np.maximum.reduceat(highs, starts), np.minimum.reduceat(lows, starts), closes[ends])
+
+
+class OHLCPyramid:
+    """Candles aggregated 2, 4, 8 ... at a time, for drawing any range at about one bar per few pixels.
+
+    Level k holds bars of 2**k base candles, aligned to multiples of 2**k. A
+    view of base candles [start, end) wanting at most `max_bars` bars takes
+    the coarsest level that still has more bars than that and aggregates just
+    the visible slice of it, so the cost depends on the screen width, not on
+    how many candles are loaded.
+    """
+
+    def __init__(self, opens, highs, lows, closes, min_bars=64):
+        level = tuple(np.asarray(a, dtype=float) for a in (opens, highs, lows, closes))
+        self.size = len(level[0])
+        self.levels = [level]
+        while len(level[0]) > min_bars:
+            level = aggregate(*level, 2)
+            self.levels.append(level)
+
+    def view(self, start, end, max_bars):
+        """Bars covering base candles [start, end): (first base index, base candles per bar, o, h, l, c)."""
+        start, end = max(0, int(start)), min(self.size, int(np.ceil(end)))
+        if end <= start:
+            return start, 1, *(np.zeros(0) for _ in range(4))
+        max_bars = max(1, int(max_bars))
+
+        # Coarsest level still finer than wanted, then one exact aggregation of the visible part of it
+        k = 0
+        while k + 1 < len(self.levels) and (end - start) / 2 ** (k + 1) >= max_bars:
+            k += 1
+        step = 2 ** k
+        first, last = start // step, -(-end // step)
+        group = max(1, -(-(last - first) // max_bars))
+        first -= first % group  # Keep groups aligned, so panning doesn't change the bars
+        last = min(first + -(-(last - first) // group) * group, len(self.levels[k][0]))  # Only the data's end cuts a bar short
+        level = tuple(a[first:last] for a in self.levels[k])
+        return first * step, step * group, *aggregate(*level, group)
+
+
+class LODCandleChart:
+    """Candlestick chart of any number of candles, drawn at about `pixels_per_bar` per bar.
+
+    Candles are placed at their index, like mplfinance does, and redrawn from an
+    OHLCPyramid for the visible x range whenever it changes (pan, zoom).
+    """
+
+    def __init__(self, ax, canvas, pixels_per_bar=3):
+        self.ax = ax
+        self.canvas = canvas
+        self.pixels_per_bar = pixels_per_bar
+        self.pyramid = None
+        self.times = None
+        self.bars_drawn = 0
+        self.wicks = LineCollection([], colors=WICK_COLOR, linewidths=1, zorder=2)
+        self.bodies = PolyCollection([], edgecolors=EDGE_COLOR, linewidths=0.8, zorder=3)
+        self._updating = False
+
+    def set_data(self, data):
+        """Shows a frame with Open/High/Low/Close columns and a time index, fully zoomed out."""
+        self.pyramid = OHLCPyramid(*(data[column].to_numpy() for column in ('Open', 'High', 'Low', 'Close')))
+        self.times = data.index
+
+        ax = self.ax
+        ax.clear()
+        ax.add_collection(self.wicks, autolim=False)
+        ax.add_collection(self.bodies, autolim=False)
+        ax.xaxis.set_major_locator(MaxNLocator(nbins=8, integer=True))
+        ax.xaxis.set_major_formatter(FuncFormatter(self._format_time))
+        ax.callbacks.connect('xlim_changed', self._on_xlim_changed)
+
+        size = max(1, len(data))
+        self._updating = True  # Draw once, below, rather than from the callback as well
+        ax.set_xlim(-1, size)
+        self._updating = False
+        if len(data):
+            low, high = data['Low'].min(), data['High'].max()
+            pad = (high - low) * 0.05 or 1
+            ax.set_ylim(low - pad, high + pad)
+        self.update()
+
+    def _format_time(self, x, pos=None):
+        index = int(round(x))
+        if self.times is None or not 0 <= index < len(self.times):
+            return ''
+        multi_day = self.times[0].date() != self.times[-1].date()
+        return self.times[index].strftime('%d %b %H:%M' if multi_day else '%H:%M')
+
+    def _on_xlim_changed(self, ax):
+        if not self._updating:
+            self.update()
+
+    def update(self):
+        """Rebuilds the candles for the visible x range and requests a redraw."""
+        if self.pyramid is None:
+            return
+        x0, x1 = self.ax.get_xlim()
+        max_bars = self.ax.bbox.width / self.pixels_per_bar
+        first, span, opens, highs, lows, closes = self.pyramid.view(np.floor(x0), np.ceil(x1) + 1, max_bars)
+
+        # Bar i covers base candles first + i * span ... + span - 1 (the last one may be cut short)
+        left = first + np.arange(len(opens)) * span
+        right = np.minimum(left + span, self.pyramid.size) - 1
+        center = (left + right) / 2
+        half = np.maximum((right - left + 1) * 0.4, 0.3)
+        bottom, top = np.minimum(opens, closes), np.maximum(opens, closes)
+
+        self.wicks.set_segments(np.stack([np.column_stack([center, lows]), np.column_stack([center, highs])], axis=1))
+        self.bodies.set_verts(np.stack([np.column_stack([center - half, bottom]), np.column_stack([center - half, top]),
+                                        np.column_stack([center + half, top]),
+                                        np.column_stack([center + half, bottom])], axis=1))
+        self.bodies.set_facecolor(np.where(closes >= opens, UP_COLOR, DOWN_COLOR))
+        self.bars_drawn = len(opens)
+        self.canvas.draw_idle()
@@ -1,22 +1,36 @@
-import os
 import sys
-import pandas as pd
-import mplfinance as mpf
+from candle_renderer import CandleRenderer
+from candle_store import open_store, to_frame
+from playback_loader import DEFAULT_CACHE_MB, PlaybackLoader
+from resample import candles
+from timeline import Timeline
 from PyQt5.QtWidgets import QApplication, QMainWindow, QPushButton, QVBoxLayout, QWidget, QHBoxLayout
 from PyQt5.QtCore import QTimer, Qt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 import matplotlib.pyplot as plt
 
+def load_data(partition):
+    # Load the day from the candle store (memory-mapped, nothing to parse; coarser granularities come from M1)
+    data = to_frame(candles(open_store(), *partition))
+    # Rename columns to match mplfinance's expected names
+    data.rename(columns={'o': 'Open', 'h': 'High', 'l': 'Low', 'c': 'Close', 'volume': 'Volume'}, inplace=True)
+    data.set_index('time', inplace=True)  # Set time as index for mplfinance
+    return data
+
+
 class CandlestickApp(QMainWindow):
-    def __init__(self, data_files):
+    def __init__(self, partitions, cache_mb=DEFAULT_CACHE_MB, continuous=False):
         super().__init__()
 
-        self.data_files = data_files
+        self.partitions = partitions  # (instrument, granularity, date) days in the candle store
+        # Loads the neighbouring days in the background, keeping up to cache_mb of them ready
+        self.loader = PlaybackLoader(partitions, load_data, max_bytes=cache_mb * 1024 * 1024)
         self.current_file_index = 0
-        self.data = self.load_data(self.data_files[self.current_file_index])
+        # In continuous mode the days play back as one timeline instead of one at a time
+        self.timeline = Timeline(self.loader, self.current_file_index) if continuous else None
+        self.data = self.timeline.data if continuous else self.loader.get(self.current_file_index)
         self.current_index = 0
         self.running = False
-        self.x_limit = 50  # Initial x-axis limit
         self.playback_speed = 1000  # Default speed in ms
 
         # Trade management
@@ -86,6 +100,8 @@ class CandlestickApp(QMainWindow):
         self.fig, self.ax = plt.subplots(figsize=(10, 5))  # Create a figure
         self.canvas = FigureCanvas(self.fig)  # Create a canvas for the figure
         main_layout.addWidget(self.canvas)  # Add the canvas to the layout
+        self.renderer = CandleRenderer(self.ax, self.canvas, 'XAU/USD Candlestick Playback')  # Draws only what changed
+        self.renderer.set_data(self.data)
 
         container = QWidget()
         container.setLayout(main_layout)
@@ -94,61 +110,13 @@ class CandlestickApp(QMainWindow):
         # Create the initial plot
         self.plot_candlestick()  # Initial plot with only the first candle
 
-        # Set fixed view limits for the plot
-        self.update_view_limits()
-
         # Connect mouse events for drawing
         self.canvas.mpl_connect('button_press_event', self.on_click)
 
-    def load_data(self, file_path):
-        # Load the CSV data
-        data = pd.read_csv(file_path)
-        # Rename columns to match mplfinance's expected names
-        data.rename(columns={'o': 'Open', 'h': 'High', 'l': 'Low', 'c': 'Close', 'volume': 'Volume'}, inplace=True)
-        data['time'] = pd.to_datetime(data['time'])
-        data.set_index('time', inplace=True)  # Set time as index for mplfinance
-        return data
-
     def plot_candlestick(self):
-        # Clear the previous plot
-        self.ax.clear()
-
-        # Plot all candles up to the current index without changing the x/y limits
-        mpf.plot(self.data.iloc[:self.current_index + 1],
-                type='candle',
-                style='classic',
-                ax=self.ax,
-                volume=False)
-
-        # Plot buy and sell markers
-        if self.buy_marker is not None:
-            self.ax.annotate('Buy', (self.buy_marker, self.data['Low'].iloc[self.buy_marker]), 
-                            xytext=(self.buy_marker, self.data['Low'].iloc[self.buy_marker] - 5),
-                            arrowprops=dict(facecolor='green', shrink=0.05), color='green', fontsize=8)
-
-        if self.sell_marker is not None:
-            self.ax.annotate('Sell', (self.sell_marker, self.data['High'].iloc[self.sell_marker]), 
-                            xytext=(self.sell_marker, self.data['High'].iloc[self.sell_marker] + 5),
-                            arrowprops=dict(facecolor='red', shrink=0.05), color='red', fontsize=8)
-
-
-        # Draw user-defined horizontal lines (blue)
-        for line in self.lines:
-            self.ax.axhline(y=line, color='blue', linewidth=1)
-
-        self.ax.set_title('XAU/USD Candlestick Playback')  # Optional title
-        self.update_view_limits()  # Update x and y limits based on the current index
-        self.canvas.draw()  # Redraw the canvas
-
-    def update_view_limits(self):
-        # Update x-axis limits based on the number of candles plotted
-        if self.current_index >= self.x_limit:
-            self.x_limit += 30  # Increase limit in increments of 30
-
-        self.ax.set_xlim(0, self.x_limit)  # Set the new x-axis limit
-
-        # Set y-axis limits with padding
-        self.ax.set_ylim(self.data['Low'].min() - 5, self.data['High'].max() + 5)
+        # Show candles up to the current index with the markers and lines; the renderer
+        # only draws the newest candle and the overlays unless the view has to change
+        self.renderer.render(self.current_index, self.lines, self.buy_marker, self.sell_marker)
 
     def start_playback(self):
         if not self.running:
@@ -161,19 +129,39 @@ class CandlestickApp(QMainWindow):
     def playback(self):
         if self.running and self.current_index < len(self.data) - 1:  # Update to not exceed the data length
             self.current_index += 1  # Increment to the next candle
+            if self.timeline:
+                self.advance_timeline()  # Stitch on the next day / drop old ones as midnight approaches
             self.plot_candlestick()  # Plot current and previous candles
             QTimer.singleShot(self.playback_speed, self.playback)  # Call this function again after the set speed
 
     def set_speed(self, speed):
         self.playback_speed = speed  # Set the new playback speed
 
+    def advance_timeline(self):
+        appended, dropped = self.timeline.advance(self.current_index)
+        if appended is not None:
+            self.renderer.extend(appended)
+        if dropped:
+            # Everything moved left by the candles dropped; markers on them go with them
+            self.current_index -= dropped
+            if self.buy_marker is not None:
+                self.buy_marker = self.buy_marker - dropped if self.buy_marker >= dropped else None
+            if self.sell_marker is not None:
+                self.sell_marker = self.sell_marker - dropped if self.sell_marker >= dropped else None
+            self.renderer.trim(dropped)
+        self.data = self.timeline.data
+
     def load_previous_file(self):
+        if self.timeline:
+            self.current_file_index = self.timeline.day_of(self.current_index)
         if self.current_file_index > 0:
             self.current_file_index -= 1
             self.load_data_and_plot()
 
     def load_next_file(self):
-        if self.current_file_index < len(self.data_files) - 1:
+        if self.timeline:
+            self.current_file_index = self.timeline.day_of(self.current_index)
+        if self.current_file_index < len(self.partitions) - 1:
             self.current_file_index += 1
             self.load_data_and_plot()
 
@@ -181,13 +169,18 @@ class CandlestickApp(QMainWindow):
         # Stop playback before loading new data
         self.stop_playback()
         
-        # Load new data and reset the index
-        self.data = self.load_data(self.data_files[self.current_file_index])
+        # Take the new day from the loader (usually prefetched already) and reset the index
+        if self.timeline:
+            self.timeline = Timeline(self.loader, self.current_file_index)  # Continue from the start of that day
+            self.data = self.timeline.data
+        else:
+            self.data = self.loader.get(self.current_file_index)
         self.current_index = 0  # Reset to the first candle
         self.buy_marker = None  # Clear previous buy marker
         self.sell_marker = None  # Clear previous sell marker
         self.active_trade = None  # Reset active trade status
         self.lines.clear()  # Clear previous lines
+        self.renderer.set_data(self.data)
         self.plot_candlestick()  # Plot with new data
 
     def keyPressEvent(self, event):
@@ -258,12 +251,17 @@ class CandlestickApp(QMainWindow):
             self.sell_marker = None
         self.active_trade = None  # Reset active trade
 
+    def closeEvent(self, event):
+        self.stop_playback()
+        self.loader.close()  # Drop any queued prefetches
+        event.accept()
+
 if __name__ == "__main__":
-    # List all CSV files in the "data" directory
-    data_folder = 'data'  # Update this path if needed
-    data_files = [os.path.join(data_folder, f) for f in os.listdir(data_folder) if f.endswith('.csv')]
+    # Play back every 1 minute day in the candle store
+    store = open_store()
+    partitions = [('XAU_USD', 'M1', date) for date in store.dates('XAU_USD', 'M1')]
 
     app = QApplication(sys.argv)
-    window = CandlestickApp(data_files)
+    window = CandlestickApp(partitions)
     window.show()
     sys.exit(app.exec_())
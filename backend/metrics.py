@@ -0,0 +1,252 @@
+#LATENCY HISTOGRAMS AND COUNTERS FOR THE ENGINE'S TICK PATH, EXPORTED AS PROMETHEUS TEXT
+#
+# Usage: python metrics.py [--ticks 200000]    (measures the instrumentation's own cost per tick)
+
+import argparse
+import sys
+import threading
+import time
+
+now_ns = time.perf_counter_ns  # Monotonic; every timestamp in a tick's trace comes from here
+
+SUB_BUCKET_BITS = 5  # Exact below 32 ns, then 16 buckets per power of two: values are kept to within 1/16
+HALF = 1 << (SUB_BUCKET_BITS - 1)
+MAX_EXPONENT = 40  # Values above 2**45 ns (~10 hours) land in the last bucket
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+def bucket_index(value):
+    """HDR-style log-linear bucket of a non-negative integer: exact below 32, at most 1/16 wide above."""
+    exponent = value.bit_length() - SUB_BUCKET_BITS
+    if exponent <= 0:
+        return value
+    return (exponent << (SUB_BUCKET_BITS - 1)) + (value >> exponent)
+
+
+def bucket_bounds(index):
+    """The [low, high) range of values that fall into bucket `index`."""
+    if index < 2 * HALF:
+        return index, index + 1
+    exponent = index // HALF - 1
+    low = (index - exponent * HALF) << exponent
+    return low, low + (1 << exponent)
+
+
+class LatencyHistogram:
+    """Counts of nanosecond latencies in log-linear buckets, like an HdrHistogram.
+
+    Recording is a couple of integer operations and two increments, with no
+    allocation, so it can sit on the tick path; the count, quantiles and max
+    are read off the buckets. Each histogram is recorded from one thread (its
+    stage's), and readers on other threads may see it a sample behind.
+    """
+
+    def __init__(self, help_text=''):
+        self.help = help_text
+        self.counts = [0] * ((MAX_EXPONENT + 2) * HALF)
+        self.last = len(self.counts) - 1
+        self.sum = 0
+
+    def record(self, nanoseconds):
+        # bucket_index(), inlined: this runs several times per tick
+        exponent = nanoseconds.bit_length() - SUB_BUCKET_BITS
+        if exponent > 0:
+            index = (exponent << (SUB_BUCKET_BITS - 1)) + (nanoseconds >> exponent)
+            self.counts[index if index < self.last else self.last] += 1
+        else:
+            self.counts[nanoseconds if nanoseconds > 0 else 0] += 1
+        self.sum += nanoseconds
+
+    def since(self, start_ns):
+        """Records the time from `start_ns` (a now_ns() reading) to now."""
+        self.record(now_ns() - start_ns)
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def quantile(self, q, counts=None):
+        """Nanoseconds at quantile `q`: the top of the bucket it falls in."""
+        counts = counts or list(self.counts)
+        total = sum(counts)
+        if total == 0:
+            return 0
+        rank = max(1, q * total)
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if seen >= rank:
+                return bucket_bounds(index)[1] - 1
+        return 0
+
+    def summary(self):
+        counts = list(self.counts)
+        total = sum(counts)
+        return {
+            'count': total,
+            'mean_us': round(self.sum / total / 1000, 1) if total else None,
+            **{f'p{q * 100:g}_us': round(self.quantile(q, counts) / 1000, 1) for q in QUANTILES},
+            'max_us': round(self.quantile(1, counts) / 1000, 1),
+        }
+
+
+class Counter:
+    """A monotonically increasing count, incremented from one thread."""
+
+    def __init__(self, help_text=''):
+        self.help = help_text
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class Registry:
+    """Named counters and latency histograms, optionally labelled, rendered as Prometheus text.
+
+    Metrics are created on first use; keep the returned object to skip the
+    lookup on hot paths.
+    """
+
+    def __init__(self, prefix='algold_'):
+        self.prefix = prefix
+        self._metrics = {}  # (name, sorted labels) -> metric
+        self._lookups = {}  # (name, labels in call order) -> metric, so repeat lookups skip the sort
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help_text, labels):
+        lookup = (name, *labels.items())
+        metric = self._lookups.get(lookup)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.setdefault((name, tuple(sorted(labels.items()))), cls(help_text))
+                self._lookups[lookup] = metric
+        return metric
+
+    def counter(self, name, help_text='', **labels):
+        return self._get(Counter, name, help_text, labels)
+
+    def histogram(self, name, help_text='', **labels):
+        return self._get(LatencyHistogram, name, help_text, labels)
+
+    def summary(self):
+        """Counters and histogram summaries as plain dicts, for JSON endpoints and reports."""
+        result = {}
+        with self._lock:
+            items = list(self._metrics.items())
+        for (name, labels), metric in sorted(items, key=lambda item: item[0]):
+            key = name + ('{' + ','.join(f'{label}={value}' for label, value in labels) + '}' if labels else '')
+            result[key] = metric.value if isinstance(metric, Counter) else metric.summary()
+        return result
+
+    def render(self, collected=None):
+        """Prometheus text exposition (format 0.0.4) of every metric.
+
+        `collected` adds values kept elsewhere (queue depths, feed totals) as
+        {name: (type, [(labels dict, value)])}, read at scrape time.
+        """
+        with self._lock:
+            items = list(self._metrics.items())
+        families = {}
+        for (name, labels), metric in items:
+            families.setdefault(name, []).append((labels, metric))
+
+        lines = []
+        for name in sorted(families):
+            samples = sorted(families[name], key=lambda sample: sample[0])
+            metric_type = 'counter' if isinstance(samples[0][1], Counter) else 'summary'
+            full_name = self.prefix + name + ('_total' if metric_type == 'counter' else '_seconds')
+            help_text = next((metric.help for _, metric in samples if metric.help), name)
+            lines.append(f'# HELP {full_name} {help_text}')
+            lines.append(f'# TYPE {full_name} {metric_type}')
+            for labels, metric in samples:
+                if metric_type == 'counter':
+                    lines.append(f'{full_name}{format_labels(labels)} {metric.value}')
+                    continue
+                counts = list(metric.counts)
+                for q in QUANTILES:
+                    lines.append(f'{full_name}{format_labels(labels + (("quantile", f"{q:g}"),))} '
+                                 f'{metric.quantile(q, counts) / 1e9:.9g}')
+                lines.append(f'{full_name}_sum{format_labels(labels)} {metric.sum / 1e9:.9g}')
+                lines.append(f'{full_name}_count{format_labels(labels)} {sum(counts)}')
+
+        for name, (metric_type, samples) in sorted((collected or {}).items()):
+            full_name = self.prefix + name
+            lines.append(f'# TYPE {full_name} {metric_type}')
+            for labels, value in samples:
+                lines.append(f'{full_name}{format_labels(tuple(sorted(labels.items())))} {float(value):.9g}')
+        return '\n'.join(lines) + '\n'
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n') for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+
+registry = Registry()  # The engine's metrics, served by start_stream's /metrics
+
+
+def benchmark(ticks=200000):
+    """Per-tick cost in ns of the instrumentation start_stream runs for a tick: {'tick': ..., 'order_tick': ...}.
+
+    'tick' is a tick that goes through the poll, process_tick and the signal
+    check; 'order_tick' one that also signals and places an order, the most
+    instrumented path. Both make the same calls the engine does, including the
+    labelled counter lookup for the order's outcome.
+    """
+    bench = Registry()
+    latency = {stage: bench.histogram('tick_latency', stage=stage)
+               for stage in ('indicators', 'signals', 'order_sent', 'broker_response')}
+    duration = {stage: bench.histogram('stage_duration', stage=stage)
+                for stage in ('feed_poll', 'process_tick', 'check_signals', 'create_order')}
+    ticks_processed, signals = bench.counter('ticks'), bench.counter('signals', side='buy')
+
+    def tick(order=False):
+        started = now_ns()
+        received = now_ns()  # Feed poll returns
+        duration['feed_poll'].record(received - started)
+
+        started = now_ns()  # process_tick
+        ticks_processed.inc()
+        duration['process_tick'].since(started)
+        latency['indicators'].since(received)
+
+        started = now_ns()  # check_signals
+        if order:
+            signals.inc()
+            sent = now_ns()  # create_order
+            latency['order_sent'].record(sent - received)
+            duration['create_order'].since(sent)
+            latency['broker_response'].since(received)
+            bench.counter('orders', side='buy', result='placed').inc()
+        duration['check_signals'].since(started)
+        latency['signals'].since(received)
+
+    def best_of(func, repeat=5):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter_ns()
+            for _ in range(ticks):
+                func()
+            elapsed = (time.perf_counter_ns() - start) / ticks
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    bare = best_of(lambda: None)
+    return {'tick': best_of(tick) - bare, 'order_tick': best_of(lambda: tick(order=True)) - bare}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the tick path instrumentation overhead.")
+    parser.add_argument('--ticks', type=int, default=200000)
+    args = parser.parse_args()
+
+    overhead = benchmark(args.ticks)
+    print(f"Instrumentation overhead ({args.ticks} ticks, best of 5): {overhead['tick'] / 1000:.2f} us per tick, "
+          f"{overhead['order_tick'] / 1000:.2f} us per tick that places an order")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Pipeline:
+    """Event-driven engine: stages run as asyncio tasks connected by queues.
+
+    A stage wakes up as soon as an item lands in its inbox instead of sleeping
+    for a fixed interval. Handlers are ordinary blocking functions; each runs on
+    a named single-worker thread, so stages that share a thread name (e.g. all
+    the ones touching strategy state) never run concurrently and see items in
+    queue order, while feed polling and REST calls on other threads overlap
+    with them.
+
+    Every item carries the monotonic time at which its source received it, so
+    each stage reports the latency from receipt to the end of its handler.
+    """
+
+    def __init__(self, queue_size=1000):
+        self.queue_size = queue_size
+        self.loop = asyncio.new_event_loop()
+        self.queues = {}
+        self.stats = {}
+        self._queue_names = []
+        self._runners = []
+        self._executors = {}
+        self._thread = None
+
+    def _declare(self, name, queue_names):
+        self.stats[name] = {'processed': 0, 'errors': 0, 'last_latency_ms': None, 'max_latency_ms': 0.0}
+        for queue_name in queue_names:
+            if queue_name not in self._queue_names:
+                self._queue_names.append(queue_name)
+
+    def source(self, name, poll, interval, outputs=(), thread=None):
+        """Calls `poll()` every `interval` seconds and forwards every result that is not None."""
+        self._declare(name, outputs)
+
+        async def run():
+            while True:
+                result = await self._call(name, thread, poll)
+                if result is not None:
+                    await self._forward(outputs, time.monotonic(), result)
+                await asyncio.sleep(interval)
+
+        self._runners.append(run)
+
+    def stage(self, name, handler, inbox, outputs=(), thread=None):
+        """Runs `handler(item)` for each item in `inbox` and forwards every result that is not None."""
+        self._declare(name, [inbox, *outputs])
+
+        async def run():
+            queue = self.queues[inbox]
+            while True:
+                origin, item = await queue.get()
+                result = await self._call(name, thread, handler, item, origin=origin)
+                if result is not None:
+                    await self._forward(outputs, origin, result)
+
+        self._runners.append(run)
+
+    def timer(self, name, handler, interval, inbox=None, thread=None):
+        """Runs `handler()` once at start, then every `interval` seconds, or right away when something
+        arrives in `inbox`.
+
+        Wake-ups that pile up while the handler runs are coalesced into one call.
+        """
+        self._declare(name, [inbox] if inbox else [])
+
+        async def run():
+            queue = self.queues.get(inbox)
+            origin = None
+            while True:
+                await self._call(name, thread, handler, origin=origin)
+                origin = None
+                if queue is None:
+                    await asyncio.sleep(interval)
+                    continue
+                try:
+                    origin, _ = await asyncio.wait_for(queue.get(), interval)
+                    while not queue.empty():
+                        queue.get_nowait()
+                except asyncio.TimeoutError:
+                    pass
+
+        self._runners.append(run)
+
+    async def _call(self, name, thread, func, *args, origin=None):
+        executor = self._executors.get(thread or name)
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=thread or name)
+            self._executors[thread or name] = executor
+
+        stats = self.stats[name]
+        try:
+            result = await self.loop.run_in_executor(executor, func, *args)
+        except Exception as e:
+            stats['errors'] += 1
+            print(f"Error in pipeline stage '{name}': {e}")
+            return None
+
+        stats['processed'] += 1
+        if origin is not None:
+            latency_ms = (time.monotonic() - origin) * 1000
+            stats['last_latency_ms'] = round(latency_ms, 3)
+            stats['max_latency_ms'] = round(max(stats['max_latency_ms'], latency_ms), 3)
+        return result
+
+    async def _forward(self, outputs, origin, result):
+        for queue_name in outputs:
+            await self.queues[queue_name].put((origin, result))
+
+    def queue_depths(self):
+        return {name: queue.qsize() for name, queue in self.queues.items()}
+
+    def snapshot(self):
+        """Queue depths and per-stage counters, safe to call from other threads."""
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'queues': self.queue_depths(),
+            'stages': {name: dict(stats) for name, stats in self.stats.items()},
+        }
+
+    async def _main(self):
+        # Queues are created inside the loop so they bind to it on every Python version
+        for queue_name in self._queue_names:
+            self.queues[queue_name] = asyncio.Queue(self.queue_size)
+        await asyncio.gather(*(run() for run in self._runners))
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self._main())
+
+    def start(self):
+        """Runs the event loop on a daemon thread so Flask can keep the main thread."""
+        self._thread = threading.Thread(target=self._run_loop, name='engine-pipeline', daemon=True)
+        self._thread.start()
@@ -0,0 +1,155 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+import pandas as pd
+
+# OANDA's daily candles close at 17:00 New York time, so that is where one
+# trading day ends and the next begins
+BROKER_TIMEZONE = ZoneInfo('America/New_York')
+DAILY_CLOSE_HOUR = 17
+
+
+def trading_day(moment=None):
+    """Date of the trading day `moment` (UTC if naive, default now) falls in.
+
+    The day that opens at 17:00 New York time is labelled with the next
+    calendar date, like the broker's daily candle.
+    """
+    moment = moment or datetime.now(timezone.utc)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return (moment.astimezone(BROKER_TIMEZONE) + timedelta(hours=24 - DAILY_CLOSE_HOUR)).date()
+
+
+def previous_trading_day(day):
+    """The trading day before `day`, skipping the weekend (Monday's is Friday)."""
+    day -= timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+def next_rollover(moment=None):
+    """UTC time of the next daily close after `moment`."""
+    moment = moment or datetime.now(timezone.utc)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    start = datetime.combine(trading_day(moment), datetime.min.time(), BROKER_TIMEZONE)
+    close = start.replace(hour=DAILY_CLOSE_HOUR)  # 17:00 on the calendar day the trading day is labelled with
+    return close.astimezone(timezone.utc)
+
+
+def calculate_pivots(candle):
+    """Classic floor pivots from one daily candle (a row with o/h/l/c)."""
+    open_price, high, low, close = candle["o"], candle["h"], candle["l"], candle["c"]
+
+    pivot_point = (high + low + close) / 3
+    s1 = (pivot_point * 2) - high
+    s2 = pivot_point - (high - low)
+    r1 = (pivot_point * 2) - low
+    r2 = pivot_point + (high - low)
+
+    return {
+        "open": round(open_price, 2),
+        "high": round(high, 2),
+        "low": round(low, 2),
+        "close": round(close, 2),
+        "pivot_point": round(pivot_point, 2),
+        "s1": round(s1, 2),
+        "s2": round(s2, 2),
+        "r1": round(r1, 2),
+        "r2": round(r2, 2)
+    }
+
+
+class PivotCache:
+    """Pivot points keyed by (instrument, trading day).
+
+    The previous day's daily candle can't change until the next daily close,
+    so pivots are fetched once per trading day, in the background, and
+    `get()` only ever reads the cache. `refresh_due()` does the fetching; run
+    it periodically (or call `start()`) and it picks up each rollover.
+    """
+
+    def __init__(self, api, instruments=("XAU_USD",), retry_interval=30):
+        self.api = api
+        self.instruments = tuple(instruments)
+        self.retry_interval = retry_interval  # Seconds between attempts while a day is missing
+        self.stats = {'fetches': 0, 'hits': 0, 'misses': 0}
+        self._pivots = {}
+        self._last_attempt = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def get(self, instrument="XAU_USD", moment=None):
+        """Cached pivots for the current trading day, or None if they aren't ready yet."""
+        pivots = self._pivots.get((instrument, trading_day(moment)))
+        self.stats['hits' if pivots is not None else 'misses'] += 1
+        return pivots
+
+    def fetch(self, instrument, day):
+        """Fetches the daily candle before trading day `day` and returns its pivots, or None."""
+        previous = previous_trading_day(day)
+        # A few days back covers weekends and holidays; `end` stops before the current day's candle closes
+        data = self.api.get_history(instrument=instrument, start=(previous - timedelta(days=4)).strftime('%Y-%m-%d'),
+                                    end=day.strftime('%Y-%m-%d'), granularity="D", price="B")
+        self.stats['fetches'] += 1
+        if data.empty:
+            return None
+
+        if 'complete' in data.columns:
+            data = data[data['complete'].astype(bool)]
+        candle_times = pd.to_datetime(data.index)
+        if candle_times.tz is None:
+            candle_times = candle_times.tz_localize('UTC')
+
+        # The candle that opened the previous trading day; right after a rollover
+        # the broker may not have completed it yet, in which case try again later
+        for candle_time, (_, candle) in zip(reversed(candle_times), data[::-1].iterrows()):
+            if trading_day(candle_time.to_pydatetime()) == previous:
+                return calculate_pivots(candle)
+        return None
+
+    def refresh(self, instrument="XAU_USD", moment=None):
+        """Fetches and caches the pivots for the current trading day. Blocks on the broker."""
+        day = trading_day(moment)
+        pivots = self.fetch(instrument, day)
+        if pivots is not None:
+            with self._lock:
+                self._pivots[(instrument, day)] = pivots
+                # Only the current day is ever served
+                for key in [key for key in self._pivots if key[0] == instrument and key[1] < day]:
+                    del self._pivots[key]
+        return pivots
+
+    def refresh_due(self, moment=None):
+        """Refreshes every instrument whose pivots for the current trading day are missing."""
+        day = trading_day(moment)
+        now = time.monotonic()
+        for instrument in self.instruments:
+            if (instrument, day) in self._pivots:
+                continue
+            last_attempt = self._last_attempt.get(instrument)
+            if last_attempt is not None and now - last_attempt < self.retry_interval:
+                continue
+            self._last_attempt[instrument] = now
+            try:
+                if self.refresh(instrument, moment) is None:
+                    print(f"Pivots for {instrument} on {day} not available yet, retrying in {self.retry_interval}s")
+            except Exception as e:
+                print(f"Error refreshing pivots for {instrument}: {e}")
+
+    def _run(self):
+        while True:
+            self.refresh_due()
+            wait = (next_rollover() - datetime.now(timezone.utc)).total_seconds()
+            if any((instrument, trading_day()) not in self._pivots for instrument in self.instruments):
+                wait = min(wait, self.retry_interval)
+            time.sleep(max(wait, 1))
+
+    def start(self):
+        """Refreshes in a daemon thread that sleeps until each daily close."""
+        self._thread = threading.Thread(target=self._run, name='pivot-cache', daemon=True)
+        self._thread.start()
+        return self
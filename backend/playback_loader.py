@@ -0,0 +1,124 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_CACHE_MB = 256
+
+
+def frame_bytes(data):
+    return int(data.memory_usage(deep=True).sum())
+
+
+class PlaybackLoader:
+    """Loads playback days on a worker thread and keeps the ready frames in a bounded LRU.
+
+    get(index) returns day `index` of `partitions` and queues its neighbours
+    (`radius` days either side) for loading in the background, so stepping to
+    the next or previous day finds it ready. Frames are evicted least recently
+    used first once they add up to more than `max_bytes`; the day just returned
+    is never evicted.
+    """
+
+    def __init__(self, partitions, load, max_bytes=DEFAULT_CACHE_MB * 1024 * 1024, radius=1):
+        self.partitions = partitions
+        self.load = load  # partition -> DataFrame, called on the worker thread
+        self.max_bytes = max_bytes
+        self.radius = radius
+
+        self._lock = threading.Lock()
+        self._frames = OrderedDict()  # index -> (frame, bytes), most recently used last
+        self._pending = {}  # index -> Future
+        self._bytes = 0
+        self._current = None  # The day last returned by get()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='playback-loader')
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, index):
+        """Day `index` as a frame. Blocks only if it wasn't prefetched."""
+        with self._lock:
+            cached = self._frames.get(index)
+            if cached is not None:
+                self._frames.move_to_end(index)
+                self.hits += 1
+            else:
+                self.misses += 1
+            future = self._pending.get(index) if cached is None else None
+
+        data = cached[0] if cached is not None else None
+        if future is not None:
+            try:
+                data = future.result()  # Already loading; wait for it instead of loading it twice
+            except Exception:
+                pass  # The prefetch failed (and printed why); load it here, so any error reaches the caller
+        if data is None:
+            data = self.load(self.partitions[index])
+            self._store(index, data)
+
+        self._touch(index)
+        self.prefetch(index)
+        return data
+
+    def prefetch(self, index):
+        """Queues the days around `index` that aren't cached or loading yet."""
+        for neighbour in range(index - self.radius, index + self.radius + 1):
+            if neighbour == index or not 0 <= neighbour < len(self.partitions):
+                continue
+            with self._lock:
+                if neighbour in self._frames or neighbour in self._pending:
+                    continue
+                self._pending[neighbour] = self._executor.submit(self._load_in_background, neighbour)
+
+    def _load_in_background(self, index):
+        try:
+            data = self.load(self.partitions[index])
+            self._store(index, data)
+            return data
+        except Exception as e:
+            print(f"Error prefetching {self.partitions[index]}: {e}")
+            raise
+        finally:
+            with self._lock:
+                self._pending.pop(index, None)
+
+    def _store(self, index, data):
+        size = frame_bytes(data)
+        with self._lock:
+            if index in self._frames:
+                return
+            self._frames[index] = (data, size)
+            self._bytes += size
+            self._evict(keep=index)
+
+    def _touch(self, index):
+        """Marks `index` most recently used, so a prefetch can't evict the day on screen."""
+        with self._lock:
+            if index in self._frames:
+                self._frames.move_to_end(index)
+            self._current = index
+
+    def _evict(self, keep):
+        for index in list(self._frames):
+            if self._bytes <= self.max_bytes:
+                break
+            if index in (keep, self._current):
+                continue
+            self._bytes -= self._frames.pop(index)[1]
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'cached_days': len(self._frames),
+                'cached_mb': round(self._bytes / (1024 * 1024), 2),
+                'max_mb': round(self.max_bytes / (1024 * 1024), 2),
+                'loading': len(self._pending),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
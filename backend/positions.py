@@ -0,0 +1,129 @@
+import threading
+import oandapyV20.endpoints.trades as trades
+
+
+def format_units(units):
+    """Formats units the way OANDA sends them ('1', '-2', '0.5')."""
+    units = float(units)
+    return str(int(units)) if units.is_integer() else str(units)
+
+
+class PositionBook:
+    """Open trades kept in memory so the tick path never waits on a REST call.
+
+    The book is seeded once from OpenTrades and then updated from the order
+    responses the engine gets back and from the transactions TransactionSync
+    fetches. Every ORDER_FILL is applied once (tracked by transaction ID),
+    whichever of the two sources delivers it first. `reconcile()` replaces the
+    book with a fresh list of open trades from the broker to correct any
+    drift, and keeps unrealizedPL current.
+    """
+
+    def __init__(self, client, account_id):
+        self.client = client
+        self.account_id = account_id
+        self.last_transaction_id = None  # Newest ID covered by the book; TransactionSync applies only later ones
+        self.newest_transaction_id = 0  # Newest transaction applied from any source
+        self.stats = {'transactions_applied': 0, 'reconciliations': 0, 'drift_corrections': 0}
+        self._trades = {}
+        self._applied = set()
+        self._lock = threading.Lock()
+
+    def seed(self):
+        """Loads the open trades from the broker. Call once at startup."""
+        r = trades.OpenTrades(accountID=self.account_id)
+        self.client.request(r)
+        self.reconcile(r.response.get('trades', []), r.response.get('lastTransactionID'))
+
+    def has_open_trades(self):
+        return bool(self._trades)
+
+    def open_trades(self):
+        with self._lock:
+            return [dict(trade) for trade in self._trades.values()]
+
+    def active_trades(self):
+        """Open trades in the shape get_trades.get_active_trades() returns."""
+        return [
+            {"currentUnits": trade["currentUnits"], "unrealizedPL": trade["unrealizedPL"]}
+            for trade in self.open_trades()
+        ]
+
+    def apply_transaction(self, transaction, advance_cursor=True):
+        """Applies one account transaction. Only ORDER_FILLs change the open trades."""
+        transaction_id = int(transaction['id'])
+
+        with self._lock:
+            self.newest_transaction_id = max(self.newest_transaction_id, transaction_id)
+            if advance_cursor and (self.last_transaction_id is None
+                                   or transaction_id > int(self.last_transaction_id)):
+                self.last_transaction_id = str(transaction_id)
+
+            if transaction.get('type') != 'ORDER_FILL' or transaction_id in self._applied:
+                return
+            self._applied.add(transaction_id)
+            self.stats['transactions_applied'] += 1
+
+            for closed in transaction.get('tradesClosed', []):
+                self._trades.pop(closed['tradeID'], None)
+
+            reduced = transaction.get('tradeReduced')
+            if reduced and reduced['tradeID'] in self._trades:
+                trade = self._trades[reduced['tradeID']]
+                remaining = abs(float(trade['currentUnits'])) - abs(float(reduced['units']))
+                sign = 1 if float(trade['currentUnits']) > 0 else -1
+                trade['currentUnits'] = format_units(sign * remaining)
+
+            opened = transaction.get('tradeOpened')
+            if opened:
+                self._trades[opened['tradeID']] = {
+                    'id': opened['tradeID'],
+                    'instrument': transaction.get('instrument'),
+                    'currentUnits': format_units(opened['units']),
+                    'price': opened.get('price', transaction.get('price')),
+                    'unrealizedPL': '0.0000',
+                }
+
+    def apply_order_response(self, response):
+        """Applies the fill transaction returned when an order was placed.
+
+        The transaction cursor is left alone: fills with lower IDs may not have
+        reached us yet, and the next sync will deliver them (and skip this one).
+        """
+        if isinstance(response, dict) and 'id' in response:
+            self.apply_transaction(response, advance_cursor=False)
+
+    def reconcile(self, open_trades, last_transaction_id=None):
+        """Replaces the book with the broker's list of open trades.
+
+        A snapshot older than the newest transaction already applied is skipped,
+        so a slow reconciliation can't undo a fill that just came in.
+        """
+        with self._lock:
+            if last_transaction_id is not None and int(last_transaction_id) < self.newest_transaction_id:
+                return False
+
+            fresh = {
+                trade['id']: {
+                    'id': trade['id'],
+                    'instrument': trade.get('instrument'),
+                    'currentUnits': trade['currentUnits'],
+                    'price': trade.get('price'),
+                    'unrealizedPL': trade.get('unrealizedPL', '0.0000'),
+                }
+                for trade in open_trades
+            }
+
+            self.stats['reconciliations'] += 1
+            if set(fresh) != set(self._trades) or any(
+                    fresh[i]['currentUnits'] != self._trades[i]['currentUnits'] for i in fresh):
+                if self.stats['reconciliations'] > 1:
+                    self.stats['drift_corrections'] += 1
+                    print(f"Position book drift corrected: {sorted(self._trades)} -> {sorted(fresh)}")
+
+            self._trades = fresh
+            if last_transaction_id is not None:
+                self.newest_transaction_id = max(self.newest_transaction_id, int(last_transaction_id))
+                if self.last_transaction_id is None or int(last_transaction_id) > int(self.last_transaction_id):
+                    self.last_transaction_id = str(last_transaction_id)
+            return True
@@ -0,0 +1,211 @@
+#REPLAYS RECORDED TICKS THROUGH THE LIVE STRATEGY, AGAINST THE FAKE BROKER AND A SIMULATED CLOCK
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import clock
+import http_pool
+from fake_oanda import FakeOanda, FakeTpqoa
+
+
+def load_ticks(path):
+    """Loads a recorded live_price_data.csv, or a downloaded candle file (time,o,h,l,c,...), as ticks."""
+    data = pd.read_csv(path)
+    if 'timestamp' not in data.columns:
+        data = data.rename(columns={'time': 'timestamp', 'o': 'open', 'h': 'high', 'l': 'low', 'c': 'close'})
+    data = data[['timestamp', 'open', 'high', 'low', 'close']].dropna()
+    data['epoch'] = (pd.to_datetime(data['timestamp'], utc=True) - pd.Timestamp(0, tz='UTC')) / pd.Timedelta(seconds=1)
+    return data.sort_values('epoch', kind='stable').reset_index(drop=True)
+
+
+def summarize_timings(timings):
+    stages = {}
+    for name, samples in timings.items():
+        samples = np.asarray(samples) * 1e6
+        stages[name] = {
+            'calls': len(samples),
+            'mean_us': round(float(samples.mean()), 1),
+            'p50_us': round(float(np.percentile(samples, 50)), 1),
+            'p99_us': round(float(np.percentile(samples, 99)), 1),
+            'max_us': round(float(samples.max()), 1),
+            'total_ms': round(float(samples.sum()) / 1000, 2),
+        }
+    return stages
+
+
+class Replay:
+    """Feeds recorded ticks through start_stream's tick path, unchanged.
+
+    Each tick goes through the same stages the engine pipeline runs:
+    process_tick (indicators), run_signal_check (signals -> execute_trade) and
+    run_order_monitor (orders), with the account and transaction timers fired
+    on simulated time. Orders go to a FakeOanda whose price follows the
+    replay, so take-profits and stop-losses fill like they would at OANDA, and
+    every wall-clock read in the strategy comes from a SimulatedClock.
+
+    start_stream keeps its state in module globals, so run one replay per
+    process.
+    """
+
+    def __init__(self, ticks, workdir, balance=10000.0, verbose=False):
+        self.ticks = ticks
+        self.workdir = workdir
+        self.balance = balance
+        self.verbose = verbose
+        self.timings = {}
+        self.fill_times = {}  # transaction ID -> simulated time it happened at
+
+    def _timed(self, stage, func, *args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.timings.setdefault(stage, []).append(time.perf_counter() - start)
+
+    def _setup(self):
+        first = self.ticks.iloc[0]
+        self.fake = FakeOanda(balance=self.balance, price=float(first['close'])).start()
+        self.sim_clock = clock.SimulatedClock(first['epoch'])
+        clock.install(self.sim_clock)
+        http_pool.install_clients(api=FakeTpqoa(self.fake), client=self.fake.client())
+
+        import start_stream as strategy
+
+        # Keep the replay's journal and transactions away from the live files
+        strategy.open_tick_journal(os.path.join(self.workdir, 'replay.ticks'), csv_path=None)
+        strategy.open_transaction_store(os.path.join(self.workdir, 'transactions.db'))
+        strategy.positions.seed()
+        self.strategy = strategy
+
+    def _tag_fills(self, seen, timestamp):
+        for transaction in self.fake.transactions[seen:]:
+            self.fill_times[transaction['id']] = timestamp
+        return len(self.fake.transactions)
+
+    def run(self):
+        output = sys.stdout if self.verbose else io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self._setup()
+            strategy = self.strategy
+            timers = {
+                'account': (strategy.fetch_balance, strategy.balance_refresh_interval),
+                'transactions': (strategy.sync_transactions, strategy.transaction_sync_interval),
+            }
+            next_due = {name: self.ticks['epoch'].iloc[0] + interval for name, (_, interval) in timers.items()}
+
+            seen = 0
+            wall_start = time.perf_counter()
+            for i, epoch in enumerate(self.ticks['epoch'].to_numpy()):
+                self.sim_clock.set(epoch)
+                self.fake.set_price(float(self.ticks['close'].iat[i]))  # Broker-side TP / SL
+                seen = self._tag_fills(seen, epoch)
+
+                for name, (handler, interval) in timers.items():
+                    if epoch >= next_due[name]:
+                        self._timed(name, handler)
+                        next_due[name] = epoch + interval
+
+                update = self._timed('indicators', strategy.process_tick, self.ticks.iloc[i:i + 1])
+                order_changed = self._timed('signals', strategy.run_signal_check, update) is not None
+                order_changed |= self._timed('orders', strategy.run_order_monitor, update) is not None
+                if order_changed:
+                    # An order placed or closed wakes the account refresh, as in the pipeline
+                    self._timed('account', strategy.fetch_balance)
+                    next_due['account'] = epoch + strategy.balance_refresh_interval
+                seen = self._tag_fills(seen, epoch)
+
+                if (i + 1) % 1000 == 0 and not self.verbose:
+                    output.seek(0)
+                    output.truncate()  # Don't keep the strategy's log in memory
+
+            strategy.sync_transactions()
+            wall_seconds = time.perf_counter() - wall_start
+
+        self.fake.stop()
+        return self.report(wall_seconds)
+
+    def report(self, wall_seconds):
+        simulated_seconds = float(self.ticks['epoch'].iloc[-1] - self.ticks['epoch'].iloc[0])
+        fills, closed = [], []
+        for transaction in self.fake.transactions:
+            if transaction['type'] != 'ORDER_FILL':
+                continue
+            fill = {
+                'id': transaction['id'],
+                'time': pd.Timestamp(self.fill_times.get(transaction['id'], 0), unit='s', tz='UTC').isoformat(),
+                'units': transaction['units'],
+                'price': float(transaction['price']),
+                'reason': transaction['reason'],
+                'pl': float(transaction['pl']),
+            }
+            fills.append(fill)
+            if transaction.get('tradesClosed'):
+                closed.append(fill)
+
+        pls = [fill['pl'] for fill in closed]
+        return {
+            'ticks': len(self.ticks),
+            'simulated_seconds': round(simulated_seconds, 1),
+            'wall_seconds': round(wall_seconds, 3),
+            'speedup': round(simulated_seconds / wall_seconds, 1) if wall_seconds else None,
+            'trades': {
+                'closed': len(closed),
+                'open': len(self.fake.trades),
+                'wins': sum(pl > 0 for pl in pls),
+                'losses': sum(pl < 0 for pl in pls),
+                'take_profits': sum(fill['reason'] == 'TAKE_PROFIT_ORDER' for fill in closed),
+                'stop_losses': sum(fill['reason'] == 'STOP_LOSS_ORDER' for fill in closed),
+            },
+            'realized_pl': round(self.fake.realized_pl, 4),
+            'final_balance': round(self.fake.balance, 4),
+            'fills': fills,
+            'stages': summarize_timings(self.timings),
+        }
+
+
+def print_report(report):
+    print(f"Replayed {report['ticks']} ticks ({report['simulated_seconds']:.0f} s of market time) "
+          f"in {report['wall_seconds']:.2f} s, {report['speedup']}x real time")
+    trades = report['trades']
+    print(f"Trades closed: {trades['closed']} ({trades['wins']} won, {trades['losses']} lost; "
+          f"{trades['take_profits']} TP, {trades['stop_losses']} SL), still open: {trades['open']}")
+    print(f"Realized P&L: {report['realized_pl']:.2f}, final balance: {report['final_balance']:.2f}")
+    for fill in report['fills']:
+        print(f"  {fill['time']}  {fill['units']:>3} @ {fill['price']:.3f}  {fill['reason']:<18} P&L {fill['pl']:.2f}")
+    print(f"{'stage':<14}{'calls':>8}{'mean us':>10}{'p50 us':>10}{'p99 us':>10}{'max us':>11}")
+    for name, stats in report['stages'].items():
+        print(f"{name:<14}{stats['calls']:>8}{stats['mean_us']:>10}{stats['p50_us']:>10}"
+              f"{stats['p99_us']:>10}{stats['max_us']:>11}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded ticks through the live strategy offline.")
+    parser.add_argument('ticks', nargs='?', default='live_price_data.csv',
+                        help="live_price_data.csv or a downloaded data/<granularity>/*.csv file")
+    parser.add_argument('--balance', type=float, default=10000.0)
+    parser.add_argument('--json', help="Also write the report to this file")
+    parser.add_argument('--verbose', action='store_true', help="Show the strategy's own output")
+    args = parser.parse_args()
+
+    ticks = load_ticks(args.ticks)
+    if ticks.empty:
+        sys.exit(f"No ticks in {args.ticks}")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        report = Replay(ticks, workdir, balance=args.balance, verbose=args.verbose).run()
+
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
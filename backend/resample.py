@@ -0,0 +1,96 @@
+#BUILDS ANY MINUTE GRANULARITY (M3, M5, M7, M30 ...) FROM THE STORED M1 CANDLES
+#
+# Usage: python resample.py M5 M15 M30 [--instrument XAU_USD]    (prebuilds the cached days)
+
+import argparse
+import sys
+import numpy as np
+from candle_store import CANDLE_DTYPE, SECONDS_PER_DAY, open_store
+
+
+def granularity_minutes(granularity):
+    """'M7' -> 7. Raises ValueError for anything that isn't a whole number of minutes within a day."""
+    if not granularity.startswith('M') or not granularity[1:].isdigit():
+        raise ValueError(f"Unsupported granularity {granularity}; expected M<minutes>, e.g. M5")
+    minutes = int(granularity[1:])
+    if not 1 <= minutes <= SECONDS_PER_DAY // 60:
+        raise ValueError(f"Unsupported granularity {granularity}; expected 1 to 1440 minutes")
+    return minutes
+
+
+def resample(records, minutes):
+    """Aggregates time-sorted M1 candles (CANDLE_DTYPE) into `minutes`-minute candles.
+
+    Buckets start at UTC midnight, so the standard granularities line up with
+    OANDA's own candles, and a period that doesn't divide the day (M7) gets a
+    short last bucket instead of spilling into the next day. Each bucket takes
+    its open from its first candle, its close from its last, the high/low
+    extremes and the summed volume, and is complete only if all its candles are.
+    """
+    if minutes == 1 or len(records) == 0:
+        return np.array(records, dtype=CANDLE_DTYPE)
+
+    step = minutes * 60
+    times = records['time']
+    day = times - times % SECONDS_PER_DAY
+    bucket = day + (times - day) // step * step
+
+    starts = np.flatnonzero(np.concatenate([[True], bucket[1:] != bucket[:-1]]))
+    ends = np.append(starts[1:], len(records)) - 1
+
+    candles = np.empty(len(starts), dtype=CANDLE_DTYPE)
+    candles['time'] = bucket[starts]
+    candles['o'] = records['o'][starts]
+    candles['h'] = np.maximum.reduceat(records['h'], starts)
+    candles['l'] = np.minimum.reduceat(records['l'], starts)
+    candles['c'] = records['c'][ends]
+    candles['volume'] = np.add.reduceat(records['volume'], starts)
+    candles['complete'] = np.logical_and.reduceat(records['complete'], starts)
+    return candles
+
+
+def candles(store, instrument, granularity, date):
+    """One day at any minute granularity, resampled from M1 on first use and cached in the store.
+
+    A cached day is rebuilt whenever the M1 day it came from has been written
+    since (e.g. downloaded again while still in progress, or its forming last
+    candle replaced by the completed one). Returns None when there is no M1
+    data for the day.
+    """
+    minutes = granularity_minutes(granularity)
+    source = store.entry(instrument, 'M1', date)
+    if source is None:
+        return None
+    if minutes == 1:
+        return store.read(instrument, 'M1', date)
+
+    cached = store.entry(instrument, granularity, date)
+    version = source.get('version', 0)  # Catalogs written before versions existed have none
+    if cached is None or cached.get('derived_from') != version:
+        store.write(instrument, granularity, date, resample(store.read(instrument, 'M1', date), minutes),
+                    derived_from=version)
+    return store.read(instrument, granularity, date)
+
+
+def load(store, instrument, granularity, dates):
+    """The given days at `granularity`, concatenated oldest first (days without M1 data are skipped)."""
+    days = [candles(store, instrument, granularity, date) for date in sorted(dates)]
+    days = [day for day in days if day is not None]
+    return np.concatenate(days) if days else np.empty(0, dtype=CANDLE_DTYPE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and cache coarser granularities from the stored M1 candles.")
+    parser.add_argument('granularities', nargs='+', help="e.g. M3 M5 M7 M15")
+    parser.add_argument('--instrument', default='XAU_USD')
+    args = parser.parse_args()
+
+    store = open_store()
+    dates = store.dates(args.instrument, 'M1')
+    for granularity in args.granularities:
+        rows = len(load(store, args.instrument, granularity, dates))
+        print(f"{args.instrument} {granularity}: {rows} candles over {len(dates)} days")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
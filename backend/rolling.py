@@ -0,0 +1,180 @@
+from collections import deque
+import math
+import numpy as np
+
+
+class RunningSum:
+    """Float sum that supports adding and removing terms without drifting.
+
+    Uses Neumaier's compensated summation, so a long stream of add/subtract pairs
+    stays within rounding of a fresh sum over the live terms.
+    """
+
+    def __init__(self):
+        self.total = 0.0
+        self.compensation = 0.0
+
+    def add(self, value):
+        t = self.total + value
+        if abs(self.total) >= abs(value):
+            self.compensation += (self.total - t) + value
+        else:
+            self.compensation += (value - t) + self.total
+        self.total = t
+
+    def subtract(self, value):
+        self.add(-value)
+
+    def reset(self):
+        self.total = 0.0
+        self.compensation = 0.0
+
+    @property
+    def value(self):
+        return self.total + self.compensation
+
+
+class RollingMean:
+    """Mean of the last `window` values, NaN until the window is full (like pandas' rolling().mean())."""
+
+    def __init__(self, window):
+        self.window = window
+        self._values = deque()
+        self._sum = RunningSum()
+
+    def __len__(self):
+        return len(self._values)
+
+    def update(self, value):
+        self._values.append(value)
+        self._sum.add(value)
+        if len(self._values) > self.window:
+            self._sum.subtract(self._values.popleft())
+
+    def replace_last(self, value):
+        """Swaps the most recent value, e.g. when the last candle is still forming."""
+        self._sum.subtract(self._values[-1])
+        self._values[-1] = value
+        self._sum.add(value)
+
+    @property
+    def value(self):
+        if len(self._values) < self.window:
+            return math.nan
+        return self._sum.value / self.window
+
+
+class RollingExtreme:
+    """Rolling max (or min) of the last `window` values using a monotonic deque.
+
+    Each value enters and leaves the deque once, so updates are amortised O(1)
+    and the current extreme is always at the front.
+    """
+
+    def __init__(self, window, mode='max'):
+        self.window = window
+        self._better = (lambda a, b: a >= b) if mode == 'max' else (lambda a, b: a <= b)
+        self._candidates = deque()  # (position, value), values monotonic from the front
+        self.count = 0
+
+    def update(self, value):
+        while self._candidates and self._better(value, self._candidates[-1][1]):
+            self._candidates.pop()
+        self._candidates.append((self.count, value))
+        self.count += 1
+        if self._candidates[0][0] <= self.count - 1 - self.window:
+            self._candidates.popleft()
+
+    @property
+    def value(self):
+        if self.count < self.window:
+            return math.nan
+        return self._candidates[0][1]
+
+
+class TVWAPWindow:
+    """Time-weighted average price over a trailing time window, in O(1) per tick.
+
+    Same semantics as the original list-based T-VWAP: each price is weighted by
+    the time until the next tick, points older than `window_seconds` relative to
+    the newest tick are evicted, and the value is 0.0 until there are two points
+    or while the window spans zero seconds.
+
+    Prices and timestamps live in a ring buffer of numpy arrays. The weighted sum
+    is kept as a running sum: appending a tick adds the weight of the previous
+    newest price, evicting a tick removes its own weight, and the total time is
+    just newest minus oldest timestamp. `capacity` is the initial buffer size; it
+    doubles if a burst of ticks ever fills it, so no point inside the window is
+    dropped.
+    """
+
+    def __init__(self, window_seconds, capacity=1024):
+        self.window_seconds = window_seconds
+        self._prices = np.zeros(capacity)
+        self._times = np.zeros(capacity)
+        self._start = 0
+        self._count = 0
+        self._weighted_sum = RunningSum()
+        self.t_vwap = 0.0
+
+    def __len__(self):
+        return self._count
+
+    def _index(self, i):
+        return (self._start + i) % len(self._prices)
+
+    def _grow(self):
+        order = [self._index(i) for i in range(self._count)]
+        self._prices = np.concatenate([self._prices[order], np.zeros(len(self._prices))])
+        self._times = np.concatenate([self._times[order], np.zeros(len(self._times))])
+        self._start = 0
+
+    def append(self, price, timestamp):
+        """Adds a tick (timestamp in epoch seconds or anything with .timestamp()) and returns the new T-VWAP."""
+        if hasattr(timestamp, 'timestamp'):
+            timestamp = timestamp.timestamp()
+        price = float(price)
+
+        if self._count == len(self._prices):
+            self._grow()
+
+        if self._count:
+            last = self._index(self._count - 1)
+            self._weighted_sum.add(self._prices[last] * (timestamp - self._times[last]))
+
+        slot = self._index(self._count)
+        self._prices[slot] = price
+        self._times[slot] = timestamp
+        self._count += 1
+
+        # Evict ticks that fell out of the window, oldest first
+        while timestamp - self._times[self._start] > self.window_seconds:
+            following = self._index(1)
+            self._weighted_sum.subtract(
+                self._prices[self._start] * (self._times[following] - self._times[self._start]))
+            self._start = following
+            self._count -= 1
+
+        self.t_vwap = self._calculate()
+        return self.t_vwap
+
+    def _calculate(self):
+        if self._count < 2:
+            self._weighted_sum.reset()
+            return 0.0
+
+        total_time = self._times[self._index(self._count - 1)] - self._times[self._start]
+        if total_time == 0:
+            return 0.0
+
+        return float(self._weighted_sum.value / total_time)
+
+    def prices(self):
+        """Returns the prices currently in the window, oldest first."""
+        return [float(self._prices[self._index(i)]) for i in range(self._count)]
+
+    def clear(self):
+        self._start = 0
+        self._count = 0
+        self._weighted_sum.reset()
+        self.t_vwap = 0.0
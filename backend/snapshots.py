@@ -0,0 +1,162 @@
+import json
+import threading
+import time
+from collections import namedtuple
+from datetime import date, datetime
+from flask import Response, request
+
+Snapshot = namedtuple('Snapshot', ['version', 'etag', 'body', 'status', 'published_at'])
+
+
+def encode_default(value):
+    """JSON fallback for the numpy/pandas values that end up in engine state."""
+    if hasattr(value, 'item'):
+        return value.item()  # numpy scalars
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+class Subscription:
+    """Latest-value mailbox of one streaming client.
+
+    Holds at most one pending snapshot per name: a snapshot published while
+    the previous one is still waiting to be sent replaces it. A slow client
+    therefore skips intermediate values instead of building up a queue, and
+    publishing never waits on a client.
+    """
+
+    def __init__(self, names):
+        self.names = frozenset(names)
+        self.sent = 0
+        self.coalesced = 0  # Snapshots replaced before they were sent
+        self._pending = {}
+        self._condition = threading.Condition()
+
+    def offer(self, name, snapshot):
+        with self._condition:
+            if name in self._pending:
+                self.coalesced += 1
+            self._pending[name] = snapshot
+            self._condition.notify()
+
+    def take(self, timeout=None):
+        """Waits up to `timeout` seconds for updates and returns all pending ones ({} on timeout)."""
+        with self._condition:
+            if not self._pending:
+                self._condition.wait(timeout)
+            pending, self._pending = self._pending, {}
+        self.sent += len(pending)
+        return pending
+
+
+class SnapshotStore:
+    """Immutable, pre-encoded JSON snapshots of engine state for the read endpoints.
+
+    The engine publishes a payload when the state behind an endpoint changes;
+    it is encoded once and given a new version. Requests get those bytes
+    as-is, with an ETag, and a matching If-None-Match gets an empty 304.
+    Publishing a payload that encodes to the same bytes keeps the version, so
+    clients aren't told about changes that didn't happen.
+
+    New versions are also pushed to streaming clients (see `stream()`).
+    """
+
+    def __init__(self):
+        self._snapshots = {}
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+        # Part of every ETag, so tags handed out before a restart never match
+        self._boot = format(int(time.time()), 'x')
+
+    def publish(self, name, payload, status=200):
+        """Encodes and stores `payload` as the current snapshot of `name`. Returns the snapshot."""
+        body = json.dumps(payload, default=encode_default, separators=(',', ':')).encode()
+
+        with self._lock:
+            current = self._snapshots.get(name)
+            if current is not None and current.body == body and current.status == status:
+                return current
+
+            version = current.version + 1 if current else 1
+            snapshot = Snapshot(version, f"{name}-{self._boot}-{version}", body, status, time.time())
+            self._snapshots[name] = snapshot
+            subscriptions = [s for s in self._subscriptions if name in s.names]
+
+        if status == 200:
+            for subscription in subscriptions:
+                subscription.offer(name, snapshot)
+        return snapshot
+
+    def get(self, name):
+        return self._snapshots.get(name)
+
+    def versions(self):
+        return {name: snapshot.version for name, snapshot in self._snapshots.items()}
+
+    def response(self, name):
+        """Flask response for the current snapshot of `name`, honouring If-None-Match."""
+        snapshot = self._snapshots[name]
+
+        if request.if_none_match.contains(snapshot.etag):
+            response = Response(status=304)
+        else:
+            response = Response(snapshot.body, status=snapshot.status, mimetype='application/json')
+
+        response.set_etag(snapshot.etag)
+        response.headers['Cache-Control'] = 'no-cache'  # Cache, but revalidate on every poll
+        return response
+
+    # Streaming
+
+    def subscribe(self, names):
+        """Registers a streaming client for `names`, starting with their current snapshots."""
+        subscription = Subscription(names)
+        with self._lock:
+            for name in subscription.names:
+                snapshot = self._snapshots.get(name)
+                if snapshot is not None and snapshot.status == 200:
+                    subscription.offer(name, snapshot)
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def stream_stats(self):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        return {
+            'clients': len(subscriptions),
+            'sent': sum(s.sent for s in subscriptions),
+            'coalesced': sum(s.coalesced for s in subscriptions),
+        }
+
+    def stream(self, names, heartbeat=15.0):
+        """Server-Sent Events for `names`: one event per new snapshot, named after it.
+
+        The event data is the snapshot's pre-encoded JSON, so nothing is
+        serialized per client. A comment line is sent after `heartbeat` idle
+        seconds, which is also how a disconnected client gets noticed.
+        """
+        subscription = self.subscribe(names)
+        try:
+            yield b"retry: 2000\n\n"
+            while True:
+                pending = subscription.take(heartbeat)
+                if not pending:
+                    yield b": keep-alive\n\n"
+                    continue
+                yield b"".join(
+                    b"event: %s\nid: %d\ndata: %s\n\n" % (name.encode(), snapshot.version, snapshot.body)
+                    for name, snapshot in pending.items())
+        finally:
+            self.unsubscribe(subscription)
+
+    def stream_response(self, names):
+        """Flask streaming response for `stream(names)`."""
+        response = Response(self.stream(names), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'  # Don't let a proxy buffer the stream
+        return response
@@ -1,9 +1,9 @@
 import sys
-import os
 import requests
-from PyQt5.QtWidgets import QApplication, QMainWindow, QPushButton, QVBoxLayout, QWidget
+from PyQt5.QtWidgets import QApplication, QCheckBox, QMainWindow, QPushButton, QVBoxLayout, QWidget
 from PyQt5.QtCore import Qt
 from main import CandlestickApp  # Import the candlestick playback app
+from candle_store import open_store
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -16,37 +16,44 @@ class MainWindow(QMainWindow):
         # Create the main layout
         main_layout = QVBoxLayout()
 
-        # Create the folder paths for each timeframe
-        self.folders = {
-            "1 Minute": "data/1min",
-            "5 Minute": "data/5min",
-            "10 Minute": "data/10min",
-            "15 Minute": "data/15min",
-            "30 Minute": "data/30min"
+        self.instrument = "XAU_USD"
+        self.store = open_store()
+
+        # Create the candle store granularity for each timeframe
+        self.granularities = {
+            "1 Minute": "M1",
+            "5 Minute": "M5",
+            "10 Minute": "M10",
+            "15 Minute": "M15",
+            "30 Minute": "M30"
         }
 
         # Create a button for each timeframe and add it to the layout
-        for label, folder in self.folders.items():
+        for label, granularity in self.granularities.items():
             button = QPushButton(label)
-            button.clicked.connect(lambda checked, f=folder: self.open_candlestick_app(f))
+            button.clicked.connect(lambda checked, g=granularity: self.open_candlestick_app(g))
             main_layout.addWidget(button)
 
+        # Play the days back as one continuous timeline instead of one at a time
+        self.continuous_checkbox = QCheckBox("Continuous playback")
+        main_layout.addWidget(self.continuous_checkbox)
+
         # Create a central widget and set the layout
         container = QWidget()
         container.setLayout(main_layout)
         self.setCentralWidget(container)
 
-    def open_candlestick_app(self, folder):
-        # Get all CSV files from the selected folder
-        csv_files = [os.path.join(folder, f) for f in os.listdir(folder) if f.endswith('.csv')]
+    def open_candlestick_app(self, granularity):
+        # Every stored M1 day, oldest first; CandlestickApp resamples them to the selected timeframe
+        partitions = [(self.instrument, granularity, date) for date in self.store.dates(self.instrument, 'M1')]
 
-        # Check if there are any CSV files in the folder
-        if not csv_files:
-            print(f"No CSV files found in {folder}")
+        # Check if there are any days stored
+        if not partitions:
+            print(f"No {self.instrument} {granularity} candles in the candle store")
             return
 
-        # Open the CandlestickApp with the selected CSV files
-        self.candlestick_window = CandlestickApp(csv_files)
+        # Open the CandlestickApp with the selected days
+        self.candlestick_window = CandlestickApp(partitions, continuous=self.continuous_checkbox.isChecked())
         self.candlestick_window.show()
 
     def closeEvent(self, event):
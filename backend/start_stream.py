@@ -1,49 +1,45 @@
 import pandas as pd
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 import threading
 import io
-import time
-from datetime import datetime, timedelta
-import os
 import subprocess
 import sys
-import tpqoa
 import math
-import oandapyV20
-import oandapyV20.endpoints.trades as trades
 import oandapyV20.endpoints.accounts as accounts
 # from scraper import fetch_events
-from get_history import main as get_history_main
-from get_trades import get_active_trades
-import requests
+import clock
+import metrics
+from http_pool import connection_stats, get_session, oanda_client, tpqoa_api
+from live_feed import LiveFeedClient
+from metrics import now_ns
+from rolling import TVWAPWindow
+from tick_journal import TickJournal
+from pipeline import Pipeline
+from positions import PositionBook
+from pivots import PivotCache
+from snapshots import SnapshotStore
+from transaction_store import TransactionStore, TransactionSync, default_store_file
+from indicators import IndicatorEngine, StreamingRSI, calculate_moving_average, calculate_rsi
 import numpy as np
-from datetime import datetime
-import configparser
 
 # upcoming_events = []
-history_data = []
 
 app = Flask(__name__)
 CORS(app)
 app.config['CORS_HEADERS'] = 'Content-Type'
 
-def load_config():
-    """Function to load OANDA credentials from config file"""
-    config = configparser.ConfigParser()
-    config_file = os.path.join(os.path.dirname(os.path.realpath(__file__)), "oanda.cfg")
-    config.read(config_file)
-    
-    return {
-        "account_id": config['oanda']['account_id'],
-        "access_token": config['oanda']['access_token']
-    }
-
-credentials = load_config()
-
-api = tpqoa.tpqoa("oanda.cfg")
-accountID = credentials['account_id']
-client = oandapyV20.API(access_token=credentials['access_token'])
+# Every broker and feed client shares the keep-alive pools in http_pool
+api = tpqoa_api()
+accountID = api.account_id  # Read from oanda.cfg by tpqoa
+client = oanda_client()
+positions = PositionBook(client, accountID)  # Open trades, kept in memory for the tick path
+pivot_cache = PivotCache(api)  # Refreshed by the engine at each daily close
+# Full transaction history in a local store; only transactions after its cursor are fetched.
+# Opened by open_transaction_store() at startup, so importing this module touches no files
+transaction_store = None
+transaction_sync = None
+history_page_size = 100
 balance_data = {'balance': 0.0}
 
 balance_data = {'balance': 0.0}
@@ -51,12 +47,37 @@ balance_data = {'balance': 0.0}
 
 
 local_csv_file = 'live_price_data.csv'
+local_journal_file = 'live_price_data.ticks'
+export_live_csv = True  # Mirror the journal to local_csv_file for the existing tooling
 csv_url_candles = "http://16.171.172.161:8000/resampled_data.csv"
 csv_url_live_price = "http://16.170.247.104:8000/resampled_data.csv"
 
+live_price_feed = LiveFeedClient(csv_url_live_price, session=get_session('feeds'))
+tick_journal = None  # Opened by open_tick_journal() at startup
+
+
+def open_tick_journal(path=local_journal_file, csv_path=local_csv_file if export_live_csv else None):
+    """Opens the journal the tick path writes to (replay.py and bench.py pass their own paths)."""
+    global tick_journal
+    tick_journal = TickJournal(path, csv_path=csv_path)
+
+
+def open_transaction_store(path=default_store_file):
+    """Opens the local transaction store and the sync that fills it and the position book,
+    and publishes the stored history for /get_history."""
+    global transaction_store, transaction_sync
+    transaction_store = TransactionStore(accountID, path)
+    transaction_sync = TransactionSync(client, transaction_store, positions)
+    publish_history()
+
+
 data_cache = []
 live_price_cache = None
 
+# Read endpoints serve these pre-encoded snapshots; they are republished when
+# the state behind them changes instead of being re-serialized on every poll
+snapshots = SnapshotStore()
+
 volatility_threshold = 0.1
 
 
@@ -84,41 +105,50 @@ cooldown_period = 250
 last_trade_time = None
 
 tvwap_window = 300
-tvwap_prices = []
-tvwap_times = []
-
-last_csv_update_time = None
-
-def calculate_moving_average(data, window=50):
-    return data['close'].rolling(window=window).mean().iloc[-1]
+tvwap_state = TVWAPWindow(tvwap_window)
+
+# Indicators are updated once per journaled tick / per candle instead of
+# re-running pandas rolling windows over the whole history
+live_indicators = IndicatorEngine(breakout_period=breakout_period)
+candle_rsi = StreamingRSI()
+candle_times = None  # (first, last) candle time fed into candle_rsi
+
+# Tick path instrumentation, served by /metrics. A tick carries the now_ns()
+# time it was received from the feed, and each stage records its latency from
+# there; the hot histograms and counters are looked up once here.
+tick_latency = {stage: metrics.registry.histogram('tick_latency', 'Time from feed receipt to the end of each stage',
+                                                  stage=stage)
+                for stage in ('indicators', 'signals', 'order_sent', 'broker_response')}
+stage_duration = {stage: metrics.registry.histogram('stage_duration', 'Time spent in each tick path function',
+                                                    stage=stage)
+                  for stage in ('feed_poll', 'process_tick', 'check_signals', 'create_order')}
+ticks_processed = metrics.registry.counter('ticks', 'Ticks processed')
+signals_generated = {side: metrics.registry.counter('signals', 'Signals generated', side=side) for side in ('buy', 'sell')}
+skipped_writes = metrics.registry.counter('skipped_writes', 'Ticks not journaled because their timestamp was already written')
+low_volatility_skips = metrics.registry.counter('low_volatility_skips', 'Signal checks skipped for low volatility')
 
 
 
-def fetch_open_trades():
-    """Fetch open trades using the OANDA API."""
+def fetch_balance():
+    """Function to fetch the account balance and update the balance_data."""
+    global balance_data
     try:
-        r = trades.OpenTrades(accountID=accountID)
+        r = accounts.AccountDetails(accountID)
         client.request(r)
-        open_trades = r.response.get('trades', [])
-        return open_trades
+        balance_data['balance'] = round(float(r.response['account']['balance']), 2) 
+        balance_data['unrealizedPL'] = round(float(r.response['account']['unrealizedPL']), 2)
+        balance_data['pl'] = round(float(r.response['account']['pl']), 2)
+        # The account snapshot lists the open trades too, so reconcile the position book for free
+        positions.reconcile(r.response['account'].get('trades', []), r.response.get('lastTransactionID'))
+        print(f"Updated Balance: {balance_data['balance']}, Unrealized PL: {balance_data['unrealizedPL']}, PL: {balance_data['pl']}")
+        publish_balance()
     except Exception as e:
-        print(f"Error fetching open trades: {e}")
-        return [] 
-    
-def fetch_balance():
-    """Function to fetch balance every 10 seconds and update the balance_data."""
-    global balance_data
-    while True:
-        try:
-            r = accounts.AccountDetails(accountID)
-            client.request(r)
-            balance_data['balance'] = round(float(r.response['account']['balance']), 2) 
-            balance_data['unrealizedPL'] = round(float(r.response['account']['unrealizedPL']), 2)
-            balance_data['pl'] = round(float(r.response['account']['pl']), 2)
-            print(f"Updated Balance: {balance_data['balance']}, Unrealized PL: {balance_data['unrealizedPL']}, PL: {balance_data['pl']}")
-        except Exception as e:
-            print(f"Error fetching balance: {e}")
-        time.sleep(10)
+        print(f"Error fetching balance: {e}")
+
+def publish_balance():
+    snapshots.publish('balance', balance_data)
+    snapshots.publish('unrealised', {'unrealizedPL': balance_data.get('unrealizedPL')})
+    snapshots.publish('profit', {'pl': balance_data.get('pl')})
 
 
 
@@ -139,6 +169,7 @@ def update_volatility_from_live_price():
     """Updates the volatility based on live price data fetched every 3 seconds."""
     global current_volatility
 
+    tvwap_prices = tvwap_state.prices()
     if len(tvwap_prices) < 20:
         current_volatility = None
         return
@@ -152,17 +183,25 @@ def update_volatility_from_live_price():
 
     print(f"Updated Volatility (Live Data, Scaled): {round(current_volatility, 4) * 10000}")
 
+def publish_volatility():
+    """Publishes the current volatility and T-VWAP for /get_volatility."""
+    if current_volatility is None:
+        snapshots.publish('volatility', {"error": "Volatility not calculated yet."}, status=400)
+        return
+
+    # Send back last 5 closing prices to verify data changes
+    last_5_closes = [record['Close'] for record in data_cache[-5:]]
+
+    snapshots.publish('volatility', {
+        "volatility": round(current_volatility * 10000, 4),  # Multiply by 10000
+        "t_vwap": round(calculate_t_vwap(), 4),  # Add T-VWAP to the response
+        "last_updated": clock.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "recent_closes": last_5_closes  # Add recent close prices for debugging
+    })
 
 
 
 
-def calculate_atr(data, period=14):
-    data['high_low'] = data['high'] - data['low']
-    data['high_close'] = abs(data['high'] - data['close'].shift())
-    data['low_close'] = abs(data['low'] - data['close'].shift())
-    tr = data[['high_low', 'high_close', 'low_close']].max(axis=1)
-    atr = tr.rolling(period).mean().iloc[-1]
-    return atr
 
 
 # def background_event_scraper():
@@ -175,19 +214,21 @@ def calculate_atr(data, period=14):
 # event_scraper_thread.daemon = True
 # event_scraper_thread.start()
 
-def run_get_history():
-    """Run the get_history main function every 20 seconds."""
-    global history_data
-    while True:
-        try:
-            history_data = get_history_main()
-            time.sleep(20)
-        except Exception as e:
-            print(f"Error in get_history execution: {e}")
+def sync_transactions():
+    """Fetches the account transactions since the stored cursor into the store and the position book."""
+    if transaction_sync.sync():
+        publish_history()
 
-get_history_thread = threading.Thread(target=run_get_history)
-get_history_thread.daemon = True
-get_history_thread.start()
+def publish_history():
+    """Publishes the newest page of trade history for /get_history."""
+    page, next_before = transaction_store.history(history_page_size)
+    snapshots.publish('history', {"status": "Success", "data": page, "next_before": next_before})
+
+# Initial snapshots, so every read endpoint can answer before the engine publishes
+snapshots.publish('data', data_cache)
+snapshots.publish('live_price', {"live_price": live_price_cache})
+publish_balance()
+publish_volatility()
 
 
 def send_notification(title, message):
@@ -195,20 +236,6 @@ def send_notification(title, message):
     script = f'display dialog "{message}" with title "{title}" buttons {{"OK"}} default button "OK"'
     subprocess.run(["osascript", "-e", script])
 
-def calculate_rsi(data, period=14):
-    """Calculates the RSI (Relative Strength Index)"""
-    if 'Close' not in data.columns or len(data) < period:
-        return None
-
-    deltas = pd.Series(data['Close']).diff()
-    gain = deltas.where(deltas > 0, 0).rolling(window=period).mean()
-    loss = -deltas.where(deltas < 0, 0).rolling(window=period).mean()
-
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
-
-    return rsi.iloc[-1] if not rsi.isna().all() else None
-
 def generate_signal_with_rsi_ma(current_price, breakout_high, breakout_low, data):
     rsi = calculate_rsi(data)
     short_ma = calculate_moving_average(data, window=50)
@@ -220,16 +247,6 @@ def generate_signal_with_rsi_ma(current_price, breakout_high, breakout_low, data
         return 'sell', True
     return None, False
 
-def calculate_breakout(data):
-    """Calculates breakout levels based on the last 'breakout_period' periods."""
-    if len(data) < breakout_period:
-        return None, None
-
-    high = data['close'].rolling(window=breakout_period).max().iloc[-1]
-    low = data['close'].rolling(window=breakout_period).min().iloc[-1]
-
-    return high, low
-
 def test_api_connection():
     try:
         account_details = api.get_account_summary()
@@ -242,9 +259,7 @@ def test_api_connection():
 def generate_signal(current_price, breakout_high, breakout_low):
     global last_signal, active_order
 
-    open_trades = fetch_open_trades()
-
-    if open_trades:
+    if positions.has_open_trades():
         print("Active trade detected. Suppressing signal generation.")
         return None, False
 
@@ -289,110 +304,58 @@ def calculate_time_vwap(new_data):
     return time_weighted_vwap
 
 def calculate_t_vwap():
-    global tvwap_prices, tvwap_times
-
-    if len(tvwap_prices) < 2:
-        return 0.0
-
-    time_diffs = [tvwap_times[i+1] - tvwap_times[i] for i in range(len(tvwap_times) - 1)]
-    
-    total_time = sum([td.total_seconds() for td in time_diffs])
-    # If the total time is zero (guard against division by zero)
-    if total_time == 0:
-        return 0.0
-
-    # Weighted price sum
-    weighted_price_sum = sum([tvwap_prices[i] * time_diffs[i].total_seconds() for i in range(len(time_diffs))])
-
-    # Calculate the time-weighted VWAP
-    t_vwap = weighted_price_sum / total_time
-
-    return t_vwap
+    """Returns the T-VWAP of the current window (kept up to date by tvwap_state.append)."""
+    return tvwap_state.t_vwap
 
-last_written_data = None  # Store last written data to avoid duplicates
-
-def can_write_csv(current_time):
-    """Check if enough time has passed to allow a CSV write."""
-    global last_csv_update_time
-    if last_csv_update_time is None or (current_time - last_csv_update_time >= 5):
-        last_csv_update_time = current_time  # Update time
-        return True
-    return False
-
-def fetch_live_price():
-    """Fetches live price and writes to CSV every 3 seconds."""
-    global last_written_data
-    try:
-        response = requests.get(csv_url_live_price)
-        if response.status_code == 200:
-            new_data = pd.read_csv(io.StringIO(response.text))
-            if 'close' in new_data.columns:
-                live_price_cache = new_data['close'].iloc[-1]
-                timestamp = pd.to_datetime(new_data['timestamp'].iloc[-1])
-                t_vwap = calculate_t_vwap()
-
-                current_data = {
-                    'timestamp': timestamp,
-                    'open': new_data['open'].iloc[-1],
-                    'high': new_data['high'].iloc[-1],
-                    'low': new_data['low'].iloc[-1],
-                    'close': live_price_cache,
-                    't_vwap': t_vwap
-                }
-
-                current_time = time.time()
-                if can_write_csv(current_time):
-                    if last_written_data != current_data:  # Avoid duplicates
-                        write_to_csv(timestamp, new_data, live_price_cache, t_vwap)
-                        last_written_data = current_data  # Update last written data
-                    else:
-                        print("Duplicate data detected. Skipping write.")
-                else:
-                    print("Time limit not reached. Skipping write.")
-
-    except Exception as e:
-        print(f"Error fetching live price data: {e}")
 csv_lock = threading.Lock()
 
 def write_to_csv(timestamp, new_data, live_price_cache, t_vwap):
-    """Writes the data to the CSV file, ensuring no duplicate entries and thread safety."""
-    row_data = pd.DataFrame({
-        'timestamp': [timestamp],
-        'open': [new_data['open'].iloc[-1]],
-        'high': [new_data['high'].iloc[-1]],
-        'low': [new_data['low'].iloc[-1]],
-        'close': [live_price_cache],
-        't_vwap': [t_vwap]
-    })
-
+    """Appends the tick to the tick journal (and its CSV export), skipping duplicate timestamps."""
     with csv_lock:
-        if os.path.exists(local_csv_file):
-            last_row = pd.read_csv(local_csv_file).tail(1)
-            if not last_row.empty and last_row['timestamp'].iloc[-1] == timestamp:
-                print(f"Duplicate entry detected for timestamp: {timestamp}. Skipping write.")
-                return
-
-        mode = 'a' if os.path.exists(local_csv_file) else 'w'
+        written = tick_journal.append(timestamp,
+                                      new_data['open'].iloc[-1],
+                                      new_data['high'].iloc[-1],
+                                      new_data['low'].iloc[-1],
+                                      live_price_cache,
+                                      t_vwap)
+        if not written:
+            skipped_writes.inc()
+            print(f"Duplicate entry detected for timestamp: {timestamp}. Skipping write.")
+            return False
 
-        row_data.to_csv(local_csv_file, mode=mode, header=(mode == 'w'), index=False)
         print(f"CSV updated: {timestamp}, Price: {live_price_cache}, T-VWAP: {t_vwap}")
+        return True
 
 
 
 
-def check_signals(current_price, t_vwap):
+def check_signals(current_price, t_vwap, received=None):
+    """Recalculates the breakout levels when due and trades a breakout past the T-VWAP.
+
+    `received` is the now_ns() time the tick came from the feed, for the latency metrics.
+    """
+    started = now_ns()
+    received = received or started
+    try:
+        _check_signals(current_price, t_vwap, received)
+    finally:
+        stage_duration['check_signals'].since(started)
+        tick_latency['signals'].since(received)
+
+
+def _check_signals(current_price, t_vwap, received):
     global breakout_high, breakout_low, price_update_count
 
     if price_update_count >= lag_period:
-        full_data = pd.read_csv(local_csv_file)
-        volatility = full_data['close'].std()
+        volatility = tick_journal.close_std()
         print(f"Volatility (Std Dev): {volatility:.2f}")
 
         if volatility < volatility_threshold:
+            low_volatility_skips.inc()
             print(f"Volatility too low ({volatility:.2f}), skipping the trade.")
             return
 
-        breakout_high, breakout_low = calculate_breakout(full_data)
+        breakout_high, breakout_low = live_indicators.breakout()
         price_update_count = 0
 
         if breakout_high is not None and breakout_low is not None:
@@ -411,9 +374,9 @@ def check_signals(current_price, t_vwap):
         signal = None
 
     if signal:
+        signals_generated[signal].inc()
         print(f"Generated Signal: {signal.upper()} at price {current_price} (T-VWAP: {t_vwap})")
-        full_data = pd.read_csv(local_csv_file)
-        execute_trade(signal, current_price, full_data)
+        execute_trade(signal, current_price, tick_journal.to_frame(breakout_period), received)
     else:
         price_update_count += 1
 
@@ -425,161 +388,215 @@ def check_signals(current_price, t_vwap):
 
 
 
+def update_candle_rsi(new_data):
+    """Feeds only the candles not seen yet into candle_rsi and returns the RSI of the frame.
+
+    The last candle may still be forming, so a candle with the same time as the
+    last one fed is treated as a revision. If the frame no longer starts where it
+    used to, the indicator is rebuilt from the whole frame.
+    """
+    global candle_rsi, candle_times
+
+    times = new_data['Time'].tolist()
+    closes = new_data['Close'].tolist()
+
+    if candle_times is None or candle_times[0] != times[0] or candle_times[1] > times[-1]:
+        candle_rsi = StreamingRSI()
+        start = 0
+    else:
+        # Walk back from the end to the last candle fed; usually one or two steps
+        start = len(times) - 1
+        while start > 0 and times[start] > candle_times[1]:
+            start -= 1
+        if times[start] == candle_times[1]:
+            candle_rsi.revise(closes[start])
+        start += 1
+
+    for close in closes[start:]:
+        candle_rsi.update(close)
+
+    candle_times = (times[0], times[-1])
+    return candle_rsi.value
+
+
 def fetch_and_update_data():
     """Fetches candle data and updates the data cache and volatility"""
     global data_cache
     try:
-        response = requests.get(csv_url_candles)
+        response = get_session('feeds').get(csv_url_candles)
         if response.status_code == 200:
             new_data = pd.read_csv(io.StringIO(response.text))
 
             if 'Close' in new_data.columns and 'Time' in new_data.columns:
-                rsi_value = calculate_rsi(new_data)
+                rsi_value = update_candle_rsi(new_data)
 
                 # Update the data cache
                 data_cache = new_data.to_dict(orient='records')
                 data_cache[-1]['RSI'] = rsi_value if rsi_value is not None else 'N/A'
 
+                # Unchanged candles encode to the same bytes and keep their version
+                version = snapshots.get('data').version
+                if snapshots.publish('data', data_cache).version != version:
+                    publish_volatility()  # Its recent_closes come from the candles
+
         else:
             print(f"Error fetching candles data: {response.status_code}")
     except Exception as e:
         print(f"An error occurred while fetching candles data: {e}")
 
 
-def fetch_live_price():
-    """Fetches the live price data and calculates T-VWAP and volatility."""
-    global live_price_cache, price_update_count, cooldown_counter, tvwap_prices, tvwap_times
+def poll_live_price():
+    """Polls the live price feed and returns the new rows, or None if nothing changed."""
     try:
-        response = requests.get(csv_url_live_price)
-        if response.status_code == 200:
-            new_data = pd.read_csv(io.StringIO(response.text))
+        started = now_ns()
+        new_data = live_price_feed.poll()
+        received = now_ns()
+        stage_duration['feed_poll'].record(received - started)
+        poll_stats = live_price_feed.last_poll
+        print(f"Live feed poll: HTTP {poll_stats['status']}, {poll_stats['bytes']} bytes, "
+              f"{poll_stats['rows']} new rows parsed in {poll_stats['parse_seconds'] * 1000:.2f} ms")
+
+        if poll_stats['status'] not in (200, 206, 304):
+            print(f"Error fetching live price data: {poll_stats['status']}")
+            return None
+        if new_data is not None and 'close' not in new_data.columns:
+            print("Error: 'close' column not found in live price data.")
+            return None
+        if new_data is not None:
+            new_data.attrs['received_ns'] = received  # Travels with the tick for the latency metrics
+        return new_data
+    except Exception as e:
+        print(f"An error occurred while fetching live price data: {e}")
+        return None
 
-            if 'close' in new_data.columns:
-                live_price_cache = new_data['close'].iloc[-1]
-                timestamp = pd.to_datetime(new_data['timestamp'].iloc[-1])
 
-                # Append the current price and timestamp to the T-VWAP window data
-                tvwap_prices.append(live_price_cache)
-                tvwap_times.append(timestamp)
+def process_tick(new_data):
+    """Updates the live price, T-VWAP, tick journal, indicators and volatility from the newest row.
 
-                # Remove old data if we exceed the T-VWAP window
-                while (timestamp - tvwap_times[0]).total_seconds() > tvwap_window:
-                    tvwap_prices.pop(0)
-                    tvwap_times.pop(0)
+    Returns (price, t_vwap, received) for the signal check, `received` being
+    the now_ns() time the tick came from the feed.
+    """
+    global live_price_cache, price_update_count, cooldown_counter
 
-                # Calculate T-VWAP
-                t_vwap = calculate_t_vwap()
+    started = now_ns()
+    received = new_data.attrs.get('received_ns') or started
+    ticks_processed.inc()
 
-                print(f"Live Price: {live_price_cache}, Timestamp: {timestamp}, T-VWAP: {t_vwap:.4f}")
+    live_price_cache = new_data['close'].iloc[-1]
+    timestamp = pd.to_datetime(new_data['timestamp'].iloc[-1])
 
-                # Store the price data locally
-                row_data = pd.DataFrame({
-                    'timestamp': [timestamp],
-                    'open': [new_data['open'].iloc[-1]],
-                    'high': [new_data['high'].iloc[-1]],
-                    'low': [new_data['low'].iloc[-1]],
-                    'close': [live_price_cache],
-                    't_vwap': [t_vwap]  # Add T-VWAP to the saved data
-                })
+    # Add the tick to the T-VWAP window; old ticks are evicted as it goes
+    t_vwap = tvwap_state.append(live_price_cache, timestamp)
 
-                mode = 'a' if os.path.exists(local_csv_file) else 'w'
-                row_data.to_csv(local_csv_file, mode=mode, header=mode == 'w', index=False)
+    print(f"Live Price: {live_price_cache}, Timestamp: {timestamp}, T-VWAP: {t_vwap:.4f}")
 
-                price_update_count += 1
-                cooldown_counter += 1
+    # Store the price data locally
+    if write_to_csv(timestamp, new_data, live_price_cache, t_vwap):
+        live_indicators.update(live_price_cache, new_data['high'].iloc[-1], new_data['low'].iloc[-1])
 
-                candles_left = lag_period - price_update_count
-                print(f"Candles until breakout recalculation: {candles_left}")
+    price_update_count += 1
+    cooldown_counter += 1
 
-                update_volatility_from_live_price()
+    candles_left = lag_period - price_update_count
+    print(f"Candles until breakout recalculation: {candles_left}")
 
-                check_signals(live_price_cache, t_vwap)
+    update_volatility_from_live_price()
 
-                time.sleep(1)
-            else:
-                print("Error: 'close' column not found in live price data.")
-        else:
-            print(f"Error fetching live price data: {response.status_code}")
+    snapshots.publish('live_price', {"live_price": live_price_cache})
+    publish_volatility()
+
+    stage_duration['process_tick'].since(started)
+    tick_latency['indicators'].since(received)
+    return live_price_cache, t_vwap, received
+
+
+def fetch_live_price():
+    """Fetches the live price data, calculates T-VWAP and volatility and checks for signals."""
+    try:
+        new_data = poll_live_price()
+        if new_data is None:
+            return  # Nothing new since the last poll
+
+        check_signals(*process_tick(new_data))
     except Exception as e:
         print(f"An error occurred while fetching live price data: {e}")
 
 
+def run_signal_check(update):
+    """Pipeline stage: checks signals for a tick. Passes the tick on if an order was placed."""
+    order_before = active_order
+    check_signals(*update)
+    return update if active_order is not order_before else None
 
 
-def background_data_fetcher():
-    """Thread for continuously fetching candle data and updating volatility"""
-    while True:
-        fetch_and_update_data()
-        time.sleep(1) 
+def run_order_monitor(update):
+    """Pipeline stage: checks the active order against the new price. Passes the tick on if it was closed."""
+    order_before = active_order
+    monitor_active_order()
+    return update if active_order is not order_before else None
 
 
-def background_live_price_fetcher():
-    """Thread for continuously fetching live price data"""
-    while True:
-        fetch_live_price()
-        time.sleep(3)
+# Feed ingestion, indicator update, signal check, order monitoring and account
+# refresh run as pipeline stages. The strategy stages share one thread so they
+# see ticks in order; an order placed or closed wakes the account refresh early.
+live_poll_interval = 0.5  # Unchanged polls are answered with a cheap 304
+candle_poll_interval = 1
+balance_refresh_interval = 10
+transaction_sync_interval = 2
+pivot_check_interval = 30  # Cheap cache check; the broker is only hit after a daily close
 
-def check_live_signals():
-    """Thread for continuously checking live price signals and monitoring active orders."""
-    while True:
-        if live_price_cache is not None:
-            monitor_active_order()
-        time.sleep(1)
+engine = Pipeline()
+engine.source('feed', poll_live_price, live_poll_interval, outputs=['ticks'], thread='feed')
+engine.stage('indicators', process_tick, inbox='ticks', outputs=['signals', 'orders'], thread='strategy')
+engine.stage('signals', run_signal_check, inbox='signals', outputs=['account'], thread='strategy')
+engine.stage('orders', run_order_monitor, inbox='orders', outputs=['account'], thread='strategy')
+engine.timer('account', fetch_balance, balance_refresh_interval, inbox='account', thread='account')
+engine.timer('transactions', sync_transactions, transaction_sync_interval, thread='account')
+engine.source('candles', fetch_and_update_data, candle_poll_interval, thread='candles')
+engine.timer('pivots', pivot_cache.refresh_due, pivot_check_interval, thread='pivots')
 
 def calculate_pivot_points():
-    """Calculates pivot points based on yesterday's candle data"""
-    yesterday = datetime.now() - timedelta(1)
-    yesterday_str = yesterday.strftime('%Y-%m-%d')
-
-    data = api.get_history(instrument="XAU_USD", start=yesterday_str, end=(yesterday + timedelta(1)).strftime('%Y-%m-%d'), granularity="D", price="B")
-
-    if not data.empty:
-        open_price = data["o"].iloc[0]
-        high = data["h"].iloc[0]
-        low = data["l"].iloc[0]
-        close = data["c"].iloc[0]
-
-        pivot_point = (high + low + close) / 3
-        s1 = (pivot_point * 2) - high
-        s2 = pivot_point - (high - low)
-        r1 = (pivot_point * 2) - low
-        r2 = pivot_point + (high - low)
-
-        return {
-            "pivot_point": round(pivot_point, 2),
-            "s1": round(s1, 2),
-            "s2": round(s2, 2),
-            "r1": round(r1, 2),
-            "r2": round(r2, 2)
-        }
-    else:
-        return None
+    """Returns the pivot points for the current trading day from the cache, or None if not ready"""
+    return pivot_cache.get("XAU_USD")
 
-def execute_trade(signal, current_price, data):
+def execute_trade(signal, current_price, data, received=None):
     global active_order, last_trade_time
 
     print(f"Executing {signal.upper()} trade at {current_price}")
 
 
-    open_trades = fetch_open_trades()
-
-    if open_trades:
+    if positions.has_open_trades():
         print("Cannot place a new trade. There is already an active trade.")
         return
 
     if signal == 'buy':
-        place_buy_order(current_price, data) 
+        place_buy_order(current_price, data, received)
     elif signal == 'sell':
-        place_sell_order(current_price, data)
+        place_sell_order(current_price, data, received)
 
-    last_trade_time = datetime.now()
+    last_trade_time = clock.now()
 
 
 active_order = None
 stop_loss_price = None
 take_profit_price = None
 
-def place_buy_order(current_price, data):
+def create_order(received=None, **order):
+    """api.create_order(**order), recording the broker round trip and the latency from feed receipt."""
+    sent = now_ns()
+    if received:
+        tick_latency['order_sent'].record(sent - received)
+    try:
+        return api.create_order(**order)
+    finally:
+        stage_duration['create_order'].since(sent)
+        if received:
+            tick_latency['broker_response'].since(received)
+
+def count_order(side, result):
+    metrics.registry.counter('orders', 'Orders sent to the broker, by outcome', side=side, result=result).inc()
+
+def place_buy_order(current_price, data, received=None):
     global active_order, stop_loss_price, take_profit_price
     try:
         take_profit_price = math.ceil(current_price + 6)
@@ -592,21 +609,26 @@ def place_buy_order(current_price, data):
             print("Error: API client is not initialized")
             return
 
-        response = api.create_order(
+        response = create_order(
+            received,
             instrument="XAU_USD",
             units=1,
             tp_price=take_profit_price,
-            sl_distance=sl_distance
+            sl_distance=sl_distance,
+            ret=True
         )
 
         # Add proper response validation
         if response is None:
+            count_order('buy', 'rejected')
             print("Error: Received null response from API")
             return
 
         print(f"Full API Response: {response}")
+        positions.apply_order_response(response)
 
         if isinstance(response, dict) and 'id' in response:
+            count_order('buy', 'placed')
             print(f"Successfully executed BUY trade at {current_price}, TP at {take_profit_price}, Order ID: {response['id']}")
             active_order = {
                 'id': response['id'],
@@ -616,9 +638,11 @@ def place_buy_order(current_price, data):
                 'sl_price': current_price - sl_distance
             }
         else:
+            count_order('buy', 'rejected')
             print(f"Error: Invalid response format from API: {response}")
 
     except Exception as e:
+        count_order('buy', 'error')
         print(f"Error placing buy order: {str(e)}")
         # Print the full traceback for debugging
         import traceback
@@ -626,7 +650,7 @@ def place_buy_order(current_price, data):
 
 
 
-def place_sell_order(current_price, data):
+def place_sell_order(current_price, data, received=None):
     global active_order, stop_loss_price, take_profit_price
     try:
         take_profit_price = math.floor(current_price - 6)
@@ -638,20 +662,25 @@ def place_sell_order(current_price, data):
             print("Error: API client is not initialized")
             return
 
-        response = api.create_order(
+        response = create_order(
+            received,
             instrument="XAU_USD",
             units=-1,  # Negative for sell
             tp_price=take_profit_price,
             sl_distance=sl_distance,
+            ret=True
         )
 
         if response is None:
+            count_order('sell', 'rejected')
             print("Error: Received null response from API")
             return
 
         print(f"Full API Response: {response}")
+        positions.apply_order_response(response)
 
         if isinstance(response, dict) and 'id' in response:
+            count_order('sell', 'placed')
             print(f"Successfully executed SELL trade at {current_price}, TP at {take_profit_price}, Order ID: {response['id']}")
             active_order = {
                 'id': response['id'],
@@ -661,9 +690,11 @@ def place_sell_order(current_price, data):
                 'sl_price': current_price + sl_distance
             }
         else:
+            count_order('sell', 'rejected')
             print(f"Error: Invalid response format from API: {response}")
 
     except Exception as e:
+        count_order('sell', 'error')
         print(f"Error placing sell order: {str(e)}")
         import traceback
         print(traceback.format_exc())
@@ -722,13 +753,51 @@ def close_order():
 def start_stream():
     return jsonify({"status": "Stream started"}), 200
 
+@app.route('/get_engine_stats', methods=['GET'])
+def get_engine_stats():
+    """API route to get pipeline queue depths and per-stage latencies."""
+    return jsonify({**engine.snapshot(), 'streams': snapshots.stream_stats(), 'tick_path': metrics.registry.summary()})
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus scrape endpoint: tick path latencies and counters, plus the pipeline and feed totals."""
+    snapshot = engine.snapshot()
+    stages = snapshot['stages'].items()
+    feed = live_price_feed.totals  # Counted by the feed client already, so the poll path records nothing extra
+    collected = {
+        'engine_queue_depth': ('gauge', [({'queue': name}, depth) for name, depth in snapshot['queues'].items()]),
+        'engine_stage_processed_total': ('counter', [({'stage': name}, stats['processed']) for name, stats in stages]),
+        'engine_stage_errors_total': ('counter', [({'stage': name}, stats['errors']) for name, stats in stages]),
+        'feed_polls_total': ('counter', [({}, feed['polls'])]),
+        'feed_not_modified_total': ('counter', [({}, feed['not_modified'])]),  # Polls with no new ticks
+        'feed_rows_total': ('counter', [({}, feed['rows'])]),
+        'feed_bytes_total': ('counter', [({}, feed['bytes'])]),
+        'feed_parse_seconds_total': ('counter', [({}, feed['parse_seconds'])]),
+    }
+    return Response(metrics.registry.render(collected), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/get_connection_stats', methods=['GET'])
+def get_connection_stats():
+    """API route to get HTTP connection reuse per pool."""
+    return jsonify(connection_stats())
+
+# Snapshots pushed by /stream unless the client picks others with ?topics=a,b
+stream_topics = ('live_price', 'volatility', 'balance', 'unrealised', 'profit')
+
+@app.route('/stream', methods=['GET'])
+def stream():
+    """Server-Sent Events: pushes each snapshot in `stream_topics` whenever it changes."""
+    topics = request.args.get('topics')
+    topics = [t for t in topics.split(',') if t] if topics else stream_topics
+    return snapshots.stream_response(topics)
+
 @app.route('/get_data', methods=['GET'])
 def get_data():
-    return jsonify(data_cache)
+    return snapshots.response('data')
 
 @app.route('/get_live_price', methods=['GET'])
 def get_live_price():
-    return jsonify({"live_price": live_price_cache})
+    return snapshots.response('live_price')
 
 @app.route('/get_pivots', methods=['GET'])
 def get_pivots():
@@ -741,43 +810,23 @@ def get_pivots():
 @app.route('/get_balance', methods=['GET'])
 def get_balance():
     """API route to get the current balance."""
-    return jsonify(balance_data)
+    return snapshots.response('balance')
 
 @app.route('/get_unrealised', methods=['GET'])
 def get_unrealised():
     """API route to get the current unrealized profit/loss."""
-    return jsonify({'unrealizedPL': balance_data['unrealizedPL']})
+    return snapshots.response('unrealised')
 
 
 @app.route('/get_volatility', methods=['GET'])
 def get_volatility():
     """Fetch current volatility and T-VWAP."""
-    if current_volatility is not None:
-        # Send back last 5 closing prices to verify data changes
-        last_5_closes = [record['Close'] for record in data_cache[-5:]]
-
-        # Calculate T-VWAP
-        t_vwap = calculate_t_vwap()
-
-        return jsonify({
-            "volatility": round(current_volatility * 10000, 4),  # Multiply by 10000
-            "t_vwap": round(t_vwap, 4),  # Add T-VWAP to the response
-            "last_updated": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            "recent_closes": last_5_closes  # Add recent close prices for debugging
-        })
-    else:
-        return jsonify({"error": "Volatility not calculated yet."}), 400
-
-
-
-
-
+    return snapshots.response('volatility')
 
-    
 @app.route('/get_profit', methods=['GET'])
 def get_profit():
     """API route to get the current profit/loss."""
-    return jsonify({'pl': balance_data['pl']})
+    return snapshots.response('profit')
 
 # @app.route('/get_events', methods=['GET'])
 # def get_upcoming_events():
@@ -788,9 +837,22 @@ def get_profit():
 
 @app.route('/get_history', methods=['GET'])
 def get_history():
-    """API route to execute the get_history main function and return its result."""
+    """API route to get the trade history, newest page first.
+
+    ?before=<next_before of the previous page> pages further back; ?limit sets the page size.
+    """
+    if 'before' not in request.args and 'limit' not in request.args:
+        return snapshots.response('history')
+
+    limit = request.args.get('limit', str(history_page_size))
+    if not limit.isdigit() or int(limit) < 1:
+        return jsonify({"status": "Error", "message": "limit must be a positive integer"}), 400
+
     try:
-        return jsonify({"status": "Success", "data": history_data}), 200
+        limit = min(int(limit), 1000)
+        before = request.args.get('before', type=int)
+        page, next_before = transaction_store.history(limit, before)
+        return jsonify({"status": "Success", "data": page, "next_before": next_before}), 200
     except Exception as e:
         return jsonify({"status": "Error", "message": str(e)}), 500
     
@@ -798,7 +860,7 @@ def get_history():
 def get_active_trades_route():
     """API route to fetch active trades data."""
     try:
-        active_trades = get_active_trades()
+        active_trades = positions.active_trades()
         return jsonify({"data": active_trades, "status": "Success"})
     except Exception as e:
         return jsonify({"data": None, "status": f"Error: {e}"})
@@ -857,24 +919,13 @@ if __name__ == '__main__':
         print("Failed to connect to OANDA API. Please check your credentials and connection.")
         sys.exit(1)
 
-    if os.path.exists(local_csv_file):
-        os.remove(local_csv_file)
-
-    # Start threads only once
-    candle_thread = threading.Thread(target=background_data_fetcher)
-    candle_thread.daemon = True 
-    candle_thread.start()
-
-    live_price_thread = threading.Thread(target=background_live_price_fetcher)
-    live_price_thread.daemon = True
-    live_price_thread.start()
+    open_tick_journal()
+    tick_journal.truncate()  # Start every session with an empty journal and CSV export
+    open_transaction_store()
 
-    signal_thread = threading.Thread(target=check_live_signals)
-    signal_thread.daemon = True 
-    signal_thread.start()
+    positions.seed()  # Seed the position book once; fills and reconciliation keep it current
 
-    balance_thread = threading.Thread(target=fetch_balance)
-    balance_thread.daemon = True 
-    balance_thread.start()
+    # Start the engine pipeline only once
+    engine.start()
 
     app.run(host='localhost', port=3001, debug=True, use_reloader=False)
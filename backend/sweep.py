@@ -0,0 +1,153 @@
+#PARALLEL PARAMETER SWEEP OF THE STRATEGY CONSTANTS OVER THE DOWNLOADED CANDLES
+
+import argparse
+import itertools
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from backtest import STRATEGY_DEFAULTS, load_candles, run_backtest, summarize
+
+COLUMNS = ('epoch', 'h', 'l', 'c')
+
+# Per-worker state, set by attach()
+_shared = None
+_arrays = None
+_cache = {}
+
+
+def share_prices(data):
+    """Copies the price columns into one shared memory block. Returns (block, shape)."""
+    shape = (len(COLUMNS), len(data))
+    block = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * 8)
+    prices = np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+    for row, column in enumerate(COLUMNS):
+        prices[row] = data[column].to_numpy(dtype=np.float64)
+    return block, shape
+
+
+def attach(name, shape):
+    """Worker initializer: maps the shared prices read-only, without copying them."""
+    global _shared, _arrays
+    _shared = shared_memory.SharedMemory(name=name)
+    prices = np.ndarray(shape, dtype=np.float64, buffer=_shared.buf)
+    prices.flags.writeable = False
+    _arrays = tuple(prices)
+
+
+def evaluate(params_batch):
+    """Backtests each parameter set against the shared prices and returns their summaries."""
+    results = []
+    for params in params_batch:
+        trades = run_backtest(*_arrays, **params, cache=_cache)
+        results.append({**params, **summarize(trades)})
+    return results
+
+
+def grid(spec):
+    """Every combination of {name: [values]}."""
+    names = list(spec)
+    return [dict(zip(names, values)) for values in itertools.product(*(spec[n] for n in names))]
+
+
+def random_search(spec, count, seed=None):
+    """`count` parameter sets drawn from {name: (low, high)} ranges or [choices]."""
+    rng = random.Random(seed)
+    sets = []
+    for _ in range(count):
+        params = {}
+        for name, values in spec.items():
+            if isinstance(values, tuple):
+                low, high = values
+                params[name] = rng.randint(low, high) if isinstance(STRATEGY_DEFAULTS[name], int) \
+                    else round(rng.uniform(low, high), 4)
+            else:
+                params[name] = rng.choice(values)
+        sets.append(params)
+    return sets
+
+
+def sweep(data, param_sets, processes=None, batches_per_process=4):
+    """Evaluates every parameter set over `data` in a process pool. Returns a results DataFrame.
+
+    The prices are put in shared memory once; workers map them instead of each
+    getting a pickled copy, and keep their own cache of the parameter-free
+    parts of the backtest across the sets they evaluate. The sets are split
+    into about `batches_per_process` batches per process, so every process
+    gets work and a slow batch near the end doesn't leave the others idle.
+    """
+    param_sets = [{**STRATEGY_DEFAULTS, **params} for params in param_sets]
+    processes = processes or os.cpu_count() or 1
+    batch_size = max(1, math.ceil(len(param_sets) / (processes * batches_per_process)))
+    batches = [param_sets[i:i + batch_size] for i in range(0, len(param_sets), batch_size)]
+    block, shape = share_prices(data)
+    try:
+        with ProcessPoolExecutor(max_workers=max(1, min(processes, len(batches))), initializer=attach,
+                                 initargs=(block.name, shape)) as pool:
+            results = [row for rows in pool.map(evaluate, batches) for row in rows]
+    finally:
+        block.close()
+        block.unlink()
+    return pd.DataFrame(results)
+
+
+def rank(results, by='total_pl', top=None):
+    ranked = results.sort_values(by, ascending=by == 'max_drawdown', na_position='last').reset_index(drop=True)
+    ranked.index += 1
+    return ranked.head(top) if top else ranked
+
+
+def parse_spec(pairs, random_mode):
+    """name=v1,v2,... (choices) or, for a random search, name=low:high (a range)."""
+    spec = {}
+    for pair in pairs:
+        name, _, values = pair.partition('=')
+        if name not in STRATEGY_DEFAULTS:
+            raise SystemExit(f"Unknown parameter {name}; choose from {', '.join(STRATEGY_DEFAULTS)}")
+        kind = type(STRATEGY_DEFAULTS[name])
+        if random_mode and ':' in values:
+            low, high = values.split(':')
+            spec[name] = (kind(low), kind(high))
+        else:
+            spec[name] = [kind(value) for value in values.split(',')]
+    return spec
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep strategy constants over downloaded candles in parallel.")
+    parser.add_argument('params', nargs='+', metavar='NAME=VALUES',
+                        help="e.g. breakout_period=50,100,200 (grid) or take_profit=3:10 with --random")
+    parser.add_argument('--random', type=int, metavar='N', help="Random search of N sets instead of the full grid")
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--granularity', default='M1')
+    parser.add_argument('--start', help="First date, YYYY-MM-DD")
+    parser.add_argument('--end', help="Last date, YYYY-MM-DD")
+    parser.add_argument('--processes', type=int, default=os.cpu_count())
+    parser.add_argument('--rank-by', default='total_pl')
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--csv', help="Write the full ranked table to this file")
+    args = parser.parse_args()
+
+    spec = parse_spec(args.params, args.random is not None)
+    param_sets = random_search(spec, args.random, args.seed) if args.random else grid(spec)
+    data = load_candles(args.granularity, args.start, args.end)
+
+    started = time.perf_counter()
+    results = rank(sweep(data, param_sets, args.processes), args.rank_by)
+    elapsed = time.perf_counter() - started
+
+    print(f"{len(param_sets)} parameter sets over {len(data)} candles on {args.processes} processes "
+          f"in {elapsed:.2f} s ({len(param_sets) / elapsed:.1f} sets/s)")
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(results.head(args.top).to_string())
+    if args.csv:
+        results.to_csv(args.csv, index_label='rank')
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+import numpy as np
+from candle_store import CANDLE_DTYPE, CandleStore
+
+
+def day_of_candles(day, count=3):
+    records = np.zeros(count, dtype=CANDLE_DTYPE)
+    records['time'] = day + np.arange(count) * 60
+    records['o'] = records['h'] = records['l'] = records['c'] = 2500.0
+    records['complete'] = True
+    return records
+
+
+def test_ranged_load_skips_empty_partitions(tmp_path):
+    store = CandleStore(str(tmp_path))
+    store.write('XAU_USD', 'M1', '2024-09-02', day_of_candles(1725235200))
+    store.write('XAU_USD', 'M1', '2024-09-03', np.empty(0, dtype=CANDLE_DTYPE))  # e.g. a header-only CSV
+
+    assert store.partitions('XAU_USD', 'M1', 1725235200, 1725408000) == ['2024-09-02']
+    assert len(store.load('XAU_USD', 'M1', 1725235200, 1725408000)) == 3
+
+
+def test_two_stores_on_one_directory_keep_each_others_entries(tmp_path):
+    history, strategy = CandleStore(str(tmp_path)), CandleStore(str(tmp_path))  # e.g. historical.py and main.py
+    day = 1725321600  # 2024-09-03
+
+    history.write('XAU_USD', 'M1', '2024-09-03', day_of_candles(day))
+    history.add_coverage('XAU_USD', 'M1', day, day + 86400)
+    strategy.write('XAU_USD', 'M5', '2024-09-03', day_of_candles(day, 1))
+    strategy.add_coverage('XAU_USD', 'M5', day, day + 86400)
+
+    for store in (history, strategy, CandleStore(str(tmp_path))):
+        assert store.dates('XAU_USD', 'M1') == ['2024-09-03']
+        assert store.dates('XAU_USD', 'M5') == ['2024-09-03']
+        assert store.missing('XAU_USD', 'M1', day, day + 86400) == []
+        assert store.missing('XAU_USD', 'M5', day, day + 86400) == []
+
+    # A merge sees the partition another store wrote and bumps its version
+    strategy.merge('XAU_USD', 'M1', '2024-09-03', day_of_candles(day + 180, 1))
+    assert history.entry('XAU_USD', 'M1', '2024-09-03')['rows'] == 4
+    assert history.entry('XAU_USD', 'M1', '2024-09-03')['version'] == 2
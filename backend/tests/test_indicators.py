@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+from indicators import (IndicatorEngine, StreamingRSI, calculate_atr, calculate_breakout,
+                        calculate_moving_average, calculate_rsi)
+
+
+def same(streaming, reference):
+    if reference is None or streaming is None:
+        return streaming is reference
+    if np.isnan(reference):
+        return np.isnan(streaming)
+    return streaming == pytest.approx(reference, rel=1e-9, abs=1e-9)
+
+
+def random_bars(rows=400, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 2500 + np.cumsum(rng.normal(0, 0.5, rows))
+    close[150:170] = close[149]  # A flat stretch: no gains or losses
+    spread = np.abs(rng.normal(0, 0.2, rows))
+    return pd.DataFrame({'high': close + spread, 'low': close - spread, 'close': close})
+
+
+def test_indicator_engine_matches_the_reference_functions_after_every_bar():
+    data = random_bars()
+    engine = IndicatorEngine(breakout_period=100)
+
+    for rows, bar in enumerate(data.itertuples(index=False), start=1):
+        engine.update(bar.close, bar.high, bar.low)
+        seen = data.iloc[:rows]
+        assert same(engine.rsi, calculate_rsi(seen.rename(columns={'close': 'Close'})))
+        assert same(engine.moving_average(50), calculate_moving_average(seen, 50))
+        assert same(engine.moving_average(200), calculate_moving_average(seen, 200))
+        assert same(engine.atr, calculate_atr(seen.copy()))
+        high, low = calculate_breakout(seen, 100)
+        assert same(engine.breakout()[0], high) and same(engine.breakout()[1], low)
+
+
+def test_streaming_rsi_revise_matches_recomputing_with_the_final_close():
+    closes = random_bars()['close'].to_numpy()[:60]
+    rsi = StreamingRSI()
+    for rows, close in enumerate(closes, start=1):
+        rsi.update(close - 1.0)  # The candle as it was forming
+        rsi.revise(close)
+        assert same(rsi.value, calculate_rsi(pd.DataFrame({'Close': closes[:rows]})))
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+from lod import OHLCPyramid
+
+
+def random_candles(rng, size):
+    closes = 2500 + np.cumsum(rng.normal(0, 1, size))
+    opens = np.concatenate([[2500.0], closes[:-1]])
+    highs = np.maximum(opens, closes) + rng.random(size)
+    lows = np.minimum(opens, closes) - rng.random(size)
+    return opens, highs, lows, closes
+
+
+@pytest.mark.parametrize('size', [1, 63, 1000, 12345])
+def test_view_matches_brute_force_aggregation(size):
+    rng = np.random.default_rng(size)
+    opens, highs, lows, closes = random_candles(rng, size)
+    pyramid = OHLCPyramid(opens, highs, lows, closes)
+
+    for _ in range(300):
+        start = int(rng.integers(0, size))
+        end = int(rng.integers(start + 1, size + 1))
+        max_bars = int(rng.integers(1, 2000))
+        first, span, o, h, l, c = pyramid.view(start, end, max_bars)
+
+        assert first <= start and first + len(o) * span >= end  # The whole window is drawn
+        assert len(o) <= max_bars + 1  # Aligning the groups can add one bar
+        for i in range(len(o)):
+            low, high = first + i * span, min(first + (i + 1) * span, size)
+            assert (o[i], h[i], l[i], c[i]) == (opens[low], highs[low:high].max(), lows[low:high].min(),
+                                                closes[high - 1])
@@ -0,0 +1,11 @@
+import threading
+from pipeline import Pipeline
+
+
+def test_timer_with_an_inbox_runs_once_before_its_first_wait():
+    called = threading.Event()
+    engine = Pipeline()
+    engine.timer('account', called.set, 60, inbox='account')
+    engine.start()
+
+    assert called.wait(5)  # Not after the 60 s interval, nor only once something arrives
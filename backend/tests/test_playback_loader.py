@@ -0,0 +1,21 @@
+import threading
+import pandas as pd
+from playback_loader import PlaybackLoader
+
+
+def test_a_failed_prefetch_is_loaded_again_by_get():
+    release = threading.Event()
+
+    def load(day):
+        if threading.current_thread().name.startswith('playback-loader'):
+            release.wait(5)
+            raise OSError(f"{day} unavailable")
+        return pd.DataFrame({'day': [day]})
+
+    loader = PlaybackLoader(['2024-09-02', '2024-09-03'], load)
+    assert loader.get(0)['day'][0] == '2024-09-02'  # Queues day 1, whose prefetch will fail
+    assert 1 in loader._pending
+
+    threading.Timer(0.2, release.set).start()
+    assert loader.get(1)['day'][0] == '2024-09-03'  # Waits on the failing prefetch, then loads it itself
+    loader.close()
@@ -0,0 +1,92 @@
+import oandapyV20.endpoints.orders as orders
+import oandapyV20.endpoints.transactions as trans
+import pytest
+from fake_oanda import FakeOanda
+from positions import PositionBook
+
+
+@pytest.fixture
+def fake():
+    fake = FakeOanda(price=2500.0).start()
+    yield fake
+    fake.stop()
+
+
+def market_order(fake, units, tp_price=None, sl_distance=None):
+    """Places a market order through the fake's HTTP API. Returns the fill transaction."""
+    order = {'type': 'MARKET', 'instrument': 'XAU_USD', 'units': str(units)}
+    if tp_price is not None:
+        order['takeProfitOnFill'] = {'price': str(tp_price)}
+    if sl_distance is not None:
+        order['stopLossOnFill'] = {'distance': str(sl_distance)}
+    r = orders.OrderCreate(fake.account_id, data={'order': order})
+    fake.client().request(r)
+    return r.response['orderFillTransaction']
+
+
+def transactions_since(fake, transaction_id):
+    r = trans.TransactionsSinceID(accountID=fake.account_id, params={'id': transaction_id})
+    fake.client().request(r)
+    return r.response['transactions']
+
+
+def test_seed_loads_open_trades(fake):
+    first = market_order(fake, 1)
+    second = market_order(fake, -2)
+
+    book = PositionBook(fake.client(), fake.account_id)
+    book.seed()
+
+    trades = {trade['id']: trade for trade in book.open_trades()}
+    assert set(trades) == {first['tradeOpened']['tradeID'], second['tradeOpened']['tradeID']}
+    assert trades[second['tradeOpened']['tradeID']]['currentUnits'] == '-2'
+    assert book.has_open_trades()
+    assert book.newest_transaction_id == int(fake.last_transaction_id)
+
+
+def test_order_fill_is_applied_once(fake):
+    book = PositionBook(fake.client(), fake.account_id)
+    book.seed()
+
+    fill = market_order(fake, 1)
+    book.apply_order_response(fill)
+    # The same fill arrives again from the transaction feed
+    for transaction in transactions_since(fake, 0):
+        book.apply_transaction(transaction)
+    book.apply_order_response(fill)
+
+    assert [trade['id'] for trade in book.open_trades()] == [fill['tradeOpened']['tradeID']]
+    assert book.stats['transactions_applied'] == 1
+
+
+def test_take_profit_close_from_set_price(fake):
+    book = PositionBook(fake.client(), fake.account_id)
+    book.seed()
+    fill = market_order(fake, 1, tp_price=2506, sl_distance=3)
+    book.apply_order_response(fill)
+
+    fake.set_price(2506.5)  # Crosses the take-profit
+    closes = [t for t in transactions_since(fake, fill['id']) if t.get('tradesClosed')]
+    assert [t['reason'] for t in closes] == ['TAKE_PROFIT_ORDER']
+
+    for transaction in closes:
+        book.apply_transaction(transaction)
+    assert not book.has_open_trades()
+    assert not fake.trades
+
+
+def test_reconcile_ignores_snapshot_older_than_newest_fill(fake):
+    book = PositionBook(fake.client(), fake.account_id)
+    book.seed()
+    stale_trades, stale_id = [], fake.last_transaction_id  # Snapshot taken before the fill
+
+    fill = market_order(fake, 1)
+    book.apply_order_response(fill)
+
+    assert book.reconcile(stale_trades, stale_id) is False
+    assert [trade['id'] for trade in book.open_trades()] == [fill['tradeOpened']['tradeID']]
+
+    # A snapshot at least as new as the fill is applied
+    current = fake.account()['account']
+    assert book.reconcile(current['trades'], current['lastTransactionID']) is True
+    assert [trade['id'] for trade in book.open_trades()] == [fill['tradeOpened']['tradeID']]
@@ -0,0 +1,32 @@
+import numpy as np
+import resample
+from candle_store import CANDLE_DTYPE, CandleStore
+
+DAY = 1725235200  # 2024-09-02 00:00 UTC
+
+
+def minutes(closes, complete=True):
+    records = np.zeros(len(closes), dtype=CANDLE_DTYPE)
+    records['time'] = DAY + np.arange(len(closes)) * 60
+    records['o'] = records['h'] = records['l'] = records['c'] = closes
+    records['volume'] = 1
+    records['complete'] = complete
+    return records
+
+
+def test_cached_day_follows_a_completed_candle_with_the_same_row_count(tmp_path):
+    store = CandleStore(str(tmp_path))
+    forming = minutes([2500.0, 2501.0, 2502.0])
+    forming['complete'][-1] = False
+    store.write('XAU_USD', 'M1', '2024-09-02', forming)
+
+    first = resample.candles(store, 'XAU_USD', 'M5', '2024-09-02')
+    assert first['c'][0] == 2502.0 and not first['complete'][0]
+
+    # The forming candle is replaced by its completed version: same number of rows
+    store.merge('XAU_USD', 'M1', '2024-09-02', minutes([2500.0, 2501.0, 2504.0])[2:])
+    assert store.entry('XAU_USD', 'M1', '2024-09-02')['rows'] == 3
+
+    rebuilt = resample.candles(store, 'XAU_USD', 'M5', '2024-09-02')
+    assert rebuilt['c'][0] == 2504.0 and rebuilt['h'][0] == 2504.0 and rebuilt['l'][0] == 2500.0
+    assert rebuilt['complete'][0]
@@ -0,0 +1,20 @@
+from transaction_store import TransactionStore
+
+
+def closed_fill(transaction_id):
+    return {'id': str(transaction_id), 'type': 'ORDER_FILL', 'units': '-1', 'pl': '1.5', 'price': '2500.000'}
+
+
+def test_history_pages_back_and_handles_an_empty_page(tmp_path):
+    store = TransactionStore('101-001', str(tmp_path / 'transactions.db'))
+    store.append([closed_fill(i) for i in range(1, 6)], 5)
+
+    page, next_before = store.history(2)
+    assert [row['order_id'] for row in page] == ['4', '5'] and next_before == 4
+    page, next_before = store.history(2, next_before)
+    assert [row['order_id'] for row in page] == ['2', '3'] and next_before == 2
+    page, next_before = store.history(2, next_before)
+    assert [row['order_id'] for row in page] == ['1'] and next_before is None
+
+    assert store.history(0) == ([], None)
+    store.close()
@@ -0,0 +1,156 @@
+import math
+import os
+import struct
+import sys
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+
+# File layout: a 16-byte header followed by fixed-size little-endian records,
+# so the record area can be handed straight to np.memmap / np.fromfile.
+MAGIC = b'ALGTICK1'
+HEADER = struct.Struct('<8sII')  # magic, record size, reserved
+RECORD = struct.Struct('<6d')
+RECORD_DTYPE = np.dtype([
+    ('timestamp', '<f8'),  # Epoch seconds, UTC
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('t_vwap', '<f8'),
+])
+COLUMNS = list(RECORD_DTYPE.names)
+
+
+def format_timestamp(epoch_seconds):
+    """Formats epoch seconds the way pandas writes a UTC timestamp to CSV."""
+    return datetime.fromtimestamp(epoch_seconds, timezone.utc).isoformat(sep=' ')
+
+
+class TickJournal:
+    """Append-only journal of live ticks with fixed-size binary records.
+
+    The last record, the record count and running mean/variance of the close are
+    kept in memory, so duplicate checks and the volatility filter never touch the
+    file. Windows of the most recent ticks are read by offset without parsing
+    anything. If `csv_path` is given, every appended tick is also appended as a
+    line to that CSV so existing tooling can keep reading live_price_data.csv.
+    """
+
+    def __init__(self, path, csv_path=None):
+        self.path = path
+        self.csv_path = csv_path
+        self._open()
+
+    def _open(self):
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < HEADER.size:
+            with open(self.path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, RECORD.size, 0))
+        else:
+            with open(self.path, 'rb') as f:
+                magic, record_size, _ = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or record_size != RECORD.size:
+                raise ValueError(f"{self.path} is not a tick journal")
+
+        # A crash mid-write can leave a partial record at the end; drop it
+        size = os.path.getsize(self.path)
+        self.count = (size - HEADER.size) // RECORD.size
+        if HEADER.size + self.count * RECORD.size != size:
+            os.truncate(self.path, HEADER.size + self.count * RECORD.size)
+
+        self._file = open(self.path, 'ab')
+        self.last_record = None
+        self._close_mean = 0.0
+        self._close_m2 = 0.0
+
+        if self.count:
+            closes = self.memmap()['close']
+            self._close_mean = float(closes.mean())
+            self._close_m2 = float(((closes - self._close_mean) ** 2).sum())
+            self.last_record = dict(zip(COLUMNS, self.window(1)[0].tolist()))
+
+    def __len__(self):
+        return self.count
+
+    def append(self, timestamp, open_price, high, low, close, t_vwap):
+        """Appends a tick. Returns False without writing if it repeats the last timestamp."""
+        if hasattr(timestamp, 'timestamp'):
+            timestamp = timestamp.timestamp()
+        record = (float(timestamp), float(open_price), float(high), float(low), float(close), float(t_vwap))
+
+        if self.last_record is not None and self.last_record['timestamp'] == record[0]:
+            return False
+
+        self._file.write(RECORD.pack(*record))
+        self._file.flush()
+
+        # Welford's update for the running close variance
+        self.count += 1
+        delta = record[4] - self._close_mean
+        self._close_mean += delta / self.count
+        self._close_m2 += delta * (record[4] - self._close_mean)
+        self.last_record = dict(zip(COLUMNS, record))
+
+        if self.csv_path:
+            self._append_csv(record)
+        return True
+
+    def _append_csv(self, record):
+        new_file = not os.path.exists(self.csv_path)
+        with open(self.csv_path, 'a') as f:
+            if new_file:
+                f.write(','.join(COLUMNS) + '\n')
+            f.write(format_timestamp(record[0]) + ',' + ','.join(repr(v) for v in record[1:]) + '\n')
+
+    def close_std(self):
+        """Sample standard deviation of every close in the journal (same as pandas' .std())."""
+        if self.count < 2:
+            return math.nan
+        return math.sqrt(self._close_m2 / (self.count - 1))
+
+    def window(self, n):
+        """Returns the last `n` records as a numpy structured array."""
+        n = min(n, self.count)
+        return np.fromfile(self.path, dtype=RECORD_DTYPE, count=n,
+                           offset=HEADER.size + (self.count - n) * RECORD.size)
+
+    def memmap(self):
+        """Maps every record in the journal read-only."""
+        if not self.count:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        return np.memmap(self.path, dtype=RECORD_DTYPE, mode='r', offset=HEADER.size, shape=(self.count,))
+
+    def to_frame(self, n=None):
+        """Returns the last `n` records (all of them if None) as a DataFrame shaped like live_price_data.csv."""
+        records = self.window(self.count if n is None else n)
+        data = pd.DataFrame(records)
+        data['timestamp'] = pd.to_datetime(data['timestamp'], unit='s', utc=True)
+        return data
+
+    def export_csv(self, csv_path):
+        """Writes the whole journal to a CSV in the live_price_data.csv format."""
+        data = self.to_frame()
+        data['timestamp'] = [format_timestamp(ts.timestamp()) for ts in data['timestamp']]
+        data.to_csv(csv_path, index=False)
+
+    def truncate(self):
+        """Empties the journal (and its CSV export) for a fresh session."""
+        self._file.close()
+        os.remove(self.path)
+        if self.csv_path and os.path.exists(self.csv_path):
+            os.remove(self.csv_path)
+        self._open()
+
+    def close(self):
+        self._file.close()
+
+
+if __name__ == "__main__":
+    # Usage: python tick_journal.py <journal file> <output csv>
+    if len(sys.argv) != 3:
+        print("Usage: python tick_journal.py <journal file> <output csv>")
+        sys.exit(1)
+
+    journal = TickJournal(sys.argv[1])
+    journal.export_csv(sys.argv[2])
+    print(f"Exported {len(journal)} ticks from {sys.argv[1]} to {sys.argv[2]}")
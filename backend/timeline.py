@@ -0,0 +1,58 @@
+import pandas as pd
+
+
+class Timeline:
+    """A run of playback days presented as one continuous series of candles.
+
+    Days come from a PlaybackLoader and are stitched on lazily: the next day is
+    appended once the cursor gets within `lookahead` candles of the end (the
+    loader will usually have prefetched it), and days the cursor has left behind
+    are dropped once more than `max_days` are held, so a week or month plays
+    back with only a few days in memory. `data` is the stitched frame and
+    cursor indices are positions in it; when days are dropped from the front,
+    advance() says by how much everything shifted.
+    """
+
+    def __init__(self, loader, first_day=0, lookahead=60, max_days=3):
+        self.loader = loader
+        self.lookahead = lookahead
+        self.max_days = max(2, max_days)
+        self.first_day = first_day  # Index in loader.partitions of the first day held
+        self.data = loader.get(first_day)
+        self.lengths = [len(self.data)]  # Candles of each day held
+        self.dropped = 0  # Candles dropped from the front so far
+
+    @property
+    def last_day(self):
+        return self.first_day + len(self.lengths) - 1
+
+    def has_more(self):
+        return self.last_day + 1 < len(self.loader.partitions)
+
+    def day_of(self, index):
+        """The loader.partitions index of the day candle `index` belongs to."""
+        for offset, length in enumerate(self.lengths):
+            if index < length:
+                return self.first_day + offset
+            index -= length
+        return self.last_day
+
+    def advance(self, index):
+        """Moves the window along for a cursor at `index`. Returns (appended frame or None, candles dropped)."""
+        appended = None
+        while index >= len(self.data) - self.lookahead and self.has_more():
+            day = self.loader.get(self.last_day + 1)
+            self.lengths.append(len(day))
+            self.data = pd.concat([self.data, day])
+            appended = day if appended is None else pd.concat([appended, day])
+            if len(day):
+                break  # Days with no candles (e.g. a holiday) are skipped straight over
+
+        dropped = 0
+        while len(self.lengths) > self.max_days and index - dropped >= self.lengths[0] + self.lookahead:
+            dropped += self.lengths.pop(0)
+            self.first_day += 1
+        if dropped:
+            self.data = self.data.iloc[dropped:]
+            self.dropped += dropped
+        return appended, dropped
@@ -0,0 +1,183 @@
+import json
+import os
+import sqlite3
+import threading
+import oandapyV20.endpoints.transactions as trans
+
+default_store_file = os.path.join(os.path.dirname(os.path.realpath(__file__)), "transactions.db")
+
+
+def history_row(transaction):
+    """The /get_history fields of a transaction that realized P/L, or None for any other transaction."""
+    if 'units' in transaction and 'pl' in transaction and 'price' in transaction and float(transaction['pl']) != 0:
+        return {
+            "order_id": transaction['id'],
+            "units": transaction['units'],
+            "pl": float(transaction['pl']),
+            "price": transaction['price']
+        }
+    return None
+
+
+class TransactionStore:
+    """Account transactions in a local SQLite file, plus the ID of the last one synced.
+
+    Transactions are stored once each (keyed by account and ID), whole, with
+    the trade-history fields pulled out into indexed columns so /get_history
+    can page through them without parsing JSON. The sync cursor is written
+    in the same SQLite transaction as the rows it covers, so a crash can't
+    leave the two disagreeing.
+    """
+
+    def __init__(self, account_id, path=default_store_file):
+        self.account_id = account_id
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS transactions (
+                account_id TEXT NOT NULL,
+                id INTEGER NOT NULL,
+                type TEXT,
+                time TEXT,
+                units TEXT,
+                pl REAL,
+                price TEXT,
+                body TEXT NOT NULL,
+                PRIMARY KEY (account_id, id)
+            );
+            CREATE INDEX IF NOT EXISTS transactions_history
+                ON transactions (account_id, id) WHERE pl IS NOT NULL;
+            CREATE TABLE IF NOT EXISTS sync_state (
+                account_id TEXT PRIMARY KEY,
+                last_transaction_id INTEGER NOT NULL
+            );
+        """)
+
+    @property
+    def last_transaction_id(self):
+        """ID of the newest transaction synced, or None before the first sync."""
+        with self._lock:
+            row = self._db.execute("SELECT last_transaction_id FROM sync_state WHERE account_id = ?",
+                                   (self.account_id,)).fetchone()
+        return row[0] if row else None
+
+    def append(self, transactions, last_transaction_id):
+        """Stores `transactions` and moves the cursor to `last_transaction_id`. Returns how many were new."""
+        rows = []
+        for transaction in transactions:
+            history = history_row(transaction)
+            rows.append((self.account_id, int(transaction['id']), transaction.get('type'), transaction.get('time'),
+                         history and history['units'], history and history['pl'], history and history['price'],
+                         json.dumps(transaction)))
+
+        with self._lock, self._db:
+            before = self._db.total_changes
+            self._db.executemany("INSERT OR IGNORE INTO transactions VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            added = self._db.total_changes - before
+            self._db.execute(
+                "INSERT INTO sync_state VALUES (?, ?) ON CONFLICT(account_id) DO UPDATE SET "
+                "last_transaction_id = MAX(last_transaction_id, excluded.last_transaction_id)",
+                (self.account_id, int(last_transaction_id)))
+        return added
+
+    def history(self, limit=100, before=None):
+        """One page of trade history, oldest first: the `limit` newest rows with an ID below `before`.
+
+        Returns (rows, next_before); pass next_before back to get the page before
+        this one. It is None on the oldest page.
+        """
+        query = "SELECT id, units, pl, price FROM transactions WHERE account_id = ? AND pl IS NOT NULL"
+        params = [self.account_id]
+        if before is not None:
+            query += " AND id < ?"
+            params.append(int(before))
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit + 1)  # One extra to see whether an older page exists
+
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+
+        page = rows[:limit]
+        next_before = page[-1][0] if page and len(rows) > limit else None
+        return ([{"order_id": str(i), "units": units, "pl": pl, "price": price}
+                 for i, units, pl, price in reversed(page)], next_before)
+
+    def history_count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM transactions WHERE account_id = ? AND pl IS NOT NULL",
+                                    (self.account_id,)).fetchone()[0]
+
+    def transaction(self, transaction_id):
+        with self._lock:
+            row = self._db.execute("SELECT body FROM transactions WHERE account_id = ? AND id = ?",
+                                   (self.account_id, int(transaction_id))).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def close(self):
+        self._db.close()
+
+
+class TransactionSync:
+    """Keeps a TransactionStore up to date with the account, one cursor step at a time.
+
+    The first sync backfills the whole account history in TransactionIDRange
+    pages. After that each sync is a single TransactionsSinceID from the stored
+    cursor, which returns an empty list when the account is idle. New
+    transactions are also passed to the position book, when one is given.
+    """
+
+    page_size = 1000  # Most transactions OANDA returns per ID range request
+
+    def __init__(self, client, store, positions=None):
+        self.client = client
+        self.store = store
+        self.positions = positions
+        self.stats = {'requests': 0, 'transactions': 0, 'last_new': 0}
+
+    def _request(self, endpoint):
+        self.client.request(endpoint)
+        self.stats['requests'] += 1
+        return endpoint.response
+
+    def backfill(self):
+        """Downloads every transaction up to the account's current last one."""
+        account_id = self.store.account_id
+        last_id = int(self._request(trans.TransactionList(account_id))['lastTransactionID'])
+
+        added = 0
+        for start in range(1, last_id + 1, self.page_size):
+            end = min(start + self.page_size - 1, last_id)
+            response = self._request(trans.TransactionIDRange(accountID=account_id,
+                                                              params={"from": start, "to": end}))
+            transactions = response.get('transactions', [])
+            added += self.store.append(transactions, end)
+            self._apply(transactions)
+        if last_id == 0:
+            self.store.append([], 0)  # A new account has no pages, but the cursor still has to be set
+        return added
+
+    def sync(self):
+        """Fetches and stores the transactions since the cursor. Returns how many were new."""
+        cursor = self.store.last_transaction_id
+        if cursor is None:
+            added = self.backfill()
+        else:
+            response = self._request(trans.TransactionsSinceID(accountID=self.store.account_id,
+                                                               params={"id": cursor}))
+            transactions = response.get('transactions', [])
+            added = self.store.append(transactions, response.get('lastTransactionID', cursor))
+            self._apply(transactions)
+
+        self.stats['transactions'] += added
+        self.stats['last_new'] = added
+        return added
+
+    def _apply(self, transactions):
+        if self.positions is None or self.positions.last_transaction_id is None:
+            return  # The book is seeded from OpenTrades; it only needs what came after
+        cursor = int(self.positions.last_transaction_id)
+        for transaction in transactions:
+            if int(transaction['id']) > cursor:
+                self.positions.apply_transaction(transaction)
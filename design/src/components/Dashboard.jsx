@@ -193,7 +193,7 @@ const Dashboard = () => {
   }, []);
 
   useEffect(() => {
-    let dataInterval, balanceInterval, livePriceInterval;
+    let dataInterval, stream;
 
     const fetchData = async () => {
   try {
@@ -258,49 +258,6 @@ const Dashboard = () => {
 };
 
 
-    const fetchBalance = async () => {
-      try {
-        const response = await fetch('http://localhost:3001/get_balance');
-
-        if (!response.ok) {
-          throw new Error(`HTTP error! Status: ${response.status}`);
-        }
-
-        const data = await response.json();
-        console.log('Fetched Balance:', data);
-        setBalance(data.balance);
-      } catch (err) {
-        console.error('Error fetching balance:', err);
-      }
-    };
-
-    const fetchUnrealizedPL = async () => {
-      try {
-        const response = await fetch('http://localhost:3001/get_unrealised');
-        if (!response.ok) {
-          throw new Error(`HTTP error! Status: ${response.status}`);
-        }
-        const data = await response.json();
-        console.log('Fetched Unrealized PL:', data);
-        setUnrealizedPL(data.unrealizedPL);
-      } catch (err) {
-        console.error('Error fetching unrealized PL:', err);
-      }
-    };
-    
-    const fetchProfitLoss = async () => {
-      try {
-        const response = await fetch('http://localhost:3001/get_profit');
-        if (!response.ok) {
-          throw new Error(`HTTP error! Status: ${response.status}`);
-        }
-        const data = await response.json();
-        console.log('Fetched Profit/Loss:', data);
-        setProfitLoss(data.pl);
-      } catch (err) {
-        console.error('Error fetching profit/loss:', err);
-      }
-    };
     const fetchTradeHistory = async () => {
       try {
           const response = await fetch('http://localhost:3001/get_history');
@@ -318,41 +275,49 @@ const Dashboard = () => {
     
     
 
-    const fetchLivePrice = async () => {
-      try {
-        const response = await fetch('http://localhost:3001/get_live_price');
-    
-        if (!response.ok) {
-          throw new Error(`HTTP error! Status: ${response.status}`);
+    const applyLivePrice = (livePrice) => {
+      setLivePrice(livePrice);
+
+      const currentTime = new Date();
+      setRealTimeChartData(prevData => {
+        const updatedData = {
+          labels: [...prevData.labels, currentTime],
+          datasets: [
+            {
+              ...prevData.datasets[0],
+              data: [...prevData.datasets[0].data, { x: currentTime, y: livePrice }]
+            },
+          ],
+        };
+
+        if (updatedData.labels.length > 50) {
+          updatedData.labels = updatedData.labels.slice(-30);
+          updatedData.datasets[0].data = updatedData.datasets[0].data.slice(-30);
         }
-    
-        const data = await response.json();
-        setLivePrice(data.live_price);
-
-        const currentTime = new Date();
-        setRealTimeChartData(prevData => {
-          const updatedData = {
-            labels: [...prevData.labels, currentTime],
-            datasets: [
-              {
-                ...prevData.datasets[0],
-                data: [...prevData.datasets[0].data, { x: currentTime, y: data.live_price }]
-              },
-            ],
-          };
-    
-          if (updatedData.labels.length > 50) {
-            updatedData.labels = updatedData.labels.slice(-30);
-            updatedData.datasets[0].data = updatedData.datasets[0].data.slice(-30);
-          }
-    
-          return updatedData;
-        });
-      } catch (err) {
-        console.error('Error fetching live price:', err);
-      }
+
+        return updatedData;
+      });
+    };
+
+    // Live price, volatility and account values are pushed by the backend
+    // whenever they change instead of being polled
+    const openStream = () => {
+      const source = new EventSource('http://localhost:3001/stream');
+      const on = (topic, handler) =>
+        source.addEventListener(topic, (event) => handler(JSON.parse(event.data)));
+
+      on('live_price', (data) => applyLivePrice(data.live_price));
+      on('volatility', (data) => {
+        setVolatility(data.volatility);       // Set volatility
+        setTVwap(data.t_vwap);                // Set T-VWAP
+        setLastUpdated(data.last_updated);     // Update lastUpdated timestamp
+      });
+      on('balance', (data) => setBalance(data.balance));
+      on('unrealised', (data) => setUnrealizedPL(data.unrealizedPL));
+      on('profit', (data) => setProfitLoss(data.pl));
+      source.onerror = (err) => console.error('Stream error, reconnecting:', err);
+      return source;
     };
-    
     
     
 
@@ -380,48 +345,17 @@ const Dashboard = () => {
     };
     
 
-    const fetchVolatility = async () => {
-      try {
-        const response = await fetch('http://localhost:3001/get_volatility');
-        
-        if (!response.ok) {
-          throw new Error(`HTTP error! Status: ${response.status}`);
-        }
-    
-        const data = await response.json();
-        console.log('Fetched Volatility:', data);
-        
-        // Set the fetched values to state
-        setVolatility(data.volatility);       // Set volatility
-        setTVwap(data.t_vwap);                // Set T-VWAP
-        setLastUpdated(data.last_updated);     // Update lastUpdated timestamp
-    
-      } catch (err) {
-        console.error('Error fetching volatility:', err);
-      }
-    };
-    
-    
-
     if (statusOn) {
       fetchData();
       fetchPivotPoints();
       fetchTradeHistory();
       fetchActiveTrades();
-      fetchVolatility();
   
       dataInterval = setInterval(fetchData, 5000);
-      volatilityInterval = setInterval(fetchVolatility, 2000);
       historyInterval = setInterval(fetchTradeHistory, 5000);
       activeInterval = setInterval(fetchActiveTrades, 2000);
-      balanceInterval = setInterval(() => {
-        fetchBalance();
-        fetchUnrealizedPL();
-        fetchProfitLoss();
-      }, 2000);
-
-      fetchLivePrice();
-      livePriceInterval = setInterval(fetchLivePrice, 1000);
+
+      stream = openStream();
     } else {
       setChartData({
         labels: [],
@@ -448,11 +382,9 @@ const Dashboard = () => {
   
     return () => {
       clearInterval(dataInterval);
-      clearInterval(balanceInterval);
       clearInterval(historyInterval);
-      clearInterval(volatilityInterval);
-      clearInterval(livePriceInterval);
       clearInterval(activeInterval);
+      if (stream) stream.close();
     };
   }, [statusOn]);
   
@@ -461,7 +393,7 @@ const Dashboard = () => {
     addLog(`Data retrieval ${statusOn ? 'stopped' : 'started'}`, 'info');
   };
   
-  let dataInterval, balanceInterval, historyInterval, activeInterval, volatilityInterval;
+  let dataInterval, historyInterval, activeInterval;
   
 
   const toggleStatus = () => {